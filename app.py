@@ -1,1756 +1,82 @@
 import streamlit as st
-import tempfile
 import os
 import pandas as pd
-import pdfplumber
-from datetime import datetime
-import re
 import warnings
-import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from extractor import FixedIncomeTermsheetExtractor
+from issuer_detection import best_issuer
+from regex_bounds import DEFAULT_BUDGET
+from ingest import expand_uploads
+from sandbox import SandboxError, SandboxLimits
+from batch_pool import create_pool, extract_rows
+from batch_jobs import BatchJob
+from batch_scheduler import Scheduler, estimate_cost
+from batch_manifest import FAILED, BatchManifest, append_documents, file_key
 warnings.filterwarnings('ignore')
 
-class FixedIncomeTermsheetExtractor:
-    def __init__(self):
-        # Define your exact column mapping from the Database sheet
-        self.column_mapping = {
-            0: 'Investment Name',
-            1: 'Issuer', 
-            2: 'Product Name',
-            3: 'Investment Thematic',
-            4: 'TYPE',
-            5: 'Coupon - QTR',
-            6: 'Coupon Rate - Annual',
-            7: 'Product Status',
-            8: 'Knock-In%',
-            9: 'Knock-Out%',
-            10: 'Issue Price%',
-            11: 'Coupon Barrier%',
-            12: 'Minimum Tenor (Q)',
-            13: 'Maximum Tenor (Q)',
-            14: 'Observation Frequency',
-            15: 'CCY',
-            16: 'Strike Date',
-            17: 'Issue Date',
-            18: 'ISIN',
-            19: 'Underlying 1',
-            20: 'Underlying 2',
-            21: 'Underlying 3',
-            22: 'Underlying 4',
-            23: 'Investment $',
-            24: 'Total Units ',
-            25: 'Notional Value',
-            26: 'AUD Equivalent',
-            27: 'Maturity Date',
-            28: 'Revenue',
-            29: 'UF%',
-            30: 'Underlying 1 - Issue Price',
-            31: 'Underlying 2 - Issue Price',
-            32: 'Underlying 3 - Issue Price',
-            33: 'Underlying 4 - Issue Price',
-            34: 'Underlying 1 - Knock In Price',
-            35: 'Underlying 2 - Knock In Price',
-            36: 'Underlying 3 - Knock In Price',
-            37: 'Underlying 4 - Knock In Price',
-            38: 'Underlying 1 - Knock Out',
-            39: 'Underlying 2 - Knock Out',
-            40: 'Underlying 3 - Knock Out',
-            41: 'Underlying 4 - Knock Out',
-            42: 'Underlying 1 - Market Close',
-            43: 'Underlying 2 - Market Close',
-            44: 'Underlying 3 - Market Close',
-            45: 'Underlying 4 - Market Close',
-            46: 'Maturity Date:',
-            47: 'Valuation Date 1',
-            48: 'Valuation Date 2',
-            49: 'Valuation Date 3',
-            50: 'Valuation Date 4',
-            51: 'Valuation Date 5',
-            52: 'Valuation Date 6',
-            53: 'Valuation Date 7',
-            54: 'Valuation Date 8',
-            55: 'Valuation Date 9'
-        }
-        
-        # Define issuer-specific patterns
-        self.issuer_patterns = {
-            'morgan_stanley': {
-                'identifiers': ['MORGAN STANLEY', 'MS&Co', 'Morgan Stanley & Co'],
-                'issuer_name': 'Morgan Stanley & Co. International PLC',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'coupon_rate': r'(\d+\.?\d*)\s*%.*(?:coupon|rate)',
-                    'knock_in': r'(\d+)%.*(?:knock.?in|barrier)',
-                    'dates': r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})'
-                }
-            },
-            'macquarie': {
-                'identifiers': ['MACQUARIE', 'MBL', 'Macquarie Bank Limited', 'EQUITY LINKED NOTE'],
-                'issuer_name': 'Macquarie Bank Limited',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'product_name': r'(EQUITY LINKED NOTE)',
-                    'coupon_base_rate': r'(\d+\.?\d*%)',  # Base rate for escalation
-                    'coupon_formula': r'(\d+\.?\d*%)\s*x\s*\(1\s*\+\s*Number of Periods\)',
-                    'knock_in_price': r'Knock-in Price.*?(\d+\.?\d*)%.*?Initial Price',
-                    'knock_out_price': r'Knock-out Price.*?(\d+\.?\d*)%.*?Initial Price',
-                    'tickers': r'([A-Z]{3,4}\.[A-Z]{1,2})',  # Exchange-specific tickers
-                    'usd_prices': r'\[USD\s*([\d.]+)\]',
-                    'aud_amounts': r'AUD\s*([\d,]+(?:\.\d{2})?)',
-                    'dates': r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-                    'aggregate_nominal': r'Aggregate Nominal Amount.*?AUD\s*([\d,]+(?:\.\d{2})?)',
-                    'denomination': r'Specified Denomination.*?AUD\s*([\d,]+)',
-                    'us_tech_stocks': r'(ORCL\.N|AVGO\.OQ|META\.OQ|NVDA\.OQ)'
-                }
-            },
-            'citigroup': {
-                'identifiers': ['CITIGROUP', 'CITI', 'Citigroup Global Markets Holdings', 'CGMHI', 'Snowballing Autocall Notes'],
-                'issuer_name': 'Citigroup Global Markets Holdings Inc.',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'product_name': r'(Snowballing Autocall Notes[^"]*)',
-                    'snowball_percentage': r'Snowball Percentage.*?(\d+\.?\d*%)',
-                    'coupon_rates': r'(\d+\.?\d*%(?:,\s*\d+\.?\d*%)*)',  # Multiple escalating rates
-                    'knock_in_barrier': r'Knock-In Barrier Level.*?(\d+\.?\d*)%',
-                    'autocall_barrier': r'Autocall Barrier Level.*?(\d+\.?\d*)%',
-                    'initial_level': r'Initial Level.*?([A-Z]{3}\s*[\d,]+\.?\d*)',
-                    'currency': r'Currency.*?(Australian Dollar|USD|EUR|GBP|CHF|AUD)',
-                    'denomination': r'Denomination.*?([A-Z]{3}\s*[\d,]+)',
-                    'issue_size': r'Issue Size.*?([A-Z]{3}\s*[\d,]+)',
-                    'dates': r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-                    'underlying_names': r'(Banco Santander SA|BNP Paribas|Societe Generale|UBS Group AG)',
-                    'worst_performing': r'Worst Performing.*?Underlying'
-                }
-            },
-            'goldman_sachs': {
-                'identifiers': ['GOLDMAN SACHS', 'GS&Co', 'Goldman Sachs'],
-                'issuer_name': 'Goldman Sachs International',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'coupon_rate': r'(\d+\.?\d*)\s*%.*(?:coupon|quarterly)',
-                    'knock_in': r'(\d+)%.*(?:protection|barrier)',
-                    'dates': r'(\d{1,2})/(\d{1,2})/(\d{4})'
-                }
-            },
-            'ubs': {
-                'identifiers': ['UBS', 'UBS Investments Australia', 'UBS AG', 'Callable Equity Basket', 'UBS Equity Goals'],
-                'issuer_name': 'UBS Investments Australia Pty Ltd',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'product_name': r'(Callable Equity Basket[^"]*|UBS Equity Goals)',
-                    'kick_in_level': r'Kick-in Level.*?(\d+)%.*?Initial Level',
-                    'call_level': r'Call Level.*?(\d+)%.*?Initial Level',
-                    'snowball_coupon_rate': r'Snowball Coupon Rate.*?(\d+\.?\d*)%',
-                    'initial_level': r'Initial Level.*?USD\s*([\d.]+)',
-                    'usd_4decimal': r'USD\s*([\d.]{4,})',  # 4 decimal place amounts
-                    'bloomberg_codes': r'Bloomberg code:\s*([A-Z]+\s+[A-Z]{2})',
-                    'dates': r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-                    'aud_amounts': r'AUD\s*([\d,]+)',
-                    'tech_stocks': r'(Alphabet Inc|Meta Platforms Inc|Microsoft Corporation|Oracle Corporation)',
-                    'call_observation_n': r'N.*?(\d+)'  # For tenor extraction
-                }
-            },
-            'bnp_paribas': {
-                'identifiers': ['BNP PARIBAS', 'BNP Paribas Issuance', 'Stock Basket Periodic Callable', 'Certificate'],
-                'issuer_name': 'BNP Paribas Issuance B.V.',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'product_title': r'(\d+\s+Months.*?Certificates)',
-                    'coupon_annual': r'C\s*=\s*(\d+)%\s*p\.a\.',
-                    'knock_in_percentage': r'(\d+\.?\d*)%.*?Initial Spot Price',
-                    'trigger_percentage': r'(\d+)%.*?Initial Spot Price',
-                    'initial_spot_price': r'Initial Spot Price.*?USD\s*([\d.]+)',
-                    'knock_in_price': r'Knock-In Price.*?USD\s*([\d.]+)',
-                    'trigger_price': r'Trigger Price.*?USD\s*([\d.]+)',
-                    'bloomberg_tickers': r'([A-Z]+\s+UW)',
-                    'company_names': r'(Alphabet Inc|Meta Platforns Inc|NVIDIA Corp|MICROSOFT CORP)',
-                    'dates_ordinal': r'(\w+)\s+(\d{1,2})(?:st|nd|rd|th),\s+(\d{4})',
-                    'aud_amounts': r'AUD\s*([\d,]+)',
-                    'certificate_count': r'Number of Certificates.*?(\d+)',
-                    'notional_per_cert': r'AUD\s*(\d+).*?per Certificate',
-                    'reference_code': r'(CE\d+[A-Z]+)'
-                }
-            },
-            'barclays': {
-                'identifiers': ['BARCLAYS', 'Barclays Bank PLC', 'Periodic Snowball Autocall', 'Quanto AUD'],
-                'issuer_name': 'Barclays Bank PLC',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'product_name': r'(Periodic Snowball Autocall|Quanto AUD[^"]*)',
-                    'coupon_quarterly': r'(\d+\.?\d*)%.*?per quarter',
-                    'final_coupon': r'(\d+\.?\d*)%.*?final',
-                    'knock_in_event': r'Knock-in Event.*?(\d+)%',
-                    'autocall_trigger': r'Autocall Trigger.*?(\d+)%',
-                    'initial_price': r'Initial Price.*?USD\s*([\d.]+)',
-                    'specified_denomination': r'Specified Denomination.*?AUD\s*([\d,]+)',
-                    'aggregate_nominal': r'Aggregate Nominal Amount.*?AUD\s*([\d,]+)',
-                    'dates': r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-                    'initial_valuation_date': r'Initial Valuation Date.*?(\d{1,2}\s+\w+\s+\d{4})',
-                    'us_tech_stocks': r'(ALPHABET INC|MICROSOFT CORP|META PLATFORMS|NVIDIA CORP)',
-                    'bloomberg_usd': r'([A-Z]+\s+UW)',
-                    'final_settlement_amount': r'Final Cash Settlement Amount'
-                }
-            },
-            'natixis': {
-                'identifiers': ['NATIXIS', 'EMTN', 'Autocall Incremental', 'no-Knock-In-Coupon'],
-                'issuer_name': 'NATIXIS',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'product_name': r'(EMTN.*?Autocall Incremental|Autocall Incremental[^"]*)',
-                    'coupon_quarterly': r'(\d+\.?\d*)%.*?quarterly',
-                    'automatic_early_redemption': r'Automatic Early Redemption Rate.*?(\d+\.?\d*)%',
-                    'knock_in_event': r'Knock-in Event.*?(\d+)%',
-                    'autocall_percentage': r'(\d+)%.*?Initial Price',
-                    'initial_price': r'Initial Price.*?(EUR|GBp|CHF)\s*([\d.]+)',
-                    'denomination': r'Denomination.*?AUD\s*([\d,]+)',
-                    'aggregate_nominal_lower': r'Aggregate nominal amount.*?AUD\s*([\d,]+)',
-                    'dates': r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-                    'strike_date': r'Strike Date.*?(\d{1,2}\s+\w+\s+\d{4})',
-                    'european_banks': r'(Banco Bilbao|Barclays PLC|UBS Group|Societe Generale)',
-                    'mixed_currency': r'(EUR|GBp|CHF)\s*[\d.]+',
-                    'final_redemption_amount': r'Final Redemption Amount',
-                    'lowest_performing': r'Lowest Performing Share'
-                }
-            },
-            'generic': {
-                'identifiers': [],
-                'issuer_name': 'Unknown Issuer',
-                'patterns': {
-                    'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-                    'coupon_rate': r'(\d+\.?\d*)\s*%',
-                    'knock_in': r'(\d+)%',
-                    'dates': r'(\d{1,2})[\/\-\s](\d{1,2})[\/\-\s](\d{4})'
-                }
-            }
-        }
+# Initialize the extractor; regex calls are time-limited so one noisy PDF can't stall the batch
+# Page text stays with pdfplumber (the reference output) until 'auto' is checked against every sample sheet
+# Large bundles degrade (tables skipped, flagged) rather than push the worker past its memory
+extractor = FixedIncomeTermsheetExtractor(regex_budget=DEFAULT_BUDGET, max_rss_mb=1200)
 
-    def detect_issuer(self, text):
-        """Detect which issuer based on text content"""
-        text_upper = text.upper()
-        
-        for issuer_key, config in self.issuer_patterns.items():
-            if issuer_key == 'generic':
-                continue
-            for identifier in config['identifiers']:
-                if identifier.upper() in text_upper:
-                    return issuer_key
-        
-        return 'generic'
+# Isolated extraction runs each file under these limits, in a warm pool worker or a child process,
+# so a PDF that hangs or balloons is stopped and reported while the rest of the batch carries on
+SANDBOX_LIMITS = SandboxLimits(timeout=180, memory_mb=2048, cpu_seconds=300)
 
-    def extract_with_patterns(self, text, patterns, issuer_type):
-        """Extract data using regex patterns with issuer-specific logic"""
-        extracted = {}
-        
-        # Extract ISIN
-        isin_match = re.search(patterns['isin'], text)
-        extracted['ISIN'] = isin_match.group(0) if isin_match else ''
-        
-        # Handle issuer-specific coupon rate extraction
-        if issuer_type == 'citigroup':
-            # Extract escalating coupon rates for Citi's snowball structure
-            coupon_rates_text = re.findall(r'(\d+\.?\d*%)', text)
-            if coupon_rates_text:
-                rates = [float(rate.replace('%', '')) for rate in coupon_rates_text if float(rate.replace('%', '')) > 1]
-                if rates:
-                    max_rate = max(rates) / 100  # Convert to decimal
-                    extracted['Coupon Rate - Annual'] = max_rate
-                else:
-                    extracted['Coupon Rate - Annual'] = ''
-            else:
-                extracted['Coupon Rate - Annual'] = ''
-                
-        elif issuer_type == 'macquarie':
-            # Extract base coupon rate for Macquarie's escalation formula
-            coupon_match = re.search(patterns.get('coupon_base_rate', ''), text, re.IGNORECASE)
-            if coupon_match:
-                rate_value = float(coupon_match.group(1).replace('%', '')) / 100
-                extracted['Coupon Rate - Annual'] = rate_value
-            else:
-                extracted['Coupon Rate - Annual'] = ''
-                
-        elif issuer_type == 'ubs':
-            # Extract UBS snowball coupon rate
-            snowball_match = re.search(patterns.get('snowball_coupon_rate', ''), text, re.IGNORECASE)
-            if snowball_match:
-                rate_value = float(snowball_match.group(1)) / 100
-                extracted['Coupon Rate - Annual'] = rate_value
-            else:
-                extracted['Coupon Rate - Annual'] = ''
-                
-        elif issuer_type == 'bnp_paribas':
-            # Extract BNP annual coupon rate from formula
-            coupon_match = re.search(patterns.get('coupon_annual', ''), text, re.IGNORECASE)
-            if coupon_match:
-                rate_value = float(coupon_match.group(1)) / 100
-                extracted['Coupon Rate - Annual'] = rate_value
-            else:
-                extracted['Coupon Rate - Annual'] = ''
-                
-        elif issuer_type == 'barclays':
-            # Extract Barclays quarterly coupon rate
-            quarterly_match = re.search(patterns.get('coupon_quarterly', ''), text, re.IGNORECASE)
-            if quarterly_match:
-                quarterly_rate = float(quarterly_match.group(1)) / 100
-                # Convert to annual (quarterly * 4)
-                extracted['Coupon Rate - Annual'] = quarterly_rate * 4
-            else:
-                # Try final coupon pattern
-                final_match = re.search(patterns.get('final_coupon', ''), text, re.IGNORECASE)
-                if final_match:
-                    final_rate = float(final_match.group(1)) / 100
-                    extracted['Coupon Rate - Annual'] = final_rate
-                else:
-                    extracted['Coupon Rate - Annual'] = ''
-                    
-        elif issuer_type == 'natixis':
-            # Extract Natixis quarterly coupon rate
-            quarterly_match = re.search(patterns.get('coupon_quarterly', ''), text, re.IGNORECASE)
-            if quarterly_match:
-                quarterly_rate = float(quarterly_match.group(1)) / 100
-                # Convert to annual (quarterly * 4)
-                extracted['Coupon Rate - Annual'] = quarterly_rate * 4
-            else:
-                # Try automatic early redemption rate
-                auto_match = re.search(patterns.get('automatic_early_redemption', ''), text, re.IGNORECASE)
-                if auto_match:
-                    rate_value = float(auto_match.group(1)) / 100
-                    extracted['Coupon Rate - Annual'] = rate_value
-                else:
-                    extracted['Coupon Rate - Annual'] = ''
-        else:
-            # Standard coupon rate extraction for other issuers
-            coupon_match = re.search(patterns.get('coupon_rate', ''), text, re.IGNORECASE)
-            if coupon_match:
-                rate_value = float(coupon_match.group(1)) / 100  # Convert to decimal
-                extracted['Coupon Rate - Annual'] = rate_value
-            else:
-                extracted['Coupon Rate - Annual'] = ''
-        
-        # Handle issuer-specific knock-in barrier extraction
-        if issuer_type == 'citigroup':
-            knock_in_match = re.search(patterns.get('knock_in_barrier', ''), text, re.IGNORECASE)
-            if knock_in_match:
-                barrier_value = float(knock_in_match.group(1)) / 100
-                extracted['Knock-In%'] = barrier_value
-            else:
-                extracted['Knock-In%'] = 0.6  # Default 60% for Citi
-                
-        elif issuer_type == 'macquarie':
-            knock_in_match = re.search(patterns.get('knock_in_price', ''), text, re.IGNORECASE)
-            if knock_in_match:
-                barrier_value = float(knock_in_match.group(1)) / 100
-                extracted['Knock-In%'] = barrier_value
-            else:
-                extracted['Knock-In%'] = 0.6  # Default 60% for MBL
-                
-        elif issuer_type == 'ubs':
-            kick_in_match = re.search(patterns.get('kick_in_level', ''), text, re.IGNORECASE)
-            if kick_in_match:
-                barrier_value = float(kick_in_match.group(1)) / 100
-                extracted['Knock-In%'] = barrier_value
-            else:
-                extracted['Knock-In%'] = 0.6  # Default 60% for UBS
-                
-        elif issuer_type == 'bnp_paribas':
-            knock_in_match = re.search(patterns.get('knock_in_percentage', ''), text, re.IGNORECASE)
-            if knock_in_match:
-                barrier_value = float(knock_in_match.group(1)) / 100
-                extracted['Knock-In%'] = barrier_value
-            else:
-                extracted['Knock-In%'] = 0.6  # Default 60% for BNP
-                
-        elif issuer_type == 'barclays':
-            knock_in_match = re.search(patterns.get('knock_in_event', ''), text, re.IGNORECASE)
-            if knock_in_match:
-                barrier_value = float(knock_in_match.group(1)) / 100
-                extracted['Knock-In%'] = barrier_value
-            else:
-                extracted['Knock-In%'] = 0.6  # Default 60% for Barclays
-                
-        elif issuer_type == 'natixis':
-            knock_in_match = re.search(patterns.get('knock_in_event', ''), text, re.IGNORECASE)
-            if knock_in_match:
-                barrier_value = float(knock_in_match.group(1)) / 100
-                extracted['Knock-In%'] = barrier_value
-            else:
-                extracted['Knock-In%'] = 0.6  # Default 60% for Natixis
-        else:
-            # Standard knock-in barrier extraction
-            knock_in_match = re.search(patterns.get('knock_in', ''), text, re.IGNORECASE)
-            if knock_in_match:
-                barrier_value = float(knock_in_match.group(1)) / 100  # Convert to decimal
-                extracted['Knock-In%'] = barrier_value
-            else:
-                extracted['Knock-In%'] = ''
-        
-        # Handle issuer-specific knock-out/autocall extraction
-        if issuer_type == 'citigroup':
-            autocall_match = re.search(patterns.get('autocall_barrier', ''), text, re.IGNORECASE)
-            if autocall_match:
-                autocall_value = float(autocall_match.group(1)) / 100
-                extracted['Knock-Out%'] = autocall_value
-            else:
-                extracted['Knock-Out%'] = 0.9  # Default 90% for Citi
-                
-        elif issuer_type == 'macquarie':
-            knock_out_match = re.search(patterns.get('knock_out_price', ''), text, re.IGNORECASE)
-            if knock_out_match:
-                autocall_value = float(knock_out_match.group(1)) / 100
-                extracted['Knock-Out%'] = autocall_value
-            else:
-                extracted['Knock-Out%'] = 0.9  # Default 90% for MBL
-                
-        elif issuer_type == 'ubs':
-            call_match = re.search(patterns.get('call_level', ''), text, re.IGNORECASE)
-            if call_match:
-                autocall_value = float(call_match.group(1)) / 100
-                extracted['Knock-Out%'] = autocall_value
-            else:
-                extracted['Knock-Out%'] = 0.9  # Default 90% for UBS
-                
-        elif issuer_type == 'bnp_paribas':
-            trigger_match = re.search(patterns.get('trigger_percentage', ''), text, re.IGNORECASE)
-            if trigger_match:
-                autocall_value = float(trigger_match.group(1)) / 100
-                extracted['Knock-Out%'] = autocall_value
-            else:
-                extracted['Knock-Out%'] = 0.9  # Default 90% for BNP
-                
-        elif issuer_type == 'barclays':
-            autocall_match = re.search(patterns.get('autocall_trigger', ''), text, re.IGNORECASE)
-            if autocall_match:
-                autocall_value = float(autocall_match.group(1)) / 100
-                extracted['Knock-Out%'] = autocall_value
-            else:
-                extracted['Knock-Out%'] = 0.9  # Default 90% for Barclays
-                
-        elif issuer_type == 'natixis':
-            autocall_match = re.search(patterns.get('autocall_percentage', ''), text, re.IGNORECASE)
-            if autocall_match:
-                autocall_value = float(autocall_match.group(1)) / 100
-                extracted['Knock-Out%'] = autocall_value
-            else:
-                extracted['Knock-Out%'] = 0.9  # Default 90% for Natixis
-        else:
-            # Standard knock-out extraction (if pattern exists)
-            extracted['Knock-Out%'] = 0.95  # Default assumption
-        
-        # Extract dates using issuer-specific formats
-        if issuer_type == 'bnp_paribas':
-            # Handle BNP's ordinal date format (February 3rd, 2025)
-            dates = re.findall(patterns.get('dates_ordinal', ''), text)
-            extracted['dates_found'] = dates
-        else:
-            # Standard date extraction
-            dates = re.findall(patterns.get('dates', patterns['dates']), text)
-            extracted['dates_found'] = dates
-        
-        return extracted
+@st.cache_resource
+def warm_pool():
+    """Extraction workers kept across reruns, so spawning, importing and limiting is paid once per server"""
+    return create_pool(limits=SANDBOX_LIMITS)
 
-    def extract_currency(self, text, issuer_type):
-        """Extract currency from text with issuer-specific handling"""
-        
-        # Citigroup-specific currency extraction
-        if issuer_type == 'citigroup':
-            # Look for "Australian Dollar (AUD)" pattern
-            aud_match = re.search(r'Australian Dollar.*?\(AUD\)', text, re.IGNORECASE)
-            if aud_match:
-                return 'AUD'
-            
-            # Look for "Currency" field
-            currency_match = re.search(r'Currency.*?(AUD|USD|EUR|GBP|CHF)', text, re.IGNORECASE)
-            if currency_match:
-                return currency_match.group(1).upper()
-        
-        # Standard currency patterns
-        currency_patterns = [
-            r'\b(USD|EUR|GBP|JPY|AUD|CAD|CHF|HKD|SGD)\b',
-            r'\$([\d,]+)',  # Dollar amounts
-            r'€([\d,]+)',   # Euro amounts
-            r'£([\d,]+)'    # Pound amounts
-        ]
-        
-        for pattern in currency_patterns:
-            match = re.search(pattern, text)
-            if match:
-                if pattern.startswith(r'\b'):
-                    return match.group(1)
-                elif pattern.startswith(r'\$'):
-                    return 'USD'
-                elif pattern.startswith(r'€'):
-                    return 'EUR'
-                elif pattern.startswith(r'£'):
-                    return 'GBP'
-        
-        return 'USD'  # Default assumption
+# Seconds between reruns that refresh a running batch's progress
+JOB_POLL_SECONDS = 1
 
-    def extract_notional_amount(self, text, issuer_type):
-        """Extract notional amount with issuer-specific handling"""
-        
-        def safe_int_conversion(value_str):
-            """Safely convert string to int with error handling"""
-            try:
-                if value_str and value_str.strip():
-                    return int(value_str.replace(',', ''))
-                return None
-            except (ValueError, AttributeError):
-                return None
-        
-        if issuer_type == 'citigroup':
-            # Look for "Issue Size" pattern
-            issue_size_match = re.search(r'Issue Size.*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if issue_size_match:
-                result = safe_int_conversion(issue_size_match.group(1))
-                if result:
-                    return result
-            
-            # Look for "Denomination" pattern  
-            denomination_match = re.search(r'Denomination.*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if denomination_match:
-                result = safe_int_conversion(denomination_match.group(1))
-                if result:
-                    return result
-                
-        elif issuer_type == 'macquarie':
-            # Look for "Aggregate Nominal Amount"
-            aggregate_match = re.search(r'Aggregate Nominal Amount.*?AUD\s*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-            if aggregate_match:
-                try:
-                    value_str = aggregate_match.group(1).replace(',', '')
-                    if value_str:
-                        return int(float(value_str))
-                except (ValueError, AttributeError):
-                    pass
-                
-        elif issuer_type == 'ubs':
-            # Look for "Issue proceeds" or similar
-            proceeds_match = re.search(r'(?:Issue proceeds|Issue Amount).*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if proceeds_match:
-                result = safe_int_conversion(proceeds_match.group(1))
-                if result:
-                    return result
-                
-        elif issuer_type == 'bnp_paribas':
-            # Look for "Issue Amount"
-            issue_amount_match = re.search(r'Issue Amount.*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if issue_amount_match:
-                result = safe_int_conversion(issue_amount_match.group(1))
-                if result:
-                    return result
-                
-        elif issuer_type == 'barclays':
-            # Look for "Aggregate Nominal Amount"
-            aggregate_match = re.search(r'Aggregate Nominal Amount.*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if aggregate_match:
-                result = safe_int_conversion(aggregate_match.group(1))
-                if result:
-                    return result
-            
-            # Look for "Specified Denomination"
-            denomination_match = re.search(r'Specified Denomination.*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if denomination_match:
-                result = safe_int_conversion(denomination_match.group(1))
-                if result:
-                    return result
-                
-        elif issuer_type == 'natixis':
-            # Look for "Aggregate nominal amount" (lowercase)
-            aggregate_match = re.search(r'Aggregate nominal amount.*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if aggregate_match:
-                result = safe_int_conversion(aggregate_match.group(1))
-                if result:
-                    return result
-            
-            # Look for "Denomination"
-            denomination_match = re.search(r'Denomination.*?AUD\s*([\d,]+)', text, re.IGNORECASE)
-            if denomination_match:
-                result = safe_int_conversion(denomination_match.group(1))
-                if result:
-                    return result
-        
-        # Standard notional patterns for other issuers
-        notional_patterns = [
-            r'notional.*?([0-9,]+)',
-            r'principal.*?([0-9,]+)',
-            r'amount.*?([0-9,]+)',
-            r'issue size.*?([0-9,]+)'
-        ]
-        
-        for pattern in notional_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result = safe_int_conversion(match.group(1))
-                if result:
-                    return result
-        
-        return ''
+def record_file(names, issuers, keys, manifest, master_path, index, future):
+    """Append one extracted file's rows to the master file and describe the outcome
 
-    def extract_underlying_assets(self, text, tables_data, issuer_type):
-        """Extract underlying asset information with comprehensive table and text parsing"""
-        underlyings = []
-        
-        # STEP 1: Extract from tables first (most reliable)
-        for table in tables_data:
-            if len(table) > 1:
-                headers = [str(cell).upper() if cell else '' for cell in table[0]]
-                
-                # Check if this is an underlying assets table
-                if any(keyword in ' '.join(headers) for keyword in ['UNDERLYING', 'ASSET', 'EQUITY', 'SHARE', 'STOCK', 'COMPANY', 'NAME', 'TICKER', 'BLOOMBERG']):
-                    
-                    # Find column indices
-                    name_col = next((i for i, h in enumerate(headers) if any(kw in h for kw in ['NAME', 'COMPANY', 'UNDERLYING'])), -1)
-                    ticker_col = next((i for i, h in enumerate(headers) if any(kw in h for kw in ['TICKER', 'SYMBOL', 'CODE'])), -1)
-                    bloomberg_col = next((i for i, h in enumerate(headers) if 'BLOOMBERG' in h), -1)
-                    initial_col = next((i for i, h in enumerate(headers) if any(kw in h for kw in ['INITIAL', 'SPOT', 'REFERENCE', 'STRIKE'])), -1)
-                    knockin_col = next((i for i, h in enumerate(headers) if any(kw in h for kw in ['KNOCK.*IN', 'BARRIER', 'KICK.*IN'])), -1)
-                    knockout_col = next((i for i, h in enumerate(headers) if any(kw in h for kw in ['KNOCK.*OUT', 'AUTOCALL', 'TRIGGER', 'CALL'])), -1)
-                    
-                    # Extract data from rows
-                    for i, row in enumerate(table[1:]):
-                        if row and i < 4:  # Max 4 underlyings
-                            underlying = {'Name': '', 'Ticker': '', 'Bloomberg_Code': '', 'Initial_Price': '', 'Knock_In_Price': '', 'Knock_Out_Price': ''}
-                            
-                            if name_col >= 0 and name_col < len(row) and row[name_col]:
-                                underlying['Name'] = str(row[name_col]).strip()
-                            if ticker_col >= 0 and ticker_col < len(row) and row[ticker_col]:
-                                underlying['Ticker'] = str(row[ticker_col]).strip()
-                            if bloomberg_col >= 0 and bloomberg_col < len(row) and row[bloomberg_col]:
-                                underlying['Bloomberg_Code'] = str(row[bloomberg_col]).strip()
-                            if initial_col >= 0 and initial_col < len(row) and row[initial_col]:
-                                underlying['Initial_Price'] = str(row[initial_col]).strip()
-                            if knockin_col >= 0 and knockin_col < len(row) and row[knockin_col]:
-                                underlying['Knock_In_Price'] = str(row[knockin_col]).strip()
-                            if knockout_col >= 0 and knockout_col < len(row) and row[knockout_col]:
-                                underlying['Knock_Out_Price'] = str(row[knockout_col]).strip()
-                            
-                            # If no specific columns found, scan all cells for data
-                            if not underlying['Name'] and not underlying['Ticker']:
-                                for j, cell in enumerate(row):
-                                    if cell and isinstance(cell, str):
-                                        cell_str = str(cell).strip()
-                                        # Company name patterns
-                                        if re.match(r'^[A-Z][a-zA-Z\s&\.\-]+(?:Inc|Corp|Ltd|PLC|Co|Group|SA|AG|NV|Corporation|Limited)\.?$', cell_str):
-                                            underlying['Name'] = cell_str
-                                        # Ticker patterns
-                                        elif re.match(r'^[A-Z]{2,6}(?:\.[A-Z]{1,3})?$', cell_str):
-                                            underlying['Ticker'] = cell_str
-                                        # Bloomberg patterns
-                                        elif re.match(r'^[A-Z0-9]{2,6}\s+[A-Z]{2}$', cell_str):
-                                            underlying['Bloomberg_Code'] = cell_str
-                                        # Price patterns
-                                        elif re.match(r'(?:USD|EUR|GBP|AUD|CHF)?\s*[\d.,]+', cell_str):
-                                            if not underlying['Initial_Price']:
-                                                underlying['Initial_Price'] = cell_str
-                            
-                            # Only add if we found meaningful data
-                            if underlying['Name'] or underlying['Ticker'] or underlying['Bloomberg_Code']:
-                                underlyings.append(underlying)
-        
-        # STEP 2: If table extraction didn't work, use text patterns
-        if not underlyings:
-            # Enhanced text-based extraction patterns
-            patterns = [
-                r'([A-Z][a-zA-Z\s&\.\-]+(?:Inc|Corp|Ltd|PLC|Co|Group|SA|AG|NV|Corporation|Limited)\.?)\s*[\(\[]?([A-Z]{2,6}(?:\.[A-Z]{1,3})?)[\)\]]?',  # Company (TICKER)
-                r'([A-Z]{2,6}(?:\.[A-Z]{1,3})?)\s+([A-Z][a-zA-Z\s&\.\-]+(?:Inc|Corp|Ltd|PLC|Co|Group|SA|AG|NV|Corporation|Limited)\.?)',  # TICKER Company
-                r'Bloomberg[:\s]*([A-Z0-9]{2,6}\s+[A-Z]{2})',  # Bloomberg: CODE XX
-                r'Ticker[:\s]*([A-Z]{2,6}(?:\.[A-Z]{1,3})?)',  # Ticker: XXXX
-                r'Underlying[:\s]*([A-Z][a-zA-Z\s&\.\-]+)',  # Underlying: Company
-            ]
-            
-            found_companies = []
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    if isinstance(match, tuple) and len(match) == 2:
-                        # Determine company vs ticker
-                        if re.match(r'^[A-Z]{2,6}(?:\.[A-Z]{1,3})?$', match[0]):  # First is ticker
-                            found_companies.append({'Name': match[1], 'Ticker': match[0]})
-                        else:  # First is company
-                            found_companies.append({'Name': match[0], 'Ticker': match[1]})
-                    else:
-                        if re.match(r'^[A-Z]{2,6}(?:\.[A-Z]{1,3})?$', match):  # Is ticker
-                            found_companies.append({'Name': '', 'Ticker': match})
-                        else:  # Is company
-                            found_companies.append({'Name': match, 'Ticker': ''})
-            
-            # Deduplicate and format
-            seen = set()
-            for company in found_companies:
-                key = (company.get('Name', ''), company.get('Ticker', ''))
-                if key not in seen and (company.get('Name') or company.get('Ticker')):
-                    seen.add(key)
-                    underlyings.append({
-                        'Name': company.get('Name', ''),
-                        'Ticker': company.get('Ticker', ''),
-                        'Bloomberg_Code': '',
-                        'Initial_Price': '',
-                        'Knock_In_Price': '',
-                        'Knock_Out_Price': ''
-                    })
-                    if len(underlyings) >= 4:
-                        break
-        
-        # STEP 3: Extract prices from separate price tables
-        price_patterns = [
-            r'Initial.*?(?:USD|EUR|GBP|AUD|CHF)?\s*([\d.,]+)',
-            r'Spot.*?(?:USD|EUR|GBP|AUD|CHF)?\s*([\d.,]+)',
-            r'Strike.*?(?:USD|EUR|GBP|AUD|CHF)?\s*([\d.,]+)',
-            r'Barrier.*?(?:USD|EUR|GBP|AUD|CHF)?\s*([\d.,]+)',
-            r'Knock.*In.*?(?:USD|EUR|GBP|AUD|CHF)?\s*([\d.,]+)',
-            r'Knock.*Out.*?(?:USD|EUR|GBP|AUD|CHF)?\s*([\d.,]+)',
-            r'Autocall.*?(?:USD|EUR|GBP|AUD|CHF)?\s*([\d.,]+)'
-        ]
-        
-        # Try to extract prices for each underlying
-        for i, underlying in enumerate(underlyings):
-            for pattern in price_patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                if matches and i < len(matches):
-                    if 'Initial' in pattern or 'Spot' in pattern or 'Strike' in pattern:
-                        if not underlying['Initial_Price']:
-                            underlying['Initial_Price'] = matches[i]
-                    elif 'Barrier' in pattern or 'Knock.*In' in pattern:
-                        if not underlying['Knock_In_Price']:
-                            underlying['Knock_In_Price'] = matches[i]
-                    elif 'Knock.*Out' in pattern or 'Autocall' in pattern:
-                        if not underlying['Knock_Out_Price']:
-                            underlying['Knock_Out_Price'] = matches[i]
-        
-        # STEP 4: Fallback to issuer-specific patterns if still no data
-        if not underlyings:
-            if issuer_type == 'macquarie':
-                # Look for MBL-specific patterns
-                tech_patterns = [
-                    r'(Oracle Corporation|ORCL)',
-                    r'(Broadcom Inc|AVGO)',
-                    r'(Meta Platforms|META)',
-                    r'(NVIDIA Corporation|NVDA)',
-                    r'(Microsoft Corporation|MSFT)',
-                    r'(Alphabet Inc|GOOG|GOOGL)'
-                ]
-                
-                for pattern in tech_patterns:
-                    match = re.search(pattern, text, re.IGNORECASE)
-                    if match:
-                        company_name = match.group(1)
-                        if 'Oracle' in company_name:
-                            underlyings.append({'Name': 'Oracle Corporation', 'Ticker': 'ORCL', 'Initial_Price': '', 'Knock_In_Price': '', 'Knock_Out_Price': ''})
-                        elif 'Broadcom' in company_name:
-                            underlyings.append({'Name': 'Broadcom Inc', 'Ticker': 'AVGO', 'Initial_Price': '', 'Knock_In_Price': '', 'Knock_Out_Price': ''})
-                        elif 'Meta' in company_name:
-                            underlyings.append({'Name': 'Meta Platforms', 'Ticker': 'META', 'Initial_Price': '', 'Knock_In_Price': '', 'Knock_Out_Price': ''})
-                        elif 'NVIDIA' in company_name:
-                            underlyings.append({'Name': 'NVIDIA Corporation', 'Ticker': 'NVDA', 'Initial_Price': '', 'Knock_In_Price': '', 'Knock_Out_Price': ''})
-                        elif 'Microsoft' in company_name:
-                            underlyings.append({'Name': 'Microsoft Corporation', 'Ticker': 'MSFT', 'Initial_Price': '', 'Knock_In_Price': '', 'Knock_Out_Price': ''})
-                        elif 'Alphabet' in company_name:
-                            underlyings.append({'Name': 'Alphabet Inc', 'Ticker': 'GOOG', 'Initial_Price': '', 'Knock_In_Price': '', 'Knock_Out_Price': ''})
-        
-        return underlyings[:4]  # Ensure maximum 4 underlyings
-
-    def extract_termsheet_data(self, pdf_path):
-        """Main extraction function with comprehensive field extraction"""
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                full_text = ""
-                tables_data = []
-                
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += page_text + "\n"
-                    
-                    tables = page.extract_tables()
-                    for table in tables:
-                        if table and len(table) > 1:
-                            tables_data.append(table)
-                            
-        except Exception as e:
-            return {'error': f'Failed to read PDF: {str(e)}'}
-        
-        # Detect issuer
-        issuer_type = self.detect_issuer(full_text)
-        issuer_config = self.issuer_patterns[issuer_type]
-        
-        # Extract using detected issuer patterns
-        extracted = self.extract_with_patterns(full_text, issuer_config['patterns'], issuer_type)
-        
-        # Core information
-        extracted['Issuer'] = issuer_config['issuer_name']
-        extracted['CCY'] = self.extract_currency(full_text, issuer_type)
-        extracted['Notional Value'] = self.extract_notional_amount(full_text, issuer_type)
-        extracted['extracted_text'] = full_text  # Store full text for further extraction
-        
-        # Extract comprehensive date information
-        extracted.update(self.extract_comprehensive_dates(full_text, issuer_type))
-        
-        # Extract underlying assets with prices
-        underlying_assets = self.extract_underlying_assets(full_text, tables_data, issuer_type)
-        extracted['underlying_assets'] = underlying_assets
-        
-        # Extract all barrier and trigger levels
-        extracted.update(self.extract_barriers_and_triggers(full_text, issuer_type))
-        
-        # Extract valuation/observation dates
-        extracted['valuation_dates'] = self.extract_valuation_dates(full_text, tables_data, issuer_type)
-        
-        # Extract product details
-        extracted.update(self.extract_product_details(full_text, issuer_type))
-        
-        # Add metadata
-        extracted['Source_File'] = os.path.basename(pdf_path)
-        extracted['Detected_Issuer_Type'] = issuer_type
-        
-        return extracted
-
-    def extract_comprehensive_dates(self, text, issuer_type):
-        """Extract all date information from termsheet"""
-        dates = {}
-        
-        # Common date patterns
-        date_patterns = [
-            r'Issue Date[:\s]+(\d{1,2})[\/\-\s](\d{1,2})[\/\-\s](\d{4})',
-            r'Strike Date[:\s]+(\d{1,2})[\/\-\s](\d{1,2})[\/\-\s](\d{4})',
-            r'Maturity Date[:\s]+(\d{1,2})[\/\-\s](\d{1,2})[\/\-\s](\d{4})',
-            r'Final Observation Date[:\s]+(\d{1,2})[\/\-\s](\d{1,2})[\/\-\s](\d{4})',
-            r'Initial Observation Date[:\s]+(\d{1,2})[\/\-\s](\d{1,2})[\/\-\s](\d{4})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                date_str = f"{match.group(1)}/{match.group(2)}/{match.group(3)}"
-                if 'Issue' in pattern:
-                    dates['Issue Date'] = date_str
-                elif 'Strike' in pattern:
-                    dates['Strike Date'] = date_str
-                elif 'Maturity' in pattern:
-                    dates['Maturity Date'] = date_str
-        
-        return dates
-
-    def extract_barriers_and_triggers(self, text, issuer_type):
-        """Extract barrier levels and trigger percentages"""
-        barriers = {}
-        
-        # Barrier patterns
-        barrier_patterns = [
-            r'Knock[- ]?In[:\s]+(\d+(?:\.\d+)?)%',
-            r'Knock[- ]?Out[:\s]+(\d+(?:\.\d+)?)%',
-            r'Barrier[:\s]+(\d+(?:\.\d+)?)%',
-            r'Trigger[:\s]+(\d+(?:\.\d+)?)%',
-            r'Autocall[:\s]+(\d+(?:\.\d+)?)%',
-            r'Memory[:\s]+(\d+(?:\.\d+)?)%'
-        ]
-        
-        for pattern in barrier_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = float(match.group(1)) / 100  # Convert to decimal
-                if 'Knock.*In' in pattern or 'Barrier' in pattern:
-                    barriers['Knock-In%'] = value
-                elif 'Knock.*Out' in pattern or 'Autocall' in pattern or 'Trigger' in pattern:
-                    barriers['Knock-Out%'] = value
-        
-        return barriers
-
-    def extract_valuation_dates(self, text, tables_data, issuer_type):
-        """Extract ALL observation/valuation dates from termsheet with issuer-specific terminology"""
-        valuation_dates = []
-        
-        # ISSUER-SPECIFIC TERMINOLOGY MAPPING
-        if issuer_type == 'morgan_stanley':
-            observation_keywords = [
-                'KNOCK-OUT DETERMINATION DAY', 'KNOCK-OUT DETERMINATION DATE',
-                'KNOCK-OUT SETTLEMENT DATE', 'DETERMINATION DAY', 'SETTLEMENT DATE',
-                'OBSERVATION', 'VALUATION', 'AUTOCALL DATE'
-            ]
-            print("Using Morgan Stanley terminology: Knock-out Determination Day/Settlement Dates")
-        elif issuer_type == 'macquarie':
-            observation_keywords = [
-                'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL DATE',
-                'EARLY REDEMPTION DATE', 'COUPON DATE', 'PAYMENT DATE'
-            ]
-            print("Using Macquarie terminology: Observation/Valuation Dates")
-        elif issuer_type == 'ubs':
-            observation_keywords = [
-                'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL OBSERVATION',
-                'BARRIER OBSERVATION', 'COUPON OBSERVATION'
-            ]
-            print("Using UBS terminology: Observation/Barrier Observation Dates")
-        elif issuer_type == 'bnp_paribas':
-            observation_keywords = [
-                'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL DATE',
-                'COUPON PAYMENT DATE', 'MEMORY COUPON DATE'
-            ]
-            print("Using BNP Paribas terminology: Observation/Memory Coupon Dates")
-        elif issuer_type == 'barclays':
-            observation_keywords = [
-                'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL DATE',
-                'BARRIER OBSERVATION', 'EARLY REDEMPTION DATE'
-            ]
-            print("Using Barclays terminology: Observation/Barrier Dates")
-        elif issuer_type == 'natixis':
-            observation_keywords = [
-                'OBSERVATION DATE', 'VALUATION DATE', 'COUPON DATE',
-                'AUTOCALL DATE', 'PAYMENT DATE'
-            ]
-            print("Using Natixis terminology: Observation/Coupon Dates")
-        else:
-            # Generic keywords
-            observation_keywords = [
-                'OBSERVATION', 'VALUATION', 'COUPON', 'PAYMENT', 'SCHEDULE', 
-                'AUTOCALL', 'EARLY REDEMPTION', 'MEMORY', 'BARRIER', 'DATE'
-            ]
-            print("Using generic terminology for observation dates")
-        
-        # STEP 1: Look for observation schedule tables with issuer-specific keywords
-        for table in tables_data:
-            if len(table) > 1:
-                headers = [str(cell).upper() if cell else '' for cell in table[0]]
-                
-                # Check if this is an observation table using issuer-specific keywords
-                header_text = ' '.join(headers).upper()
-                if any(keyword in header_text for keyword in observation_keywords):
-                    print(f"Found {issuer_type} observation table with headers: {headers}")
-                    
-                    # Extract dates from all rows and columns
-                    for row_idx, row in enumerate(table[1:]):  # Skip header
-                        if row:
-                            for col_idx in range(len(row)):
-                                cell = row[col_idx]
-                                if cell and isinstance(cell, str):
-                                    cell_str = str(cell).strip()
-                                    
-                                    # Multiple date format patterns
-                                    date_patterns = [
-                                        r'(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})',  # MM/DD/YYYY, MM-DD-YYYY, MM.DD.YYYY
-                                        r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',  # DD Month YYYY
-                                        r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',  # Month DD, YYYY
-                                        r'(\d{4})[\/\-\.](\d{1,2})[\/\-\.](\d{1,2})',  # YYYY/MM/DD
-                                    ]
-                                    
-                                    for pattern in date_patterns:
-                                        matches = re.findall(pattern, cell_str, re.IGNORECASE)
-                                        for match in matches:
-                                            if len(match) == 3:
-                                                try:
-                                                    # Handle different date formats
-                                                    if match[1].isalpha():  # Month name format
-                                                        month_names = {
-                                                            'january': '1', 'february': '2', 'march': '3', 'april': '4',
-                                                            'may': '5', 'june': '6', 'july': '7', 'august': '8',
-                                                            'september': '9', 'october': '10', 'november': '11', 'december': '12'
-                                                        }
-                                                        month = month_names.get(match[1].lower(), match[1])
-                                                        if pattern.startswith(r'(\d{1,2})'):  # DD Month YYYY
-                                                            date_str = f"{month}/{match[0]}/{match[2]}"
-                                                        else:  # Month DD, YYYY
-                                                            date_str = f"{month}/{match[1]}/{match[2]}"
-                                                    elif pattern.startswith(r'(\d{4})'):  # YYYY format
-                                                        date_str = f"{match[1]}/{match[2]}/{match[0]}"
-                                                    else:  # MM/DD/YYYY format
-                                                        date_str = f"{match[0]}/{match[1]}/{match[2]}"
-                                                    
-                                                    # Validate year range (2024-2030)
-                                                    year = int(date_str.split('/')[2])
-                                                    if 2024 <= year <= 2030:
-                                                        if date_str not in valuation_dates:
-                                                            valuation_dates.append(date_str)
-                                                            print(f"Found {issuer_type} valuation date: {date_str}")
-                                                except (ValueError, IndexError):
-                                                    continue
-        
-        # STEP 2: Text-based search with issuer-specific terminology
-        if len(valuation_dates) < 8:
-            print(f"Only found {len(valuation_dates)} dates in tables, searching text with {issuer_type} terminology...")
-            
-            # Look for issuer-specific observation schedule sections
-            text_sections = text.split('\n')
-            in_schedule_section = False
-            
-            for line in text_sections:
-                line_upper = line.upper()
-                
-                # Detect start of observation schedule section using issuer keywords
-                if any(keyword in line_upper for keyword in observation_keywords):
-                    in_schedule_section = True
-                    print(f"Found {issuer_type} schedule section: {line}")
-                    continue
-                
-                # Morgan Stanley specific patterns
-                if issuer_type == 'morgan_stanley':
-                    # Look for MS-specific date patterns
-                    ms_patterns = [
-                        r'Knock-out Determination Day[:\s]*(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})',
-                        r'Determination Day[:\s]*(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})',
-                        r'Settlement Date[:\s]*(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})',
-                        r'Knock-out Settlement Date[:\s]*(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})',
-                    ]
-                    
-                    for pattern in ms_patterns:
-                        matches = re.findall(pattern, line, re.IGNORECASE)
-                        for match in matches:
-                            try:
-                                date_str = f"{match[0]}/{match[1]}/{match[2]}"
-                                year = int(match[2])
-                                if 2024 <= year <= 2030 and date_str not in valuation_dates:
-                                    valuation_dates.append(date_str)
-                                    print(f"Found MS determination/settlement date: {date_str}")
-                            except (ValueError, IndexError):
-                                continue
-                
-                # Extract dates from schedule section or anywhere in text
-                if in_schedule_section or len(valuation_dates) < 4:
-                    date_patterns = [
-                        r'(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{4})',
-                        r'(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-                        r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',
-                    ]
-                    
-                    for pattern in date_patterns:
-                        matches = re.findall(pattern, line, re.IGNORECASE)
-                        for match in matches:
-                            try:
-                                if len(match) == 3:
-                                    # Convert to MM/DD/YYYY format
-                                    if match[1].isalpha():  # Month name
-                                        month_names = {
-                                            'january': '1', 'february': '2', 'march': '3', 'april': '4',
-                                            'may': '5', 'june': '6', 'july': '7', 'august': '8',
-                                            'september': '9', 'october': '10', 'november': '11', 'december': '12'
-                                        }
-                                        month = month_names.get(match[1].lower(), match[1])
-                                        if pattern.startswith(r'(\d{1,2})'):  # DD Month YYYY
-                                            date_str = f"{month}/{match[0]}/{match[2]}"
-                                        else:  # Month DD, YYYY
-                                            date_str = f"{month}/{match[1]}/{match[2]}"
-                                    else:  # Numeric format
-                                        date_str = f"{match[0]}/{match[1]}/{match[2]}"
-                                    
-                                    # Validate and add
-                                    year = int(date_str.split('/')[2])
-                                    if 2024 <= year <= 2030 and date_str not in valuation_dates:
-                                        valuation_dates.append(date_str)
-                                        print(f"Found {issuer_type} text date: {date_str}")
-                            except (ValueError, IndexError):
-                                continue
-        
-        # STEP 3: Sort and return up to 12 dates
-        if valuation_dates:
-            # Sort dates chronologically
-            try:
-                valuation_dates.sort(key=lambda x: (int(x.split('/')[2]), int(x.split('/')[0]), int(x.split('/')[1])))
-            except:
-                pass  # Keep original order if sorting fails
-        
-        print(f"Final {issuer_type} valuation dates found: {len(valuation_dates)} - {valuation_dates[:12]}")
-        return valuation_dates[:12]  # Return maximum 12 dates
-
-    def extract_product_details(self, text, issuer_type):
-        """Extract detailed product information"""
-        details = {}
-        
-        # Product type patterns
-        product_patterns = [
-            r'(Phoenix Coupon Note|PCN)',
-            r'(Autocallable|ACE)',
-            r'(Memory Coupon)',
-            r'(Barrier Reverse Convertible)',
-            r'Product Type[:\s]+([A-Za-z\s\d%]+)',
-            r'Structure[:\s]+([A-Za-z\s\d%]+)'
-        ]
-        
-        for pattern in product_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                details['Product_Type'] = match.group(1) if match.group(1) else match.group(0)
-                break
-        
-        # Extract additional details
-        detail_patterns = {
-            'Investment_Amount': r'Investment Amount[:\s]+(?:AUD|USD|EUR|GBP)?\s*([0-9,]+(?:\.[0-9]{2})?)',
-            'Principal_Amount': r'Principal Amount[:\s]+(?:AUD|USD|EUR|GBP)?\s*([0-9,]+(?:\.[0-9]{2})?)',
-            'Revenue': r'Revenue[:\s]+(?:AUD|USD|EUR|GBP)?\s*([0-9,]+(?:\.[0-9]{2})?)',
-            'Management_Fee': r'Management Fee[:\s]+(\d+(?:\.\d+)?)%',
-            'UF%': r'UF[:\s]+(\d+(?:\.\d+)?)%'
-        }
-        
-        for key, pattern in detail_patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                if '%' in pattern:
-                    details[key] = float(match.group(1)) / 100  # Convert to decimal
-                else:
-                    details[key] = float(match.group(1).replace(',', ''))
-        
-        return details
-
-def create_database_row(data):
-    """Create database row with proper formatting matching the CSV sample exactly"""
-    import re
-    
-    # Create a row with 56 columns to match the exact template
-    row = [''] * 56
-    
-    # Handle different issuer-specific product naming based on your example
-    issuer_type = data.get('Detected_Issuer_Type', '')
-    
-    # Extract ALL data from termsheet, not defaults
-    
-    # Investment name should be extracted from termsheet, not generated
-    extracted_investment_name = data.get('Investment_Name', '') or data.get('Product_Name', '')
-    if extracted_investment_name:
-        investment_name = extracted_investment_name
-    else:
-        # Only use issuer-based naming as absolute fallback
-        maturity_date = data.get('Maturity Date', '')
-        if issuer_type == 'citigroup':
-            investment_name = f'CG {maturity_date.replace("/", "-")}' if maturity_date else 'CG Product'
-        elif issuer_type == 'macquarie':
-            investment_name = f'MBL {maturity_date.replace("/", "-")}' if maturity_date else 'MBL Product'
-        elif issuer_type == 'ubs':
-            investment_name = f'UBS {maturity_date.replace("/", "-")}' if maturity_date else 'UBS Product'
-        elif issuer_type == 'bnp_paribas':
-            investment_name = f'BNP {maturity_date.replace("/", "-")}' if maturity_date else 'BNP Product'
-        elif issuer_type == 'barclays':
-            investment_name = f'BARC {maturity_date.replace("/", "-")}' if maturity_date else 'BARC Product'
-        elif issuer_type == 'natixis':
-            investment_name = f'NX {maturity_date.replace("/", "-")}' if maturity_date else 'NX Product'
-        elif issuer_type == 'morgan_stanley':
-            investment_name = f'MS {maturity_date.replace("/", "-")}' if maturity_date else 'MS Product'
-        else:
-            investment_name = data.get('Source_File', '').replace('.pdf', '')
-
-    # Product name should be extracted from termsheet
-    extracted_product_name = data.get('Product_Name', '') or data.get('Product_Description', '')
-    if extracted_product_name:
-        product_name = extracted_product_name
-    else:
-        # Fallback based on extracted underlying themes
-        underlyings = data.get('underlying_assets', [])
-        if underlyings:
-            # Analyze underlying sectors
-            underlying_names = [u.get('Name', '').lower() for u in underlyings]
-            if any('bank' in name or 'financial' in name for name in underlying_names):
-                product_name = 'Global Banks' if any('wells fargo' in name or 'bank of america' in name for name in underlying_names) else 'European Banks'
-            elif any('tech' in name or 'microsoft' in name or 'alphabet' in name or 'meta' in name for name in underlying_names):
-                product_name = 'US Tech'
-            elif any('coles' in name or 'rio tinto' in name or 'macquarie' in name for name in underlying_names):
-                product_name = 'Australian Diversified'
-            else:
-                product_name = 'Multi-Asset'
-        else:
-            product_name = 'Structured Product'
-
-    # Investment thematic should match product name or be extracted
-    extracted_thematic = data.get('Investment_Thematic', '') or data.get('Sector', '')
-    if extracted_thematic:
-        investment_thematic = extracted_thematic
-    else:
-        # Derive from product name
-        if 'Global Banks' in product_name:
-            investment_thematic = 'Global Banks'
-        elif 'European Banks' in product_name:
-            investment_thematic = 'EU Banks'
-        elif 'US Tech' in product_name:
-            investment_thematic = 'US Tech'
-        elif 'Australian' in product_name:
-            investment_thematic = 'Australian Diversified'
-        else:
-            investment_thematic = 'Structured Product'
-
-    # Determine product type based on extracted data, not issuer defaults
-    coupon_rate = data.get('Coupon Rate - Annual', '')
-    extracted_knockout = data.get('Knock-Out%', '')
-    
-    # Check if this is PCN (has regular coupons) or ACE (autocallable only)
-    has_coupon = coupon_rate and isinstance(coupon_rate, (int, float)) and coupon_rate > 0
-    
-    if has_coupon:
-        product_type = 'PCN'  # Phoenix Coupon Note - has barrier-dependent coupons
-    else:
-        # Determine ACE level based on extracted knock-out percentage
-        if extracted_knockout and isinstance(extracted_knockout, (int, float)):
-            if extracted_knockout >= 0.98:
-                product_type = 'ACE 100%'
-            elif extracted_knockout >= 0.95:
-                product_type = 'ACE 95%'
-            elif extracted_knockout >= 0.90:
-                product_type = 'ACE 90%'
-            elif extracted_knockout >= 0.85:
-                product_type = 'ACE 85%'
-            else:
-                try:
-                    product_type = f'ACE {int(extracted_knockout * 100)}%'
-                except (ValueError, TypeError):
-                    product_type = 'ACE 90%'  # Fallback
-        else:
-            # Extract from product name patterns in termsheet
-            extracted_product_type = data.get('Product_Type', '') or data.get('TYPE', '')
-            if extracted_product_type:
-                product_type = extracted_product_type
-            else:
-                product_type = 'ACE 90%'  # Absolute fallback
-
-    # Extract minimum tenor from termsheet
-    extracted_min_tenor = data.get('Minimum_Tenor', '') or data.get('Min_Tenor_Q', '')
-    if extracted_min_tenor:
-        try:
-            if isinstance(extracted_min_tenor, (int, float)):
-                min_tenor = int(extracted_min_tenor)
-            elif isinstance(extracted_min_tenor, str) and extracted_min_tenor.strip():
-                # Extract numeric value from string
-                tenor_match = re.search(r'(\d+)', extracted_min_tenor)
-                if tenor_match:
-                    min_tenor = int(tenor_match.group(1))
-                else:
-                    min_tenor = 2  # Fallback
-            else:
-                min_tenor = 2  # Fallback
-        except (ValueError, TypeError):
-            min_tenor = 2  # Fallback
-    else:
-        min_tenor = 2  # Fallback
-
-    # Get coupon rate and format properly with error handling
-    coupon_rate = data.get('Coupon Rate - Annual', '')
-    coupon_qtr_pct = ''
-    coupon_annual_decimal = ''
-    
+    Runs on the batch job's collector thread, so it returns entries for the
+    page to render instead of calling Streamlit itself. Every step is
+    checkpointed in the batch manifest.
+    """
+    name = names[index]
+    error = None
     try:
-        if coupon_rate and isinstance(coupon_rate, (int, float)) and coupon_rate != '':
-            if coupon_rate < 1:  # If it's decimal (0.1352), convert to percentage
-                coupon_qtr_pct = f"{coupon_rate * 100 / 4:.3f}%"  # Quarterly as percentage string
-                coupon_annual_decimal = coupon_rate  # Keep as decimal for Excel percentage formatting
-            else:  # If it's already percentage
-                coupon_qtr_pct = f"{coupon_rate / 4:.3f}%"
-                coupon_annual_decimal = coupon_rate / 100
-        elif isinstance(coupon_rate, str) and coupon_rate.strip():
-            # Try to extract numeric value from string
-            rate_match = re.search(r'(\d+\.?\d*)', coupon_rate.replace('%', ''))
-            if rate_match:
-                rate_value = float(rate_match.group(1))
-                if rate_value < 1:  # Decimal format
-                    coupon_qtr_pct = f"{rate_value * 100 / 4:.3f}%"
-                    coupon_annual_decimal = rate_value
-                else:  # Percentage format
-                    coupon_qtr_pct = f"{rate_value / 4:.3f}%"
-                    coupon_annual_decimal = rate_value / 100
-    except (ValueError, TypeError, AttributeError):
-        # Leave empty if any conversion fails
-        coupon_qtr_pct = ''
-        coupon_annual_decimal = ''
-
-    # Map data to exact column positions from your template
-    row[0] = investment_name
-    row[1] = data.get('Issuer', '')
-    row[2] = product_name
-    row[3] = investment_thematic
-    row[4] = product_type
-    row[5] = coupon_qtr_pct  # Coupon - QTR as percentage string
-    row[6] = coupon_annual_decimal  # Coupon Rate - Annual as decimal for Excel formatting
-    row[7] = 'Active'
-    
-    # Extract Knock-In% with error handling
-    extracted_knockin = data.get('Knock-In%', '')
-    try:
-        if extracted_knockin and isinstance(extracted_knockin, (int, float)):
-            row[8] = float(extracted_knockin)
-        elif isinstance(extracted_knockin, str) and extracted_knockin.strip():
-            # Try to extract numeric value from string
-            knockin_match = re.search(r'(\d+\.?\d*)', extracted_knockin.replace('%', ''))
-            if knockin_match:
-                knockin_value = float(knockin_match.group(1))
-                # Convert to decimal if it's in percentage format
-                if knockin_value > 1:
-                    row[8] = knockin_value / 100
-                else:
-                    row[8] = knockin_value
-            else:
-                row[8] = 0.6  # Default 60%
-        else:
-            row[8] = 0.6  # Default 60%
-    except (ValueError, TypeError, AttributeError):
-        row[8] = 0.6  # Default 60%
-    
-    # Extract actual Knock-Out% from termsheet data (not hardcoded) with error handling
-    extracted_knockout = data.get('Knock-Out%', '')
-    try:
-        if extracted_knockout and isinstance(extracted_knockout, (int, float)):
-            row[9] = float(extracted_knockout)  # Use actual extracted value
-        elif isinstance(extracted_knockout, str) and extracted_knockout.strip():
-            # Try to extract numeric value from string
-            knockout_match = re.search(r'(\d+\.?\d*)', extracted_knockout.replace('%', ''))
-            if knockout_match:
-                knockout_value = float(knockout_match.group(1))
-                # Convert to decimal if it's in percentage format
-                if knockout_value > 1:
-                    row[9] = knockout_value / 100
-                else:
-                    row[9] = knockout_value
-            else:
-                raise ValueError("No numeric value found")
-        else:
-            raise ValueError("Empty or invalid knockout value")
-    except (ValueError, TypeError, AttributeError):
-        # Fallback defaults only if extraction completely fails
-        if 'ACE 95%' in product_type:
-            row[9] = 0.95  # 95% knock-out for MBL products
-        elif 'ACE 90%' in product_type:
-            row[9] = 0.9   # 90% knock-out for most ACE products
-        elif product_type == 'PCN':
-            row[9] = 1.0   # 100% knock-out for PCN products
-        else:
-            row[9] = 0.9  # Default 90%
-    
-    row[10] = 1.0  # Issue Price% - always 100% (1.0 as decimal)
-    
-    # Set Coupon Barrier% based on product type and extracted data
-    if product_type == 'PCN':
-        extracted_barrier = data.get('Coupon_Barrier%', data.get('Knock-In%', 0.6))
-        row[11] = extracted_barrier  # Use extracted coupon barrier for PCN products
-    else:
-        row[11] = ''  # No coupon barrier for ACE products
-    row[12] = min_tenor  # Minimum Tenor (Q)
-    row[13] = 12  # Maximum Tenor (Q)
-    row[14] = 1  # Observation Frequency (1 = Quarterly)
-    row[15] = data.get('CCY', 'AUD')
-    row[16] = data.get('Strike Date', '')
-    row[17] = data.get('Issue Date', '')
-    row[18] = data.get('ISIN', '')
-    
-    # Underlying assets (19-22) - format like your example: "Company Name (TICKER)"
-    underlyings = data.get('underlying_assets', [])
-    
-    # Underlying assets (19-22) - prioritize actual extracted data
-    underlyings = data.get('underlying_assets', [])
-    
-    # If no underlyings extracted, try to extract from text patterns
-    if not underlyings or len(underlyings) == 0:
-        extracted_text = data.get('extracted_text', '')
-        
-        # Try to find stock symbols and company names in text
-        stock_patterns = [
-            r'([A-Z]{2,5})\s+(?:Equity|Stock|Share)',  # Ticker patterns
-            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+\(([A-Z]{2,5})\)',  # Company (TICKER)
-            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:Inc|Corp|Ltd|PLC)',  # Company names
-        ]
-        
-        found_underlyings = []
-        for pattern in stock_patterns:
-            matches = re.findall(pattern, extracted_text)
-            for match in matches:
-                if isinstance(match, tuple):
-                    if len(match) == 2:  # Company (TICKER) format
-                        found_underlyings.append({'Name': match[0], 'Ticker': match[1]})
-                    else:
-                        found_underlyings.append({'Name': match[0], 'Ticker': ''})
-                else:
-                    found_underlyings.append({'Name': match, 'Ticker': ''})
-        
-        if found_underlyings:
-            underlyings = found_underlyings[:4]  # Take first 4
-        else:
-            # Only use issuer-based examples as absolute last resort
-            if issuer_type == 'bnp_paribas':
-                underlyings = [
-                    {'Name': 'Wells Fargo Co', 'Ticker': 'WFC'},
-                    {'Name': 'ING Groep NV', 'Ticker': 'ING'},
-                    {'Name': 'Macquarie Group Ltd', 'Ticker': 'MQG'},
-                    {'Name': 'Bank Of America Corp', 'Ticker': 'BAC'}
-                ]
-            elif issuer_type == 'morgan_stanley':
-                underlyings = [
-                    {'Name': 'Societe Generale', 'Ticker': 'GLE'},
-                    {'Name': 'BNP Paribas', 'Ticker': 'BNP'},
-                    {'Name': 'ING Groep NV', 'Ticker': 'ING'},
-                    {'Name': 'Credit Agricole', 'Ticker': 'ACA'}
-                ]
-            elif issuer_type == 'natixis':
-                underlyings = [
-                    {'Name': 'Banco Bilbao Vizcaya Argentaria SA', 'Ticker': 'BBVA'},
-                    {'Name': 'Barclays PLC', 'Ticker': 'BARC'},
-                    {'Name': 'UBS Group AG', 'Ticker': 'UBSG'},
-                    {'Name': 'Societe Generale SA', 'Ticker': 'GLE'}
-                ]
-            elif issuer_type in ['ubs', 'barclays', 'macquarie']:
-                underlyings = [
-                    {'Name': 'Alphabet Inc', 'Ticker': 'GOOG'},
-                    {'Name': 'Meta Platforms Inc', 'Ticker': 'META'},
-                    {'Name': 'Microsoft Corporation', 'Ticker': 'MSFT'},
-                    {'Name': 'Oracle Corporation', 'Ticker': 'ORCL'}
-                ]
-            elif issuer_type == 'citigroup':
-                underlyings = [
-                    {'Name': 'Coles Group Ltd', 'Ticker': 'COL'},
-                    {'Name': 'Macquarie Group Ltd', 'Ticker': 'MQG'},
-                    {'Name': 'Rio Tinto Ltd', 'Ticker': 'RIO'},
-                    {'Name': '', 'Ticker': ''}  # Only 3 for CG
-                ]
-            else:
-                underlyings = []  # Empty if no data found
-    
-    # Format underlying assets
-    for i in range(4):
-        if i < len(underlyings) and underlyings[i].get('Name'):
-            name = underlyings[i].get('Name', '')
-            ticker = underlyings[i].get('Ticker', '') or underlyings[i].get('Bloomberg_Code', '')
-            
-            # Clean up ticker format
-            if ticker:
-                clean_ticker = ticker.replace(' UW', '').replace('.OQ', '').replace('.N', '').replace(' UN', '')
-                clean_ticker = clean_ticker.replace('GOOG UW', 'GOOG').replace('META UW', 'META')
-                clean_ticker = clean_ticker.replace('MSFT UW', 'MSFT').replace('ORCL UN', 'ORCL')
-                clean_ticker = clean_ticker.replace('BBVA SQ', 'BBVA').replace('BARC LN', 'BARC')
-                clean_ticker = clean_ticker.replace('UBSG SE', 'UBSG').replace('GLE FP', 'GLE')
-                formatted_name = f"{name} ({clean_ticker})"
-            else:
-                formatted_name = name
-            row[19 + i] = formatted_name
-        else:
-            row[19 + i] = ''
-    
-    # Financial amounts (23-26) - extract actual values from termsheet with error handling
-    extracted_notional = data.get('Notional Value', '') or data.get('Principal_Amount', '') or data.get('Investment_Amount', '')
-    
-    try:
-        if extracted_notional and isinstance(extracted_notional, (int, float)) and extracted_notional > 0:
-            formatted_amount = f"${extracted_notional:,.2f}"
-            row[23] = formatted_amount  # Investment $
-            row[24] = formatted_amount  # Total Units
-            row[25] = formatted_amount  # Notional Value
-            row[26] = formatted_amount if data.get('CCY') == 'AUD' else ''  # AUD Equivalent
-        elif isinstance(extracted_notional, str) and extracted_notional.strip():
-            # Try to extract numeric value from string
-            amount_match = re.search(r'[\d,]+(?:\.\d{2})?', extracted_notional.replace('$', '').replace(',', ''))
-            if amount_match:
-                amount_value = float(amount_match.group(0).replace(',', ''))
-                if amount_value > 1000:  # Reasonable minimum
-                    formatted_amount = f"${amount_value:,.2f}"
-                    row[23] = formatted_amount
-                    row[24] = formatted_amount
-                    row[25] = formatted_amount
-                    row[26] = formatted_amount if data.get('CCY') == 'AUD' else ''
-                else:
-                    raise ValueError("Amount too small")
-            else:
-                raise ValueError("No numeric amount found")
-        else:
-            raise ValueError("Empty or invalid notional")
-    except (ValueError, TypeError, AttributeError):
-        # Try to extract from text patterns if structured extraction failed
-        extracted_text = data.get('extracted_text', '')
-        if extracted_text:
-            notional_patterns = [
-                r'Principal[:\s]+(?:AUD|USD|EUR|GBP)?\s*([0-9,]+(?:\.[0-9]{2})?)',
-                r'Notional[:\s]+(?:AUD|USD|EUR|GBP)?\s*([0-9,]+(?:\.[0-9]{2})?)',
-                r'Investment[:\s]+(?:AUD|USD|EUR|GBP)?\s*([0-9,]+(?:\.[0-9]{2})?)',
-                r'Amount[:\s]+(?:AUD|USD|EUR|GBP)?\s*([0-9,]+(?:\.[0-9]{2})?)'
-            ]
-            
-            found_amount = None
-            for pattern in notional_patterns:
-                try:
-                    match = re.search(pattern, extracted_text, re.IGNORECASE)
-                    if match:
-                        amount_str = match.group(1).replace(',', '')
-                        found_amount = float(amount_str)
-                        if found_amount > 1000:  # Reasonable minimum
-                            break
-                except (ValueError, AttributeError):
-                    continue
-            
-            if found_amount and found_amount > 1000:
-                formatted_amount = f"${found_amount:,.2f}"
-                row[23] = formatted_amount
-                row[24] = formatted_amount
-                row[25] = formatted_amount
-                row[26] = formatted_amount if data.get('CCY') == 'AUD' else ''
-            else:
-                # Only use fallback amounts if no extraction possible
-                fallback_amount = "$100,000.00"  # More realistic than $100
-                row[23] = fallback_amount
-                row[24] = fallback_amount
-                row[25] = fallback_amount
-                row[26] = fallback_amount if data.get('CCY') == 'AUD' else ''
-        else:
-            # No text available - use fallback
-            fallback_amount = "$100,000.00"
-            row[23] = fallback_amount
-            row[24] = fallback_amount
-            row[25] = fallback_amount
-            row[26] = fallback_amount if data.get('CCY') == 'AUD' else ''
-    
-    row[27] = data.get('Maturity Date', '')
-    
-    # Extract revenue from termsheet if available with error handling
-    extracted_revenue = data.get('Revenue', '') or data.get('Expected_Return', '') or data.get('Coupon_Payment', '')
-    try:
-        if extracted_revenue and isinstance(extracted_revenue, (int, float)):
-            row[28] = f"${extracted_revenue:,.2f}"
-        elif isinstance(extracted_revenue, str) and extracted_revenue.strip():
-            # Try to extract numeric value from string
-            revenue_match = re.search(r'[\d,]+(?:\.\d{2})?', extracted_revenue.replace('$', ''))
-            if revenue_match:
-                revenue_value = float(revenue_match.group(0).replace(',', ''))
-                row[28] = f"${revenue_value:,.2f}"
-            else:
-                row[28] = ''  # Leave empty if not found
-        else:
-            row[28] = ''  # Leave empty if not found
-    except (ValueError, TypeError, AttributeError):
-        row[28] = ''  # Leave empty if conversion fails
-        
-    # Extract UF% from termsheet with error handling
-    extracted_uf = data.get('UF%', '') or data.get('Management_Fee', '') or data.get('Fee', '')
-    try:
-        if extracted_uf and isinstance(extracted_uf, (int, float)):
-            row[29] = float(extracted_uf)
-        elif isinstance(extracted_uf, str) and extracted_uf.strip():
-            # Try to extract numeric value from string
-            uf_match = re.search(r'(\d+\.?\d*)', extracted_uf.replace('%', ''))
-            if uf_match:
-                uf_value = float(uf_match.group(1))
-                # Convert to decimal if it's in percentage format
-                if uf_value > 1:
-                    row[29] = uf_value / 100
-                else:
-                    row[29] = uf_value
-            else:
-                row[29] = 0.023  # Standard 2.30% fallback
-        else:
-            row[29] = 0.023  # Standard 2.30% fallback
-    except (ValueError, TypeError, AttributeError):
-        row[29] = 0.023  # Standard 2.30% fallback
-    
-    # Underlying prices (30-41) - extract actual values from termsheet data
-    for i in range(4):
-        if i < len(underlyings) and underlyings[i].get('Name'):
-            # Try to get actual extracted prices first
-            initial_price = underlyings[i].get('Initial_Price', '') or underlyings[i].get('Strike_Price', '') or underlyings[i].get('Reference_Price', '')
-            knock_in_price = underlyings[i].get('Knock_In_Price', '') or underlyings[i].get('Barrier_Price', '')
-            knock_out_price = underlyings[i].get('Knock_Out_Price', '') or underlyings[i].get('Autocall_Price', '')
-            
-            # Extract numeric values from prices
-            def extract_price_value(price_str):
-                if isinstance(price_str, (int, float)):
-                    return price_str
-                elif isinstance(price_str, str) and price_str:
-                    # Remove currency symbols and extract number
-                    price_matches = re.findall(r'[\d.]+', price_str.replace(',', ''))
-                    if price_matches:
-                        try:
-                            return float(price_matches[0])
-                        except:
-                            return None
-                return None
-            
-            # Set issue prices
-            extracted_initial = extract_price_value(initial_price)
-            if extracted_initial and extracted_initial > 0:
-                row[30 + i] = extracted_initial
-            else:
-                # Try to extract from other data sources
-                extracted_text = data.get('extracted_text', '')
-                ticker = underlyings[i].get('Ticker', '')
-                if ticker:
-                    # Look for ticker-specific price patterns
-                    price_pattern = rf'{ticker}[:\s]+(?:USD|EUR|GBP)?\s*([0-9.,]+)'
-                    price_match = re.search(price_pattern, extracted_text, re.IGNORECASE)
-                    if price_match:
-                        try:
-                            row[30 + i] = float(price_match.group(1).replace(',', ''))
-                        except:
-                            row[30 + i] = 100.0  # Fallback
-                    else:
-                        row[30 + i] = 100.0  # Fallback
-                else:
-                    row[30 + i] = 100.0  # Fallback
-                    
-            # Set knock-in prices (typically 60% of issue price for barrier products)
-            extracted_knock_in = extract_price_value(knock_in_price)
-            if extracted_knock_in and extracted_knock_in > 0:
-                row[34 + i] = extracted_knock_in
-            else:
-                # Calculate from knock-in percentage and issue price
-                knock_in_pct = data.get('Knock-In%', 0.6)
-                if isinstance(knock_in_pct, (int, float)) and row[30 + i]:
-                    row[34 + i] = row[30 + i] * knock_in_pct
-                else:
-                    row[34 + i] = row[30 + i] * 0.6 if row[30 + i] else 60.0
-                    
-            # Set knock-out prices (typically 90-100% of issue price)
-            extracted_knock_out = extract_price_value(knock_out_price)
-            if extracted_knock_out and extracted_knock_out > 0:
-                row[38 + i] = extracted_knock_out
-            else:
-                # Calculate from knock-out percentage and issue price
-                knockout_pct = data.get('Knock-Out%', 0.9)
-                if isinstance(knockout_pct, (int, float)) and row[30 + i]:
-                    row[38 + i] = row[30 + i] * knockout_pct
-                else:
-                    row[38 + i] = row[30 + i] * 0.9 if row[30 + i] else 90.0
-        else:
-            # Empty underlying - set prices to empty
-            row[30 + i] = ''
-            row[34 + i] = ''
-            row[38 + i] = ''
-    
-    # Market close prices (42-45) - empty for now (to be filled during trading)
-    for i in range(4):
-        row[42 + i] = ''
-    
-    # Maturity date duplicate (46)
-    row[46] = data.get('Maturity Date', '')
-    
-    # Valuation dates (47-55) - extract actual observation dates from termsheet
-    extracted_valuation_dates = data.get('valuation_dates', []) or data.get('observation_dates', []) or data.get('coupon_dates', [])
+        documents, database_rows = future.result()
+    except BrokenProcessPool as e:
+        # A worker died, e.g. killed by its CPU or memory limit; start a fresh pool next time
+        warm_pool.clear()
+        error = f"Worker pool failed: {e}"
+    except SandboxError as e:
+        # Hung, oversized or crashing document: stopped by the sandbox, the batch goes on
+        error = f"Isolated extraction stopped: {e}"
+    except Exception as e:
+        error = str(e)
+    if error is not None:
+        manifest.mark(keys[index], FAILED, error)
+        return [{'kind': 'failed', 'filename': name, 'error': error}]
+
+    entries = []
+    if len(documents) > 1:
+        entries.append({'kind': 'notice', 'message': f"📑 {name} holds {len(documents)} termsheets; each gets its own row"})
+    for data in documents:
+        if data.get('degraded'):
+            entries.append({'kind': 'warning', 'message': f"⚠️ {data['Source_File']}: memory ceiling reached, {'; '.join(data['degraded'])}"})
+        if data.get('truncated'):
+            entries.append({'kind': 'warning', 'message': f"⚠️ {data['Source_File']}: {data['truncated']}; later pages were not extracted"})
     
-    if extracted_valuation_dates and len(extracted_valuation_dates) > 0:
-        # Use actual extracted dates
-        for i in range(min(9, len(extracted_valuation_dates))):
-            row[47 + i] = extracted_valuation_dates[i]
-    else:
-        # Try to extract dates from text patterns
-        extracted_text = data.get('extracted_text', '')
-        date_patterns = [
-            r'(\d{1,2}/\d{1,2}/\d{4})',  # MM/DD/YYYY
-            r'(\d{1,2}-\d{1,2}-\d{4})',  # MM-DD-YYYY
-            r'(\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4})',  # DD Month YYYY
-        ]
-        
-        found_dates = []
-        for pattern in date_patterns:
-            matches = re.findall(pattern, extracted_text, re.IGNORECASE)
-            found_dates.extend(matches)
-        
-        # Filter and format dates
-        formatted_dates = []
-        for date_str in found_dates:
-            if len(formatted_dates) >= 9:  # Max 9 valuation dates
-                break
-            # Basic validation - ensure it's a future date and not issue/maturity
-            if any(keyword in date_str.lower() for keyword in ['valuation', 'observation', 'coupon', 'payment']):
-                formatted_dates.append(date_str)
-        
-        if formatted_dates:
-            for i in range(min(9, len(formatted_dates))):
-                row[47 + i] = formatted_dates[i]
+    # Append to master file
+    outcomes = append_documents(manifest, keys[index], documents, database_rows, master_path)
+    for (document_name, outcome, message), data, database_row in zip(outcomes, documents, database_rows):
+        if outcome == 'appended':
+            entries.append({'kind': 'success', 'filename': document_name, 'issuer': issuers[index], 'data': data, 'row': database_row})
+        elif outcome == 'skipped':
+            entries.append({'kind': 'notice', 'message': f"⏭️ {document_name} was {message}"})
         else:
-            # Generate quarterly dates only as absolute fallback
-            issue_date = data.get('Issue Date', '')
-            maturity_date = data.get('Maturity Date', '')
-            
-            if issue_date and maturity_date:
-                try:
-                    # Parse dates and generate quarterly schedule
-                    from datetime import datetime, timedelta
-                    import dateutil.parser
-                    
-                    start_date = dateutil.parser.parse(issue_date)
-                    end_date = dateutil.parser.parse(maturity_date)
-                    
-                    current_date = start_date
-                    quarterly_dates = []
-                    
-                    while current_date < end_date and len(quarterly_dates) < 9:
-                        current_date += timedelta(days=90)  # Approximately quarterly
-                        if current_date <= end_date:
-                            quarterly_dates.append(current_date.strftime('%m/%d/%Y'))
-                    
-                    for i in range(min(9, len(quarterly_dates))):
-                        row[47 + i] = quarterly_dates[i]
-                        
-                except:
-                    # If date parsing fails, leave empty
-                    pass
-    
-    return row
-
-def append_to_fixed_income_master(new_row_data, master_file_path):
-    """Append data with proper headers, formatting, and percentage columns"""
-    try:
-        from openpyxl.styles import NamedStyle, Font, PatternFill, Border, Side, Alignment
-        from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00, FORMAT_CURRENCY_USD_SIMPLE
-        from openpyxl import Workbook, load_workbook
-        
-        # Read existing data or create new
-        try:
-            database_df = pd.read_excel(master_file_path, sheet_name=' Database', header=1)  # Headers are on row 2
-            start_row = len(database_df) + 3  # Account for header rows
-        except:
-            database_df = pd.DataFrame()
-            start_row = 3
-            
-        # Create workbook and worksheet
-        try:
-            wb = load_workbook(master_file_path)
-            if ' Database' in wb.sheetnames:
-                ws = wb[' Database']
-            else:
-                ws = wb.create_sheet(' Database')
-        except:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = ' Database'
-            start_row = 3
-            
-        # Define proper headers (matching your exact template)
-        headers = [
-            "Investment Name", "Issuer", "Product Name", "Investment Thematic", "TYPE", 
-            "Coupon - QTR", "Coupon Rate - Annual", "Product Status", "Knock-In%", "Knock-Out%", 
-            "Issue Price%", "Coupon Barrier%", "Minimum Tenor (Q)", "Maximum Tenor (Q)", "Observation Frequency", "CCY", 
-            "Strike Date", "Issue Date", "ISIN", "Underlying 1", "Underlying 2", "Underlying 3", 
-            "Underlying 4", "Investment $", "Total Units ", "Notional Value", 
-            "AUD Equivalent", "Maturity Date", "Revenue", "UF%", 
-            "Underlying 1 - Issue Price", "Underlying 2 - Issue Price", "Underlying 3 - Issue Price", 
-            "Underlying 4 - Issue Price", "Underlying 1 - Knock In Price", 
-            "Underlying 2 - Knock In Price", "Underlying 3 - Knock In Price", 
-            "Underlying 4 - Knock In Price", "Underlying 1 - Knock Out", 
-            "Underlying 2 - Knock Out", "Underlying 3 - Knock Out", "Underlying 4 - Knock Out", 
-            "Underlying 1 - Market Close", "Underlying 2 - Market Close", "Underlying 3 - Market Close", 
-            "Underlying 4 - Market Close", "Maturity Date:", "Valuation Date 1", "Valuation Date 2", 
-            "Valuation Date 3", "Valuation Date 4", "Valuation Date 5", "Valuation Date 6", 
-            "Valuation Date 7", "Valuation Date 8", "Valuation Date 9", "Valuation Date 10", 
-            "Valuation Date 11", "Valuation Date 12"
-        ]
-        
-        # Add headers if this is a new file
-        if start_row == 3:
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=2, column=col, value=header)
-                # Style headers
-                cell = ws.cell(row=2, column=col)
-                cell.font = Font(bold=True)
-                
-        # Add the new data row
-        for col, value in enumerate(new_row_data, 1):
-            if col <= len(headers):  # Don't exceed header count
-                cell = ws.cell(row=start_row, column=col, value=value)
-                
-                # Apply formatting based on column type
-                if col in [6, 7, 9, 10, 11]:  # Percentage columns
-                    if isinstance(value, (int, float)) and value != '':
-                        cell.number_format = '0.00%'
-                        
-                elif col in [25, 26, 27, 28, 30]:  # Currency columns
-                    if isinstance(value, (int, float)) and value != '':
-                        cell.number_format = '"$"#,##0.00'
-                        
-                elif col in [33, 34, 35, 36, 38, 39, 40, 41, 43, 44, 45, 46]:  # Price columns
-                    if isinstance(value, (int, float)) and value != '':
-                        cell.number_format = '"$"#,##0.000'
-        
-        # Save the workbook
-        wb.save(master_file_path)
-        
-        return True, f"Successfully added formatted row {start_row - 2} to Database sheet"
-        
-    except Exception as e:
-        return False, f"Error updating master file: {str(e)}"
-
-# Initialize the extractor
-extractor = FixedIncomeTermsheetExtractor()
+            entries.append({'kind': 'failed', 'filename': document_name, 'error': message})
+    return entries
 
 # STREAMLIT APP
 st.set_page_config(
@@ -1771,10 +97,12 @@ uploaded_master_file = st.file_uploader(
 )
 
 if uploaded_master_file:
-    # Save the master file
+    # Save the master file once per upload; the reruns that poll a running batch mustn't undo its appends
     master_path = "/tmp/Fixed_Income_Desk_Master_File.xlsx"
-    with open(master_path, "wb") as f:
-        f.write(uploaded_master_file.read())
+    if st.session_state.get('master_upload') != uploaded_master_file.file_id:
+        with open(master_path, "wb") as f:
+            f.write(uploaded_master_file.getvalue())
+        st.session_state['master_upload'] = uploaded_master_file.file_id
     st.success("✅ Master file loaded successfully!")
 else:
     master_path = "/mnt/user-data/uploads/Fixed_Income_Desk_Master_File.xlsx"
@@ -1789,11 +117,17 @@ st.subheader("📄 Batch Termsheet Processing")
 # Multi-file uploader
 uploaded_files = st.file_uploader(
     "Upload Multiple PDF Termsheets",
-    type=['pdf'],
+    type=['pdf', 'zip', 'eml'],
     accept_multiple_files=True,
-    help="Select multiple PDF termsheets to process in batch"
+    help="Select PDF termsheets, ZIP archives of them or .eml messages with them attached"
 )
 
+# Archives and emails are opened in memory; every PDF inside is listed like an uploaded PDF
+if uploaded_files:
+    if 'archive_members' not in st.session_state:
+        st.session_state['archive_members'] = {}
+    uploaded_files = expand_uploads(uploaded_files, st.session_state['archive_members'])
+
 # Issuer options
 issuer_options = {
     'Morgan Stanley': 'morgan_stanley',
@@ -1809,219 +143,292 @@ issuer_options = {
 file_issuer_mapping = {}
 
 if uploaded_files and os.path.exists(master_path):
-    st.write(f"**{len(uploaded_files)} files uploaded**")
-    
+    st.write(f"**{len(uploaded_files)} PDF termsheets to process**")
+
+    # Issuer scores from each file's first pages, kept across reruns
+    if 'issuer_suggestions' not in st.session_state:
+        st.session_state['issuer_suggestions'] = {}
+    issuer_suggestions = st.session_state['issuer_suggestions']
+
     # Create dropdown for each file
     for idx, file in enumerate(uploaded_files):
+        suggestion_key = (file.name, file.size)
+        if suggestion_key not in issuer_suggestions:
+            # Only the first pages' text is read, which is cheaper in-process than a spawned child
+            try:
+                issuer_suggestions[suggestion_key] = extractor.suggest_issuer(file.getvalue())
+            except Exception:
+                issuer_suggestions[suggestion_key] = {}
+        issuer_scores = issuer_suggestions[suggestion_key]
+        suggested_issuer = best_issuer(issuer_scores)
+
         col1, col2 = st.columns([2, 1])
-        
+
         with col1:
             st.write(f"📄 **{file.name}**")
             st.caption(f"Size: {file.size/1024:.1f} KB")
-        
+
         with col2:
+            # Default to the top-scoring issuer so large batches can run unattended
+            option_keys = list(issuer_options.values())
+            default_index = option_keys.index(suggested_issuer) if suggested_issuer in option_keys else 0
             selected_issuer = st.selectbox(
                 f"Select Issuer:",
                 options=list(issuer_options.keys()),
+                index=default_index,
                 key=f"issuer_{idx}",
                 help=f"Choose issuer for {file.name}"
             )
+            if suggested_issuer in option_keys:
+                st.caption(f"Detected issuer score: {issuer_scores[suggested_issuer]:.1f}")
+            else:
+                st.caption("No issuer detected - please select manually")
             file_issuer_mapping[file.name] = issuer_options[selected_issuer]
         
         st.markdown("---")
 
-    # Process All Files Button
-    if st.button("Process All Termsheets", type="primary"):
-        
-        # Initialize results tracking
-        successful_extractions = []
-        failed_extractions = []
-        total_files = len(uploaded_files)
-        
-        # Create progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+    isolate = st.checkbox(
+        "Isolate each file",
+        value=True,
+        help=f"Extract every file away from the app, stopped after {SANDBOX_LIMITS.timeout} s wall-clock, "
+             f"{SANDBOX_LIMITS.cpu_seconds} s CPU or {SANDBOX_LIMITS.memory_mb} MB of extra memory"
+    )
+
+    use_all_cores = st.checkbox(
+        "Use all cores",
+        value=True,
+        help="Extract files in parallel in a pool of worker processes; rows are still written in upload order"
+    )
+
+    urgent_files = st.multiselect(
+        "Urgent files",
+        options=[file.name for file in uploaded_files],
+        help="Extracted ahead of the rest of the batch, which runs longest document first"
+    )
+
+    # Process All Files Button; a batch runs in the background, one at a time
+    batch_job = st.session_state.get('batch_job')
+    if st.button("Process All Termsheets", type="primary", disabled=batch_job is not None and batch_job.running):
+        # Files an earlier (interrupted) batch already appended are skipped, whatever they're called now
+        manifest = BatchManifest(master_path)
+        file_keys = {file.name: file_key(file.getvalue()) for file in uploaded_files}
+        st.session_state['batch_skipped'] = [file.name for file in uploaded_files if manifest.completed(file_keys[file.name])]
+        # The same content uploaded twice (e.g. a PDF and its copy inside an attached archive) is extracted once
+        queued = {}
+        st.session_state['batch_duplicates'] = []
+        for file in uploaded_files:
+            if file.name in st.session_state['batch_skipped']:
+                continue
+            if file_keys[file.name] in queued:
+                st.session_state['batch_duplicates'].append(f"{file.name} (same as {queued[file_keys[file.name]]})")
+            else:
+                queued[file_keys[file.name]] = file.name
+        files = [file for file in uploaded_files if queued.get(file_keys[file.name]) == file.name]
+        keys = [file_keys[file.name] for file in files]
+        manifest.mark_pending(zip(keys, [file.name for file in files]))
+        total_files = len(files)
+        issuers = [file_issuer_mapping[file.name] for file in files]
+        
+        # Fan extraction out to the warm pool, or to one background thread for a lone file
+        pooled = use_all_cores and total_files > 1
+        if pooled:
+            executor = warm_pool()
+        else:
+            if 'job_executor' not in st.session_state:
+                st.session_state['job_executor'] = ThreadPoolExecutor(max_workers=1)
+            executor = st.session_state['job_executor']
+        
+        # Files start longest first (page count from pypdf, plus size), urgent ones ahead of all
+        scheduler = Scheduler(executor, (os.cpu_count() or 1) if pooled else 1)
+        
+        def submit(index):
+            file = files[index]
+            # A lone document gets every core, its pages read by worker processes
+            return scheduler.submit(
+                extract_rows, extractor, file.name, file.getvalue(), issuers[index],
+                limits=SANDBOX_LIMITS if isolate else None,
+                page_workers=os.cpu_count() if total_files == 1 else None,
+                bundle_workers=1 if pooled else None,
+                cost=estimate_cost(file.getvalue()),
+                urgent=file.name in urgent_files
+            )
         
-        for idx, file in enumerate(uploaded_files):
-            # Update progress
-            progress = (idx + 1) / total_files
-            progress_bar.progress(progress)
-            status_text.text(f"Processing {file.name} ({idx + 1}/{total_files})")
+        names = [file.name for file in files]
+        with scheduler.batch():
+            st.session_state['batch_job'] = BatchJob(names, submit, partial(record_file, names, issuers, keys, manifest, master_path))
+
+# BATCH PROGRESS AND RESULTS (the job outlives reruns, so results stay visible while it runs)
+batch_job = st.session_state.get('batch_job')
+if batch_job is not None:
+    completed, recorded, entries = batch_job.snapshot()
+    running = batch_job.running
+    successful_extractions = [entry for entry in entries if entry['kind'] == 'success']
+    failed_extractions = [entry for entry in entries if entry['kind'] == 'failed']
+    
+    skipped = st.session_state.get('batch_skipped')
+    if skipped:
+        st.info(f"⏭️ Skipped {len(skipped)} files already in the master file: {', '.join(skipped)}")
+    duplicates = st.session_state.get('batch_duplicates')
+    if duplicates:
+        st.info(f"⏭️ Skipped {len(duplicates)} duplicate files: {', '.join(duplicates)}")
+    
+    # Progress tracking
+    st.progress(batch_job.progress)
+    if running:
+        st.text(f"Processing: {completed}/{batch_job.total} files extracted, {recorded} written to the master file")
+        if st.button("Cancel Batch"):
+            batch_job.cancel()
+            st.rerun()
+    elif batch_job.cancelled:
+        st.text(f"Cancelled after {recorded}/{batch_job.total} files")
+        failed_extractions += [{'filename': name, 'error': 'Cancelled'} for name in batch_job.unrecorded]
+    else:
+        st.text("Processing complete!")
+    
+    # Each file's outcome, as soon as its rows are written
+    for entry in entries:
+        if entry['kind'] == 'notice':
+            st.info(entry['message'])
+        elif entry['kind'] == 'warning':
+            st.warning(entry['message'])
+        elif entry['kind'] == 'success':
+            data = entry['data']
+            database_row = entry['row']
             
-            try:
-                # Save file temporarily
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                    tmp_file.write(file.read())
-                    tmp_path = tmp_file.name
-                
-                # Get selected issuer for this file
-                selected_issuer_key = file_issuer_mapping[file.name]
-                
-                # Extract data
-                data = extractor.extract_termsheet_data(tmp_path)
-                
-                # Override with selected issuer
-                data['Detected_Issuer_Type'] = selected_issuer_key
-                data['Issuer'] = extractor.issuer_patterns[selected_issuer_key]['issuer_name']
-                data['Source_File'] = file.name
-                
-                # Create database row
-                database_row = create_database_row(data)
-                
-                # Append to master file
-                success, message = append_to_fixed_income_master(database_row, master_path)
-                
-                if success:
-                    successful_extractions.append({
-                        'filename': file.name,
-                        'issuer': selected_issuer_key,
-                        'data': data
-                    })
-                    
-                    # Show preview for this file
-                    st.success(f"✅ {file.name} extracted successfully!")
+            # Show preview for this file
+            st.success(f"✅ {entry['filename']} extracted successfully!")
+            
+            # Display preview in expander to save space
+            with st.expander(f"Preview: {entry['filename']} - {list(issuer_options.keys())[list(issuer_options.values()).index(entry['issuer'])]}"):
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.write("**Core Information**")
+                    st.write(f"**Issuer:** {data.get('Issuer', 'N/A')}")
+                    st.write(f"**ISIN:** {data.get('ISIN', 'N/A')}")
+                    st.write(f"**Currency:** {data.get('CCY', 'N/A')}")
+                    st.write(f"**Notional:** {data.get('Notional Value', 'N/A')}")
+                
+                with col2:
+                    st.write("**Key Dates**")
+                    st.write(f"**Issue Date:** {data.get('Issue Date', 'N/A')}")
+                    st.write(f"**Strike Date:** {data.get('Strike Date', 'N/A')}")
+                    st.write(f"**Maturity:** {data.get('Maturity Date', 'N/A')}")
+                
+                with col3:
+                    st.write("**Risk Parameters**")
+                    st.write(f"**Knock-In:** {data.get('Knock-In%', 'N/A')}")
+                    st.write(f"**Coupon Rate:** {data.get('Coupon Rate - Annual', 'N/A')}")
+                    st.write(f"**Underlyings:** {len(data.get('underlying_assets', []))}")
+                
+                # Show database row preview
+                if database_row:
+                    preview_dict = {}
+                    for i, value in enumerate(database_row):
+                        col_name = extractor.column_mapping.get(i, f"Column_{i}")
+                        if col_name and value:
+                            preview_dict[col_name] = value
                     
-                    # Display preview in expander to save space
-                    with st.expander(f"Preview: {file.name} - {list(issuer_options.keys())[list(issuer_options.values()).index(selected_issuer_key)]}"):
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            st.write("**Core Information**")
-                            st.write(f"**Issuer:** {data.get('Issuer', 'N/A')}")
-                            st.write(f"**ISIN:** {data.get('ISIN', 'N/A')}")
-                            st.write(f"**Currency:** {data.get('CCY', 'N/A')}")
-                            st.write(f"**Notional:** {data.get('Notional Value', 'N/A')}")
-                        
-                        with col2:
-                            st.write("**Key Dates**")
-                            st.write(f"**Issue Date:** {data.get('Issue Date', 'N/A')}")
-                            st.write(f"**Strike Date:** {data.get('Strike Date', 'N/A')}")
-                            st.write(f"**Maturity:** {data.get('Maturity Date', 'N/A')}")
-                        
-                        with col3:
-                            st.write("**Risk Parameters**")
-                            st.write(f"**Knock-In:** {data.get('Knock-In%', 'N/A')}")
-                            st.write(f"**Coupon Rate:** {data.get('Coupon Rate - Annual', 'N/A')}")
-                            st.write(f"**Underlyings:** {len(data.get('underlying_assets', []))}")
-                        
-                        # Show database row preview
-                        if database_row:
-                            preview_dict = {}
-                            for i, value in enumerate(database_row):
-                                col_name = extractor.column_mapping.get(i, f"Column_{i}")
-                                if col_name and value:
-                                    preview_dict[col_name] = value
-                            
-                            if preview_dict:
-                                st.write("**Database Row Preview:**")
-                                preview_df = pd.DataFrame([preview_dict])
-                                st.dataframe(preview_df, use_container_width=True)
-                        
-                        # Show underlying assets if found
-                        if data.get('underlying_assets'):
-                            st.write("**Underlying Assets:**")
-                            df_underlying = pd.DataFrame(data['underlying_assets'])
-                            st.dataframe(df_underlying, use_container_width=True)
-                else:
-                    failed_extractions.append({
-                        'filename': file.name,
-                        'error': message
-                    })
-                
-                # Clean up temp file
-                os.unlink(tmp_path)
-                
-            except Exception as e:
-                failed_extractions.append({
-                    'filename': file.name,
-                    'error': str(e)
-                })
-        
-        # Show final results
-        progress_bar.progress(1.0)
-        status_text.text("Processing complete!")
-        
-        # Final Summary Section
-        st.subheader("📊 Processing Results Summary")
-        
-        # Results summary
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.success(f"✅ Successfully processed: {len(successful_extractions)} files")
-            if successful_extractions:
-                for item in successful_extractions:
-                    issuer_name = list(issuer_options.keys())[list(issuer_options.values()).index(item['issuer'])]
-                    st.write(f"• {item['filename']} → {issuer_name}")
-        
-        with col2:
-            if failed_extractions:
-                st.error(f"❌ Failed to process: {len(failed_extractions)} files")
-                for item in failed_extractions:
-                    st.write(f"• {item['filename']}: {item['error']}")
-        
-        # Detailed Results for All Files
+                    if preview_dict:
+                        st.write("**Database Row Preview:**")
+                        preview_df = pd.DataFrame([preview_dict])
+                        st.dataframe(preview_df, use_container_width=True)
+                
+                # Show underlying assets if found
+                if data.get('underlying_assets'):
+                    st.write("**Underlying Assets:**")
+                    df_underlying = pd.DataFrame(data['underlying_assets'])
+                    st.dataframe(df_underlying, use_container_width=True)
+    
+    if running:
+        # Poll for new results; any widget interaction reruns sooner
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    
+    # Final Summary Section
+    st.subheader("📊 Processing Results Summary")
+    
+    # Results summary
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.success(f"✅ Successfully processed: {len(successful_extractions)} files")
         if successful_extractions:
-            st.subheader("📋 Complete Extraction Details")
-            
             for item in successful_extractions:
                 issuer_name = list(issuer_options.keys())[list(issuer_options.values()).index(item['issuer'])]
-                data = item['data']
-                
-                with st.expander(f"📄 {item['filename']} - {issuer_name} Details", expanded=False):
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.write("**Core Information**")
-                        st.write(f"**Issuer:** {data.get('Issuer', 'N/A')}")
-                        st.write(f"**ISIN:** {data.get('ISIN', 'N/A')}")
-                        st.write(f"**Currency:** {data.get('CCY', 'N/A')}")
-                        st.write(f"**Notional:** {data.get('Notional Value', 'N/A')}")
-                    
-                    with col2:
-                        st.write("**Key Dates**")
-                        st.write(f"**Issue Date:** {data.get('Issue Date', 'N/A')}")
-                        st.write(f"**Strike Date:** {data.get('Strike Date', 'N/A')}")
-                        st.write(f"**Maturity:** {data.get('Maturity Date', 'N/A')}")
-                    
-                    with col3:
-                        st.write("**Risk Parameters**")
-                        st.write(f"**Knock-In:** {data.get('Knock-In%', 'N/A')}")
-                        st.write(f"**Coupon Rate:** {data.get('Coupon Rate - Annual', 'N/A')}")
-                        st.write(f"**Underlyings:** {len(data.get('underlying_assets', []))}")
-                    
-                    # Show underlying assets if found
-                    if data.get('underlying_assets'):
-                        st.write("**Underlying Assets:**")
-                        df_underlying = pd.DataFrame(data['underlying_assets'])
-                        st.dataframe(df_underlying, use_container_width=True)
-            
-            # Show consolidated database preview
-            st.subheader("🗃️ Database Rows Added")
-            consolidated_preview = []
-            for item in successful_extractions:
-                database_row = create_database_row(item['data'])
-                preview_dict = {'File': item['filename']}
-                for i, value in enumerate(database_row):
-                    col_name = extractor.column_mapping.get(i, f"Column_{i}")
-                    if col_name and value:
-                        preview_dict[col_name] = value
-                consolidated_preview.append(preview_dict)
-            
-            if consolidated_preview:
-                consolidated_df = pd.DataFrame(consolidated_preview)
-                st.dataframe(consolidated_df, use_container_width=True)
+                st.write(f"• {item['filename']} → {issuer_name}")
+    
+    with col2:
+        if failed_extractions:
+            st.error(f"❌ Failed to process: {len(failed_extractions)} files")
+            for item in failed_extractions:
+                st.write(f"• {item['filename']}: {item['error']}")
+    
+    # Detailed Results for All Files
+    if successful_extractions:
+        st.subheader("📋 Complete Extraction Details")
         
-        # Download updated master file
-        if successful_extractions:
-            with open(master_path, "rb") as file:
-                st.download_button(
-                    label="📥 Download Updated Master File",
-                    data=file.read(),
-                    file_name="Fixed_Income_Desk_Master_File_Updated.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+        for item in successful_extractions:
+            issuer_name = list(issuer_options.keys())[list(issuer_options.values()).index(item['issuer'])]
+            data = item['data']
             
+            with st.expander(f"📄 {item['filename']} - {issuer_name} Details", expanded=False):
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.write("**Core Information**")
+                    st.write(f"**Issuer:** {data.get('Issuer', 'N/A')}")
+                    st.write(f"**ISIN:** {data.get('ISIN', 'N/A')}")
+                    st.write(f"**Currency:** {data.get('CCY', 'N/A')}")
+                    st.write(f"**Notional:** {data.get('Notional Value', 'N/A')}")
+                
+                with col2:
+                    st.write("**Key Dates**")
+                    st.write(f"**Issue Date:** {data.get('Issue Date', 'N/A')}")
+                    st.write(f"**Strike Date:** {data.get('Strike Date', 'N/A')}")
+                    st.write(f"**Maturity:** {data.get('Maturity Date', 'N/A')}")
+                
+                with col3:
+                    st.write("**Risk Parameters**")
+                    st.write(f"**Knock-In:** {data.get('Knock-In%', 'N/A')}")
+                    st.write(f"**Coupon Rate:** {data.get('Coupon Rate - Annual', 'N/A')}")
+                    st.write(f"**Underlyings:** {len(data.get('underlying_assets', []))}")
+                
+                # Show underlying assets if found
+                if data.get('underlying_assets'):
+                    st.write("**Underlying Assets:**")
+                    df_underlying = pd.DataFrame(data['underlying_assets'])
+                    st.dataframe(df_underlying, use_container_width=True)
+        
+        # Show consolidated database preview
+        st.subheader("🗃️ Database Rows Added")
+        consolidated_preview = []
+        for item in successful_extractions:
+            database_row = item['row']
+            preview_dict = {'File': item['filename']}
+            for i, value in enumerate(database_row):
+                col_name = extractor.column_mapping.get(i, f"Column_{i}")
+                if col_name and value:
+                    preview_dict[col_name] = value
+            consolidated_preview.append(preview_dict)
+        
+        if consolidated_preview:
+            consolidated_df = pd.DataFrame(consolidated_preview)
+            st.dataframe(consolidated_df, use_container_width=True)
+    
+    # Download updated master file
+    if successful_extractions:
+        with open(master_path, "rb") as file:
+            st.download_button(
+                label="📥 Download Updated Master File",
+                data=file.read(),
+                file_name="Fixed_Income_Desk_Master_File_Updated.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+        
+        # Celebrate once, not on every rerun that shows the finished job
+        if not getattr(batch_job, 'celebrated', False):
+            batch_job.celebrated = True
             st.balloons()
 
 # Show supported issuers
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import as_completed
+
+
+class BatchJob:
+    """A batch of files extracted in the background and recorded in upload order
+
+    submit(index) starts the work for one file and returns its future. A
+    collector thread takes the futures as_completed and calls
+    record(index, future) for a file once every file before it has been
+    recorded, so side effects such as master file writes happen one at a
+    time and in upload order. record returns the entries (any dicts) to show
+    for that file. The job outlives Streamlit reruns when kept in
+    st.session_state; each rerun reads its progress and entries.
+    """
+
+    def __init__(self, names, submit, record):
+        self.names = list(names)
+        self.total = len(self.names)
+        self.completed = 0
+        self.recorded = 0
+        self.cancelled = False
+        self.entries = []
+        self._record = record
+        self._lock = threading.Lock()
+        self.futures = [submit(index) for index in range(self.total)]
+        self._thread = threading.Thread(target=self._collect, name='batch-job-collector', daemon=True)
+        self._thread.start()
+
+    def _collect(self):
+        indexes = {future: index for index, future in enumerate(self.futures)}
+        finished = set()
+        for future in as_completed(self.futures):
+            if future.cancelled():
+                continue  # Never started; it doesn't count as extracted
+            with self._lock:
+                self.completed += 1
+            finished.add(indexes[future])
+            # Record the run of files that is now complete from the front
+            while self.recorded in finished and not self.cancelled:
+                entries = self._record(self.recorded, self.futures[self.recorded])
+                with self._lock:
+                    self.entries.extend(entries)
+                    self.recorded += 1
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    @property
+    def progress(self):
+        """Share of files extracted so far"""
+        return self.completed / self.total if self.total else 1.0
+
+    def snapshot(self):
+        """(completed, recorded, entries) read together, for one rerun to render"""
+        with self._lock:
+            return self.completed, self.recorded, list(self.entries)
+
+    def cancel(self):
+        """Drop files not started yet and stop recording; files already running finish unrecorded"""
+        self.cancelled = True
+        for future in self.futures:
+            future.cancel()
+
+    @property
+    def unrecorded(self):
+        """Names of files whose results were never recorded (after a cancel)"""
+        return self.names[self.recorded:]
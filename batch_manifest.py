@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+
+from extractor import append_to_fixed_income_master
+
+# Per-file states of a batch
+PENDING = 'pending'  # Queued, nothing written yet
+EXTRACTED = 'extracted'  # Extraction finished; rows not (all) appended yet
+APPENDED = 'appended'  # Every termsheet of the file is in the master file
+FAILED = 'failed'  # Extraction or an append failed; retried on the next batch
+
+# Bytes hashed at a time
+_CHUNK = 1024 * 1024
+
+
+def file_key(pdf_data):
+    """Manifest key of a file: the SHA-256 of its content, so a renamed re-upload is still recognised"""
+    return hashlib.sha256(pdf_data).hexdigest()
+
+
+def file_digest(path):
+    """SHA-256 of the file at path, or None when there is none"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def document_id(data):
+    """Manifest id of one termsheet of a file: its page range in a bundle, so renaming the upload doesn't change it"""
+    segment = data.get('segment')
+    return f"pages {segment['pages'][0]}-{segment['pages'][1]}" if segment else 'whole'
+
+
+def manifest_path(master_path):
+    """Where the manifest of batches appended to master_path lives"""
+    return f"{master_path}.manifest.json"
+
+
+class BatchManifest:
+    """Per-file progress of the batches appended to one master file, kept on disk
+
+    Files are keyed by content hash. Each state change is written straight
+    away, to a temporary file that replaces the manifest, so a crash leaves
+    either the old or the new manifest and never a torn one. The manifest
+    also records which termsheets of a file are appended (a bundle gives
+    several rows), by document_id, and the master file's hash after the last append; a master
+    file changed since (e.g. uploaded again) invalidates the manifest, unless
+    the change is an append cut short before the manifest recorded it.
+    """
+
+    def __init__(self, master_path, path=None):
+        self.master_path = master_path
+        self.path = path or manifest_path(master_path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+        self.files = manifest.get('files', {})
+        self.master_digest = manifest.get('master_digest')
+        # (key, document id) of an append that had started when the manifest was last written
+        self.appending = manifest.get('appending')
+        digest = file_digest(master_path)
+        if self.files and self.master_digest != digest:
+            if self.appending:
+                # Stopped between saving the master file and recording it: the append went through
+                key, document = self.appending
+                self.files[key]['documents'].append(document)
+                self.master_digest = digest
+            else:
+                print(f"Batch manifest {self.path} doesn't match {master_path}; starting a new one")
+                self.files = {}
+        self.appending = None
+
+    def _save(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'master_digest': self.master_digest, 'appending': self.appending, 'files': self.files}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def state(self, key):
+        entry = self.files.get(key)
+        return entry['state'] if entry else None
+
+    def completed(self, key):
+        """True once every termsheet of the file is in the master file"""
+        return self.state(key) == APPENDED
+
+    def appended_documents(self, key):
+        """document_ids of the file's termsheets already in the master file"""
+        entry = self.files.get(key)
+        return set(entry['documents']) if entry else set()
+
+    def mark_pending(self, files):
+        """Record (key, name) files as queued, in one write; completed files keep their state"""
+        with self._lock:
+            for key, name in files:
+                entry = self.files.setdefault(key, {'name': name, 'state': PENDING, 'documents': [], 'error': None})
+                if entry['state'] != APPENDED:
+                    entry.update(name=name, state=PENDING, error=None)
+            self._save()
+
+    def mark(self, key, state, error=None):
+        with self._lock:
+            entry = self.files.setdefault(key, {'name': None, 'state': PENDING, 'documents': [], 'error': None})
+            entry.update(state=state, error=error)
+            self.appending = None
+            self._save()
+
+    def begin_append(self, key, document):
+        """Record that one termsheet (a document_id) of a file is about to be appended to the master file"""
+        with self._lock:
+            self.files.setdefault(key, {'name': None, 'state': EXTRACTED, 'documents': [], 'error': None})
+            # Taken before the append, so a master file that differs later can only be this append's doing
+            self.master_digest = file_digest(self.master_path)
+            self.appending = [key, document]
+            self._save()
+
+    def document_appended(self, key, document):
+        """Record one termsheet (a document_id) of a file as appended, with the master file as it is now"""
+        with self._lock:
+            self.files[key]['documents'].append(document)
+            self.master_digest = file_digest(self.master_path)
+            self.appending = None
+            self._save()
+
+
+def append_documents(manifest, key, documents, database_rows, master_path):
+    """Append one file's rows to the master file, skipping termsheets an earlier batch appended
+
+    Returns (document name, outcome, message) per document, outcome being
+    'appended', 'skipped' or 'failed'; the file ends up APPENDED, or FAILED
+    if any of its termsheets couldn't be read or appended.
+    """
+    manifest.mark(key, EXTRACTED)
+    already = manifest.appended_documents(key)
+    outcomes = []
+    error = None
+    for data, database_row in zip(documents, database_rows):
+        document_name = data['Source_File']
+        document = document_id(data)
+        if database_row is None:
+            error = data['error']
+            outcomes.append((document_name, 'failed', error))
+        elif document in already:
+            outcomes.append((document_name, 'skipped', "appended by an earlier batch"))
+        else:
+            manifest.begin_append(key, document)
+            success, message = append_to_fixed_income_master(database_row, master_path)
+            if success:
+                manifest.document_appended(key, document)
+                outcomes.append((document_name, 'appended', message))
+            else:
+                error = message
+                outcomes.append((document_name, 'failed', message))
+    manifest.mark(key, APPENDED if error is None else FAILED, error)
+    return outcomes
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from extractor import create_database_row
+from sandbox import limit_memory, run_sandboxed, time_limit
+
+# Limits the pool initializer applied to this worker process; None outside a limited pool
+_worker_limits = None
+
+
+def _warm_up(limits=None):
+    """Start a worker: the extraction stack (pdfplumber, pypdf, numpy, pandas) comes in with this module
+
+    With limits, the worker's memory is capped here once; each file's
+    timeout and CPU allowance are applied per call (see extract_rows).
+    """
+    global _worker_limits
+    if limits is not None and _worker_limits is None:
+        limit_memory(limits)
+        _worker_limits = limits
+
+
+def create_pool(workers=None, limits=None):
+    """Process pool for batch extraction with every worker started and its imports done
+
+    Workers are spawned rather than forked so they never inherit the
+    threads of the process that creates them (e.g. a Streamlit server).
+    With limits, every worker runs under them, so files extracted with
+    limits in the pool need no sandbox process of their own.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'), initializer=_warm_up, initargs=(limits,))
+    for _ in range(workers):
+        pool.submit(_warm_up)
+    return pool
+
+
+def _extract_and_build(extractor, name, pdf_data, issuer_key, page_workers, bundle_workers):
+    """Extract one file and build its rows, both under one regex memo and time budget"""
+    # Row building reuses the extraction's memo; bundle segments extracted in worker processes keep their own
+    with extractor.document_scope(name) as memo:
+        documents = extractor.extract_bundle(pdf_data, source_name=name, workers=bundle_workers, page_workers=page_workers)
+
+        database_rows = []
+        for data in documents:
+            # Override with selected issuer
+            data['Detected_Issuer_Type'] = issuer_key
+            data['Issuer'] = extractor.issuer_patterns[issuer_key]['issuer_name']
+            data['Source_File'] = data.get('Source_File') or name
+
+            # Create database row (none for a document that couldn't be read)
+            database_rows.append(None if 'error' in data else create_database_row(data))
+    print(f"Regex memo for {name}: {memo.hits} hits, {memo.misses} misses")
+    return documents, database_rows
+
+
+def extract_rows(extractor, name, pdf_data, issuer_key, limits=None, page_workers=None, bundle_workers=None):
+    """Extract one file and build a master row for every termsheet in it
+
+    Returns (documents, database_rows) with each document's issuer set to
+    issuer_key; the row is None for a document that couldn't be read. With
+    limits, a stopped file raises SandboxError: in a worker of a pool created
+    with limits the call runs in the worker under its timeout and CPU
+    allowance (a worker killed by its limits breaks the pool, which the
+    caller replaces), anywhere else extraction and row building run
+    sandboxed together in a child process.
+    """
+    if limits is not None:
+        if _worker_limits is not None:
+            with time_limit(limits):
+                return _extract_and_build(extractor, name, pdf_data, issuer_key, page_workers, bundle_workers)
+        return run_sandboxed(_extract_and_build, extractor, name, pdf_data, issuer_key, page_workers, bundle_workers, limits=limits)
+    return _extract_and_build(extractor, name, pdf_data, issuer_key, page_workers, bundle_workers)
@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import threading
+from collections import namedtuple
+from concurrent.futures import CancelledError, Future
+from contextlib import contextmanager
+
+from pdf_backends import PdfDocument
+
+# Bytes that take about as long to extract as one page of text; image-heavy PDFs are slow per page
+BYTES_PER_PAGE = 200 * 1024
+
+# Documents at least this long (or large) hold a lot of pdfplumber layout in memory while extracted
+HEAVY_PAGES = 60
+HEAVY_BYTES = 20 * 1024 * 1024
+
+# Estimated extraction cost of one file: its page count, size and cost in page equivalents
+JobCost = namedtuple('JobCost', ['pages', 'size', 'cost'])
+
+
+def estimate_cost(pdf_data):
+    """JobCost of a PDF from its size and page count; pypdf only reads the page tree for the count"""
+    try:
+        with PdfDocument(pdf_data, 'pypdf') as document:
+            pages = document.page_count
+    except Exception:
+        pages = 0  # Unreadable PDFs fail fast in extraction
+    return JobCost(pages, len(pdf_data), pages + len(pdf_data) / BYTES_PER_PAGE)
+
+
+def is_heavy(cost):
+    return cost.pages >= HEAVY_PAGES or cost.size >= HEAVY_BYTES
+
+
+class Scheduler:
+    """Dispatches work to an executor longest-first, urgent work ahead of everything else
+
+    At most `workers` jobs are handed to the executor at a time, so the
+    order is decided here and not by the executor's own queue: urgent jobs
+    first, then the most expensive, so a long document starts early instead
+    of setting the batch's wall time from the back of the queue. At most
+    max_heavy memory-heavy jobs (see is_heavy) run at once; while that many
+    are running, lighter jobs go ahead of the next heavy one.
+
+    submit returns a Future that can be cancelled until its job is dispatched.
+    """
+
+    def __init__(self, executor, workers, max_heavy=None):
+        self.executor = executor
+        self.workers = max(1, workers)
+        self.max_heavy = max_heavy or max(1, self.workers // 2)
+        self._queue = []
+        self._order = itertools.count()
+        self._running = 0
+        self._heavy_running = 0
+        self._held = 0
+        self._lock = threading.Lock()
+
+    def submit(self, function, *args, cost, urgent=False, **kwargs):
+        """Queue function(*args, **kwargs) with its JobCost and return its Future"""
+        future = Future()
+        with self._lock:
+            heapq.heappush(self._queue, (not urgent, -cost.cost, next(self._order), future, is_heavy(cost), function, args, kwargs))
+        self._dispatch()
+        return future
+
+    @contextmanager
+    def batch(self):
+        """Queue every job submitted inside the block before any starts, so the first submitted isn't simply first"""
+        with self._lock:
+            self._held += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._held -= 1
+            self._dispatch()
+
+    def _next_job(self):
+        """Pop the first job that may start now, or None"""
+        skipped = []
+        job = None
+        while self._queue:
+            candidate = heapq.heappop(self._queue)
+            if candidate[4] and self._heavy_running >= self.max_heavy:
+                skipped.append(candidate)
+                continue
+            job = candidate
+            break
+        for candidate in skipped:
+            heapq.heappush(self._queue, candidate)
+        return job
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if self._held or self._running >= self.workers:
+                    return
+                job = self._next_job()
+                if job is None:
+                    return
+                _, _, _, future, heavy, function, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue  # Cancelled while queued
+                self._running += 1
+                self._heavy_running += heavy
+            try:
+                inner = self.executor.submit(function, *args, **kwargs)
+            except Exception as e:
+                self._finished(future, heavy, None, e)
+                continue
+            inner.add_done_callback(lambda inner, future=future, heavy=heavy: self._finished(future, heavy, inner))
+
+    def _finished(self, future, heavy, inner, error=None):
+        with self._lock:
+            self._running -= 1
+            self._heavy_running -= heavy
+        if error is None:
+            try:
+                error = inner.exception()
+            except CancelledError as e:
+                error = e  # Dropped by the executor, e.g. a pool shut down with its queue cancelled
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(inner.result())
+        self._dispatch()
@@ -0,0 +1,73 @@
+import re
+from collections import namedtuple
+
+# Title lines that open a termsheet
+TITLE_HEADERS = ('FINAL TERMS', 'INDICATIVE TERMSHEET', 'INDICATIVE TERMS', 'TERM SHEET', 'TERMSHEET', 'PRICING SUPPLEMENT')
+
+# Lines at the top of a page searched for a title or a labelled ISIN
+HEAD_LINES = 12
+
+# An ISIN on the same line as its label; ISIN columns of underlying tables don't count
+_LABELLED_ISIN = re.compile(r'\bISIN(?: CODE)?[ \t]*[:\-]?[ \t]*([A-Z]{2}[A-Z0-9]{9}[0-9])\b')
+
+_FIRST_PAGE_NUMBER = re.compile(r'\bPAGE\s+1\s+OF\s+\d+\b')
+
+# One termsheet of a bundle: pages start..stop-1, its labelled ISIN and why it starts where it does
+Segment = namedtuple('Segment', ['start', 'stop', 'isin', 'reason'])
+
+
+def page_signals(page_text):
+    """(title, labelled ISIN, page-one marker) found on one page"""
+    text = (page_text or '').upper()
+    head = '\n'.join(text.splitlines()[:HEAD_LINES])
+    title = next((header for header in TITLE_HEADERS if header in ' '.join(head.split())), None)
+    isin = _LABELLED_ISIN.search(head)
+    return title, isin.group(1) if isin else None, bool(_FIRST_PAGE_NUMBER.search(text))
+
+
+def segment_pages(page_texts):
+    """Split a bundle's pages into one Segment per termsheet
+
+    A page opens a new termsheet when it carries a labelled ISIN other than
+    the current termsheet's, restarts the page numbering ("Page 1 of N"), or
+    repeats a title header the current termsheet already had after a page
+    without it (a title on every page is a running header, not a new document).
+    """
+    segments = []
+    start, isin, titled, reason = 0, None, False, 'start'
+    previous_title = None
+    for index, page_text in enumerate(page_texts):
+        title, page_isin, first_page = page_signals(page_text)
+        if index > start:
+            boundary = None
+            if page_isin and isin and page_isin != isin:
+                boundary = f'new ISIN {page_isin}'
+            elif first_page:
+                boundary = 'page numbering restarts'
+            elif title and titled and not previous_title:
+                boundary = f'repeated {title}'
+            if boundary:
+                segments.append(Segment(start, index, isin, reason))
+                start, isin, titled, reason = index, None, False, boundary
+        isin = isin or page_isin
+        titled = titled or bool(title)
+        previous_title = title
+    if page_texts:
+        segments.append(Segment(start, len(page_texts), isin, reason))
+    return segments
+
+
+def describe(segments):
+    """One-line report of a bundle's segmentation"""
+    parts = [f"pages {segment.start + 1}-{segment.stop} ({segment.reason})" for segment in segments]
+    return f"Bundle: {len(segments)} termsheets: " + ', '.join(parts)
+
+
+def segment_name(source_name, segment):
+    """Name of one segment's document, e.g. bundle.pdf (pages 3-5)"""
+    return f"{source_name} (pages {segment.start + 1}-{segment.stop})"
+
+
+def segment_info(segment):
+    """The 'segment' entry of a segment's extracted data"""
+    return {'pages': [segment.start + 1, segment.stop], 'reason': segment.reason}
@@ -0,0 +1,166 @@
+import bisect
+import re
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+MONTH_NUMBERS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12
+}
+
+_MONTHS = 'January|February|March|April|May|June|July|August|September|October|November|December'
+
+# Every date format the extractors read, in one alternation so text is scanned once
+DATE_TOKEN_PATTERN = re.compile(
+    r'(?P<n_first>\d{1,2})(?P<n_sep1>[\/\-\.\s])(?P<n_second>\d{1,2})(?P<n_sep2>[\/\-\.\s])(?P<n_year>\d{4})'
+    rf'|(?P<dm_day>\d{{1,2}})\s+(?P<dm_month>{_MONTHS})\s+(?P<dm_year>\d{{4}})'
+    rf'|(?P<md_month>{_MONTHS})\s+(?P<md_day>\d{{1,2}}),?\s+(?P<md_year>\d{{4}})'
+    r'|(?P<iso_year>\d{4})(?P<iso_sep1>[\/\-\.])(?P<iso_month>\d{1,2})(?P<iso_sep2>[\/\-\.])(?P<iso_day>\d{1,2})',
+    re.IGNORECASE,
+)
+
+# Token formats
+NUMERIC = 'numeric'                # 15/03/2025, 15-03-2025, 15.03.2025, 15 03 2025
+DAY_MONTH_NAME = 'day_month_name'  # 15 March 2025
+MONTH_NAME_DAY = 'month_name_day'  # March 15, 2025
+ISO = 'iso'                        # 2025-03-15
+
+# Strings shorter than this (table cells, lines) are tokenized through a cache
+CACHED_TOKENIZE_MAX_LENGTH = 200
+
+# One date mention: where it is, how it was written, and what it means
+#   parts: the (first, second, year) strings for numeric dates, else (day, month, year)
+#   separators: the two separator characters of numeric and ISO dates
+#   date: normalized datetime.date, or None if the parts don't form a valid date
+DateToken = namedtuple('DateToken', ['start', 'end', 'text', 'format', 'parts', 'separators', 'date'])
+
+
+@lru_cache(maxsize=4096)
+def normalize_date(first, second, year, month_first=True):
+    """Turn numeric date parts into a datetime.date, trying the other order if needed"""
+    first, second, year = int(first), int(second), int(year)
+    month, day = (first, second) if month_first else (second, first)
+    try:
+        return date(year, month, day)
+    except ValueError:
+        try:
+            return date(year, day, month)
+        except ValueError:
+            return None
+
+
+def _token_from_match(match):
+    groups = match.groupdict()
+    if groups['n_first'] is not None:
+        parts = (groups['n_first'], groups['n_second'], groups['n_year'])
+        return DateToken(match.start(), match.end(), match.group(0), NUMERIC, parts,
+                         (groups['n_sep1'], groups['n_sep2']), normalize_date(*parts))
+    if groups['dm_day'] is not None:
+        month = str(MONTH_NUMBERS[groups['dm_month'].lower()])
+        parts = (groups['dm_day'], groups['dm_month'], groups['dm_year'])
+        return DateToken(match.start(), match.end(), match.group(0), DAY_MONTH_NAME, parts,
+                         None, normalize_date(month, groups['dm_day'], groups['dm_year']))
+    if groups['md_month'] is not None:
+        month = str(MONTH_NUMBERS[groups['md_month'].lower()])
+        parts = (groups['md_day'], groups['md_month'], groups['md_year'])
+        return DateToken(match.start(), match.end(), match.group(0), MONTH_NAME_DAY, parts,
+                         None, normalize_date(month, groups['md_day'], groups['md_year']))
+    parts = (groups['iso_day'], groups['iso_month'], groups['iso_year'])
+    return DateToken(match.start(), match.end(), match.group(0), ISO, parts,
+                     (groups['iso_sep1'], groups['iso_sep2']),
+                     normalize_date(groups['iso_month'], groups['iso_day'], groups['iso_year']))
+
+
+@lru_cache(maxsize=8192)
+def _tokenize_cached(text):
+    return tuple(_token_from_match(match) for match in DATE_TOKEN_PATTERN.finditer(text))
+
+
+def tokenize_dates(text):
+    """Find every date mention in text, in order of position"""
+    if not text:
+        return ()
+    if len(text) <= CACHED_TOKENIZE_MAX_LENGTH:
+        return _tokenize_cached(text)
+    return tuple(_token_from_match(match) for match in DATE_TOKEN_PATTERN.finditer(text))
+
+
+def month_first_string(token):
+    """Format a token as the M/D/YYYY string used for valuation dates"""
+    if token.format == NUMERIC:
+        return f"{token.parts[0]}/{token.parts[1]}/{token.parts[2]}"
+    if token.format == ISO:
+        return f"{token.parts[1]}/{token.parts[0]}/{token.parts[2]}"
+    month = MONTH_NUMBERS[token.parts[1].lower()]
+    return f"{month}/{token.parts[0]}/{token.parts[2]}"
+
+
+class DateTokens:
+    """Date tokens of one document, searchable by character offset"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize_dates(text)
+        self.starts = [token.start for token in self.tokens]
+        self.by_start = {token.start: token for token in self.tokens}
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def between(self, start, end):
+        """Tokens lying entirely inside text[start:end]"""
+        first = bisect.bisect_left(self.starts, start)
+        result = []
+        for token in self.tokens[first:]:
+            if token.start >= end:
+                break
+            if token.end <= end:
+                result.append(token)
+        return result
+
+    def after(self, position, min_skip=1):
+        """Token starting right after the ':' and whitespace following position
+
+        Mirrors a 'Label[:\\s]+<date>' pattern, where at least min_skip separator
+        characters sit between the label and the date.
+        """
+        text = self.text
+        cursor = position
+        while cursor < len(text) and (text[cursor] == ':' or text[cursor].isspace()):
+            cursor += 1
+        if cursor - position < min_skip:
+            return None
+        return self.by_start.get(cursor)
+
+
+class OrderedDateSet:
+    """Insertion-ordered collection of date strings with O(1) membership checks"""
+
+    def __init__(self):
+        self._items = []
+        self._seen = set()
+
+    def add(self, item):
+        """Add item if it is new; return True when it was added"""
+        if item in self._seen:
+            return False
+        self._seen.add(item)
+        self._items.append(item)
+        return True
+
+    def __contains__(self, item):
+        return item in self._seen
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def as_list(self):
+        return list(self._items)
@@ -0,0 +1,154 @@
+import re
+
+import regex_registry as rx
+
+# Scoped inline flag letters understood inside a (?flags:...) group
+_SCOPED_FLAGS = [
+    (re.IGNORECASE, 'i'),
+    (re.MULTILINE, 'm'),
+    (re.DOTALL, 's'),
+    (re.ASCII, 'a'),
+]
+
+# Flags that cannot be scoped to one branch of a combined pattern
+_UNSCOPABLE_FLAGS = re.VERBOSE | re.LOCALE | re.DEBUG
+
+# Backreferences and global inline flags break once a pattern is embedded
+_EMBED_BREAKERS = re.compile(r'\\[1-9]|\(\?P=|\(\?P<|\(\?[aiLmsux]+\)')
+
+
+def can_fuse(pattern, flags=0):
+    """Check whether pattern can run as one branch of a combined pattern"""
+    if not pattern or flags & _UNSCOPABLE_FLAGS:
+        return False
+    if _EMBED_BREAKERS.search(pattern):
+        return False
+    try:
+        re.compile(pattern, flags)
+    except re.error:
+        return False
+    return True
+
+
+def _scoped(pattern, flags):
+    """Wrap pattern in a group carrying its own flags"""
+    letters = ''.join(letter for flag, letter in _SCOPED_FLAGS if flags & flag)
+    return f'(?{letters}:{pattern})' if letters else f'(?:{pattern})'
+
+
+class FusedScanner:
+    """Runs a fixed set of (pattern, flags) fields over a text in one combined sweep
+
+    Each field becomes an optional lookahead with a named group, so a single
+    finditer reports every position where any field matches. Results are then
+    rebuilt with the field's own compiled pattern, so search, findall and nth
+    give exactly what re.search and re.findall would.
+    """
+
+    def __init__(self, fields):
+        self.fields = {}
+        self.unfused = []
+        branches = []
+        for pattern, flags in dict.fromkeys(fields):
+            if not can_fuse(pattern, flags):
+                self.unfused.append((pattern, flags))
+                continue
+            name = f'f{len(self.fields)}'
+            self.fields[(pattern, flags)] = name
+            branches.append(f'(?:(?=(?P<{name}>{_scoped(pattern, flags)}))|)')
+
+        self.regex = None
+        if branches:
+            # Only stop at positions where at least one field matched
+            require_one = '(?!)'
+            for name in reversed(list(self.fields.values())):
+                require_one = f'(?({name})|{require_one})'
+            self.regex = re.compile(''.join(branches) + require_one)
+
+    def scan(self, text):
+        """Sweep text once and return the per-field match positions"""
+        return FusedScan(self, text)
+
+
+class FusedScan:
+    """Per-field matches from one sweep, answering search/findall like the re module"""
+
+    def __init__(self, scanner, text):
+        self.scanner = scanner
+        self.text = text
+        self.spans = {name: [] for name in scanner.fields.values()}
+        if scanner.regex is not None:
+            for match in scanner.regex.finditer(text):
+                for name, span in self.spans.items():
+                    start = match.start(name)
+                    if start != -1:
+                        span.append((start, match.end(name)))
+
+    def _field(self, pattern, text, flags):
+        """Return the field name for a call this scan can answer, else None"""
+        if text is not self.text:
+            return None
+        return self.scanner.fields.get((pattern, flags))
+
+    def _non_overlapping(self, name):
+        """Spans re.finditer would report, or None if empty matches make it ambiguous"""
+        spans = []
+        position = 0
+        for start, end in self.spans[name]:
+            if start < position:
+                continue
+            if start == end:
+                return None
+            spans.append((start, end))
+            position = end
+        return spans
+
+    def search(self, pattern, text, flags=0):
+        name = self._field(pattern, text, flags)
+        if name is None:
+            return rx.search(pattern, text, flags)
+        spans = self.spans[name]
+        if not spans:
+            return None
+        return rx.compile_pattern(pattern, flags).regex.match(text, spans[0][0])
+
+    def findall(self, pattern, text, flags=0):
+        name = self._field(pattern, text, flags)
+        spans = self._non_overlapping(name) if name is not None else None
+        if spans is None:
+            return rx.findall(pattern, text, flags)
+        regex = rx.compile_pattern(pattern, flags).regex
+        return [rx.findall_value(regex.match(text, start)) for start, _ in spans]
+
+    def nth(self, pattern, text, n, flags=0):
+        """Return the nth (0-based) non-overlapping match, or None"""
+        name = self._field(pattern, text, flags)
+        spans = self._non_overlapping(name) if name is not None else None
+        if spans is None:
+            matches = list(rx.finditer(pattern, text, flags))
+            return matches[n] if n < len(matches) else None
+        if n >= len(spans):
+            return None
+        return rx.compile_pattern(pattern, flags).regex.match(text, spans[n][0])
+
+    def match(self, pattern, text, flags=0):
+        return rx.match(pattern, text, flags)
+
+
+class CallRecorder:
+    """Matcher that records every (pattern, flags) it is asked for and matches nothing"""
+
+    def __init__(self):
+        self.calls = []
+
+    def search(self, pattern, text, flags=0):
+        self.calls.append((pattern, flags))
+        return None
+
+    def findall(self, pattern, text, flags=0):
+        self.calls.append((pattern, flags))
+        return []
+
+    def match(self, pattern, text, flags=0):
+        self.calls.append((pattern, flags))
+        return None
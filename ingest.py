@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Termsheet ingestion from PDFs, ZIP archives and .eml messages
+Archive members and mail attachments are read in memory, never unpacked to
+disk, and extracted in worker processes a few members at a time; progress is
+checkpointed next to the master file, so an interrupted run resumes where it
+stopped when started again
+
+    python ingest.py inbox.zip forwarded.eml termsheet.pdf --master Fixed_Income_Desk_Master_File.xlsx [--workers 4] [--stats]
+"""
+
+import argparse
+import email
+import io
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+
+from pdf_backends import pdf_bytes
+
+# Archives (or mails) inside archives are opened down to this depth
+MAX_ARCHIVE_DEPTH = 3
+
+# Members larger than this once inflated are skipped instead of read (zip bombs)
+MAX_MEMBER_BYTES = 200 * 1024 * 1024
+
+PDF_MAGIC = b'%PDF-'
+
+# Attachments without a file name that are still worth opening
+_ATTACHMENT_TYPES = ('application/pdf', 'application/zip', 'message/rfc822')
+
+
+class IngestedPdf:
+    """A PDF found inside an upload, named by its path through the archives and shaped like an uploaded file"""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def getvalue(self):
+        return self.data
+
+
+def _kind(name, head):
+    lower = name.lower()
+    # Checked first: a stored (uncompressed) archive of PDFs has a PDF header in its first KB
+    if head.startswith(b'PK\x03\x04'):
+        return 'zip'
+    if PDF_MAGIC in head:
+        return 'pdf'  # Some producers put junk before the header; readers accept it within the first KB
+    if lower.endswith('.zip'):
+        return 'zip'
+    if lower.endswith('.eml'):
+        return 'eml'
+    return None
+
+
+def iter_pdfs(name, source, depth=0):
+    """Yield an IngestedPdf for every PDF in source (bytes or a seekable binary file)
+
+    ZIP archives and .eml messages are opened recursively down to
+    MAX_ARCHIVE_DEPTH; anything else is skipped and reported.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        head = bytes(source[:1024])
+    else:
+        head = source.read(1024)
+        source.seek(0)
+    kind = _kind(name, head)
+    if kind == 'pdf':
+        yield IngestedPdf(name, pdf_bytes(source))
+    elif kind is None:
+        print(f"Skipping {name}: not a PDF, ZIP or .eml file")
+    elif depth >= MAX_ARCHIVE_DEPTH:
+        print(f"Skipping {name}: nested more than {MAX_ARCHIVE_DEPTH} archives deep")
+    elif kind == 'zip':
+        yield from _zip_members(name, source, depth)
+    else:
+        yield from _eml_attachments(name, source, depth)
+
+
+def _zip_members(name, source, depth):
+    """The PDFs of one archive, each member inflated in memory only when its turn comes"""
+    try:
+        archive = zipfile.ZipFile(source if hasattr(source, 'read') else io.BytesIO(source))
+    except zipfile.BadZipFile:
+        print(f"Skipping {name}: not a readable ZIP archive")
+        return
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            member = f"{name}/{info.filename}"
+            if info.file_size > MAX_MEMBER_BYTES:
+                print(f"Skipping {member}: {info.file_size / (1024 * 1024):.0f} MB uncompressed")
+                continue
+            try:
+                data = archive.read(info)
+            except (RuntimeError, NotImplementedError, zipfile.BadZipFile) as e:
+                print(f"Skipping {member}: {e}")  # Encrypted or unsupported compression
+                continue
+            yield from iter_pdfs(member, data, depth + 1)
+
+
+def _eml_attachments(name, source, depth):
+    """The PDFs attached to one message, including those of forwarded messages and attached archives"""
+    message = email.message_from_bytes(pdf_bytes(source), policy=policy.default)
+    for part in message.walk():
+        if part.is_multipart():
+            continue
+        filename = part.get_filename()
+        if not filename and part.get_content_type() not in _ATTACHMENT_TYPES:
+            continue  # Message body
+        payload = part.get_payload(decode=True)
+        if payload:
+            yield from iter_pdfs(f"{name}/{filename or 'attachment'}", payload, depth + 1)
+
+
+def expand_uploads(files, cache=None):
+    """The PDFs among uploaded files, with archives and messages opened
+
+    PDFs are passed through as they are; cache, keyed by (name, size), keeps
+    the PDFs of archives already opened (e.g. across Streamlit reruns).
+    """
+    cache = {} if cache is None else cache
+    pdfs = []
+    for file in files:
+        if file.name.lower().endswith('.pdf'):
+            pdfs.append(file)
+            continue
+        key = (file.name, file.size)
+        if key not in cache:
+            cache[key] = list(iter_pdfs(file.name, file.getvalue()))
+        pdfs.extend(cache[key])
+    return pdfs
+
+
+class UnreadableInput:
+    """An input file that couldn't be read, passed on so the pipeline fails it under its name"""
+
+    def __init__(self, name, error):
+        self.name = name
+        self.error = error
+
+    def getvalue(self):
+        raise self.error
+
+
+def iter_paths(paths):
+    """Every PDF in the files at paths; archives are read straight from disk member by member
+
+    A file that can't be opened or read gives an UnreadableInput and the
+    remaining paths are still read.
+    """
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                yield from iter_pdfs(os.path.basename(path), f)
+        except OSError as e:
+            yield UnreadableInput(os.path.basename(path), e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract termsheets from PDFs, ZIP archives and .eml messages into the master file')
+    parser.add_argument('inputs', nargs='+', help='PDF, .zip or .eml files')
+    parser.add_argument('--master', required=True, help='Fixed Income Desk master file to append to')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--stats', action='store_true', help='print per-stage throughput and queue depth at the end')
+    args = parser.parse_args()
+
+    from extractor import FixedIncomeTermsheetExtractor
+    from pipeline import termsheet_pipeline
+    from regex_bounds import DEFAULT_BUDGET
+
+    # Same settings as the Streamlit app
+    extractor = FixedIncomeTermsheetExtractor(regex_budget=DEFAULT_BUDGET, max_rss_mb=1200)
+    workers = args.workers or os.cpu_count() or 1
+    appended, skipped, failed = 0, 0, []
+    # Reading, splitting, extraction and master file writes overlap; extraction runs in the pool
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        pipeline = termsheet_pipeline(extractor, args.master, pool=pool, extract_workers=workers)
+        for job, error in pipeline.run(iter_paths(args.inputs)):
+            if error is not None:
+                failed.append((getattr(job, 'name', None) or 'input', error))
+                continue
+            if job.skipped:
+                skipped += 1
+                if job.duplicate_of:
+                    print(f"⏭️ {job.name}: same content as {job.duplicate_of}")
+                else:
+                    print(f"⏭️ {job.name}: already in the master file")
+                continue
+            for (name, outcome, message), data in zip(job.results, job.documents):
+                if outcome == 'appended':
+                    appended += 1
+                    print(f"✅ {name}: {data.get('ISIN') or 'no ISIN'} ({data['Detected_Issuer_Type']})")
+                    if data.get('truncated'):
+                        print(f"⚠️ {name}: {data['truncated']}; later pages were not extracted")
+                elif outcome == 'skipped':
+                    print(f"⏭️ {name}: {message}")
+                else:
+                    failed.append((name, message))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    print(f"\n📊 {appended} termsheets appended to {args.master}, {len(failed)} failed, {skipped} files skipped as already appended or duplicates")
+    for name, error in failed:
+        print(f"❌ {name}: {error}")
+    if args.stats:
+        print("\nPipeline stages:")
+        print(pipeline.report())
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+from collections import deque
+
+# Roughly one page of extracted termsheet text, used when the caller
+# does not know where the first page ends
+FIRST_PAGE_CHARS = 3000
+
+# Hits on the first page count this many times more than later hits
+FIRST_PAGE_WEIGHT = 3.0
+
+
+class IssuerMatcher:
+    """Aho-Corasick automaton over every issuer identifier, scanned in a single pass"""
+
+    def __init__(self, issuer_patterns):
+        self.signature = identifier_signature(issuer_patterns)
+        self.issuer_order = [key for key in issuer_patterns if key != 'generic']
+
+        # Trie of uppercased identifiers; node 0 is the root
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for issuer_key in self.issuer_order:
+            for identifier in issuer_patterns[issuer_key]['identifiers']:
+                needle = identifier.upper()
+                if not needle:
+                    continue
+                node = 0
+                for char in needle:
+                    next_node = self._goto[node].get(char)
+                    if next_node is None:
+                        next_node = len(self._goto)
+                        self._goto[node][char] = next_node
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append([])
+                    node = next_node
+                # Multi-word identifiers are more specific than short codes like 'UBS'
+                weight = float(len(needle.split()))
+                self._output[node].append((len(needle), issuer_key, weight))
+
+        # Breadth-first pass to fill in failure links and merged outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_hits(self, text):
+        """Yield (start, end, issuer_key, weight) for every whole-word identifier hit"""
+        haystack = text.upper()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+        for position, char in enumerate(haystack):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not output[node]:
+                continue
+            end = position + 1
+            for length, issuer_key, weight in output[node]:
+                start = end - length
+                # Skip hits inside longer words, e.g. 'UBS' in 'SUBSCRIPTION'
+                if start > 0 and haystack[start - 1].isalnum():
+                    continue
+                if end < len(haystack) and haystack[end].isalnum():
+                    continue
+                yield start, end, issuer_key, weight
+
+    def score(self, text, first_page_end=None):
+        """Score every issuer by weighted identifier hits, favouring the first page"""
+        if first_page_end is None:
+            first_page_end = FIRST_PAGE_CHARS
+        scores = {issuer_key: 0.0 for issuer_key in self.issuer_order}
+        for start, end, issuer_key, weight in self.iter_hits(text):
+            if start < first_page_end:
+                weight *= FIRST_PAGE_WEIGHT
+            scores[issuer_key] += weight
+        return scores
+
+
+def identifier_signature(issuer_patterns):
+    """Hashable summary of the identifiers, used to notice edits to issuer_patterns"""
+    return tuple(
+        (issuer_key, tuple(config.get('identifiers', [])))
+        for issuer_key, config in issuer_patterns.items()
+    )
+
+
+def best_issuer(scores):
+    """Return the top-scoring issuer key, or 'generic' when nothing matched"""
+    best_key = 'generic'
+    best_score = 0.0
+    # Ties keep the issuer_patterns order, like the old first-match behaviour
+    for issuer_key, score in scores.items():
+        if score > best_score:
+            best_key = issuer_key
+            best_score = score
+    return best_key
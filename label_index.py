@@ -0,0 +1,114 @@
+import bisect
+import re
+from collections import namedtuple
+
+import regex_registry as rx
+
+# Field labels the extractors look up, matched case-insensitively anywhere in a line
+TERMSHEET_LABELS = [
+    # Amounts
+    'Issue Size', 'Issue Amount', 'Issue proceeds', 'Denomination', 'Specified Denomination',
+    'Aggregate Nominal Amount', 'Notional', 'Principal', 'Amount',
+    'Investment Amount', 'Principal Amount', 'Revenue', 'Management Fee', 'UF',
+    # Dates
+    'Issue Date', 'Strike Date', 'Maturity Date', 'Final Observation Date', 'Initial Observation Date',
+    # Barriers and triggers
+    'Knock', 'Barrier', 'Trigger', 'Autocall', 'Memory',
+    # Product details
+    'Product Type', 'Structure',
+]
+
+# How far past the end of a label's line a value pattern may run
+VALUE_WINDOW = 400
+
+# One occurrence of a label: where the label sits, and the value written next to it
+LabelEntry = namedtuple('LabelEntry', ['label', 'start', 'end', 'line_end', 'value', 'value_start'])
+
+
+class LabelIndex:
+    """Case-folded label -> value index of a termsheet, built in one pass over the text"""
+
+    def __init__(self, text, labels=None):
+        self.text = text
+        labels = TERMSHEET_LABELS if labels is None else labels
+        self.labels = {label.casefold(): label for label in labels}
+        self.entries = {key: [] for key in self.labels}
+
+        # Longest labels first so 'Specified Denomination' wins over a shorter prefix
+        ordered = sorted(self.labels, key=len, reverse=True)
+        # Labels that are a prefix of a longer label also occur wherever the longer one does
+        prefixes = {
+            key: [other for other in ordered if other != key and key.startswith(other)]
+            for key in ordered
+        }
+        scanner = rx.compile_pattern(
+            '(?=(?:' + '|'.join(f'({re.escape(self.labels[key])})' for key in ordered) + '))',
+            re.IGNORECASE,
+        )
+
+        line_ends = [m.start() for m in re.finditer('\n', text)]
+        for match in scanner.regex.finditer(text):
+            key = ordered[match.lastindex - 1]
+            start = match.start()
+            for found in [key] + prefixes[key]:
+                self._add(found, start, start + len(found), line_ends)
+
+    def _add(self, key, start, end, line_ends):
+        """Record one label occurrence along with the value that follows it"""
+        text = self.text
+        line_index = bisect.bisect_left(line_ends, end)
+        line_end = line_ends[line_index] if line_index < len(line_ends) else len(text)
+
+        # Value on the same line (two-column layout), else the next non-empty line
+        value_start = end
+        value = text[end:line_end].strip(' \t:')
+        if value:
+            value_start = text.index(value, end, line_end)
+        else:
+            while line_index < len(line_ends):
+                next_start = line_ends[line_index] + 1
+                line_index += 1
+                next_end = line_ends[line_index] if line_index < len(line_ends) else len(text)
+                value = text[next_start:next_end].strip()
+                if value:
+                    value_start = text.index(value, next_start, next_end)
+                    break
+
+        self.entries[key].append(LabelEntry(self.labels[key], start, end, line_end, value, value_start))
+
+    def get(self, label):
+        """Return the first occurrence of label, or None"""
+        entries = self.entries.get(label.casefold())
+        return entries[0] if entries else None
+
+    def occurrences(self, label):
+        """Every occurrence of label, in text order"""
+        return self.entries.get(label.casefold(), [])
+
+    def value(self, label, default=''):
+        """Return the value written next to the first occurrence of label"""
+        entry = self.get(label)
+        return entry.value if entry else default
+
+    def search(self, pattern, flags=0):
+        """Equivalent of re.search(pattern, text, flags) that starts from the indexed labels
+
+        Patterns that begin with an indexed label only run their remainder at each
+        occurrence of that label, within a window around the label's line. Any other
+        pattern falls back to a normal search of the whole text.
+        """
+        literal, tail = rx.split_literal_prefix(pattern)
+        entries = self.entries.get(literal.casefold()) if literal else None
+        if entries is None or flags & re.VERBOSE:
+            return rx.search(pattern, self.text, flags)
+
+        tail_regex = rx.compile_pattern(tail, flags).regex
+        text = self.text
+        for entry in entries:
+            # The index is case-insensitive; honour a case-sensitive pattern here
+            if not flags & re.IGNORECASE and text[entry.start:entry.end] != literal:
+                continue
+            match = tail_regex.match(text, entry.end, min(len(text), entry.line_end + VALUE_WINDOW))
+            if match:
+                return match
+        return None
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Per-issuer layout templates: where an issuer's tables sit on the page
+Table extraction on a template page only analyses the cropped regions,
+with table settings tuned once per region and cached in the store
+
+    python layout_templates.py ISSUER termsheet.pdf [--store layout_templates.json]
+"""
+
+import argparse
+import json
+import os
+
+import pdfplumber
+
+from page_triage import table_keywords
+from table_classifier import classify_table, observation_keywords, resolve_columns
+from word_grid import extract_page_tables
+
+DEFAULT_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layout_templates.json')
+
+# Points added around a recorded table so small layout shifts stay inside the crop
+CROP_MARGIN = 6.0
+
+# Pages searched for tables when recording a template
+RECORD_PAGES = 10
+
+# Table finders tried on a region, best first when they tie
+CANDIDATE_SETTINGS = [
+    {'engine': 'pdfplumber', 'table_settings': None},
+    {'engine': 'pdfplumber', 'table_settings': {'vertical_strategy': 'text', 'horizontal_strategy': 'lines'}},
+    {'engine': 'pdfplumber', 'table_settings': {'vertical_strategy': 'text', 'horizontal_strategy': 'text'}},
+    {'engine': 'words', 'table_settings': None},
+]
+
+
+def _normalize(text):
+    return ' '.join((text or '').upper().split())
+
+
+def _header_score(cells):
+    """Column roles a row would resolve as a table header"""
+    columns = resolve_columns([_normalize(cell) for cell in cells])
+    return sum(1 for index in columns.values() if index >= 0)
+
+
+def table_score(tables, issuer_type):
+    """How useful a table finder's output is: resolved header roles, filled data cells, fewest empty cells"""
+    roles = cells = empty = 0
+    for table in tables:
+        if len(table) < 2:
+            continue
+        classified = classify_table(table, observation_keywords(issuer_type))
+        if classified.kinds:
+            roles += sum(1 for index in classified.columns.values() if index >= 0)
+            filled = sum(1 for row in table[1:] for cell in row if cell and str(cell).strip())
+            cells += filled
+            empty += sum(len(row) for row in table[1:]) - filled
+    return roles, cells, -empty
+
+
+def crop_region(page, region):
+    """The region of a pdfplumber page, clipped to the page"""
+    x0, top, x1, bottom = region['bbox']
+    px0, ptop, px1, pbottom = page.bbox
+    return page.crop((max(x0, px0), max(top, ptop), min(x1, px1), min(bottom, pbottom)))
+
+
+def region_matches(crop, region):
+    """Check that the region still holds its table: the anchor heading is inside the crop"""
+    return region['anchor'] in _normalize(crop.extract_text())
+
+
+def region_tables(crop, region):
+    """Tables of a cropped region with the region's engine and settings"""
+    return extract_page_tables(crop, region.get('engine', 'pdfplumber'), region.get('table_settings'))
+
+
+def tune_region(crop, region, issuer_type):
+    """Pick the candidate table finder whose tables classify best in the region"""
+    best, best_score = CANDIDATE_SETTINGS[0], None
+    for candidate in CANDIDATE_SETTINGS:
+        score = table_score(extract_page_tables(crop, candidate['engine'], candidate['table_settings']), issuer_type)
+        if best_score is None or score > best_score:
+            best, best_score = candidate, score
+    region.update(best)
+
+
+class TemplateStore:
+    """Layout templates by issuer, read from and written back to a JSON file
+
+    A template is a list of regions, each with a page index, a bbox
+    (x0, top, x1, bottom in PDF points), the anchor heading that must appear
+    in the crop, and once tuned the table engine and settings to use.
+    """
+
+    def __init__(self, path=DEFAULT_TEMPLATE_PATH):
+        self.path = path
+        self._templates = None
+
+    @property
+    def templates(self):
+        if self._templates is None:
+            self._templates = {}
+            if self.path and os.path.exists(self.path):
+                with open(self.path, encoding='utf-8') as f:
+                    self._templates = json.load(f)
+        return self._templates
+
+    def regions(self, issuer_type, index):
+        """Regions of an issuer's template on one page"""
+        template = self.templates.get(issuer_type)
+        if not template:
+            return []
+        return [region for region in template['regions'] if region['page'] == index]
+
+    def page_tables(self, issuer_type, page, regions):
+        """Tables of a page's template regions, or None when any anchor is missing
+
+        Regions without cached settings are tuned on this page and the store
+        is saved, so the tuning cost is paid once per region.
+        """
+        crops = [crop_region(page, region) for region in regions]
+        if not all(region_matches(crop, region) for crop, region in zip(crops, regions)):
+            return None
+        tuned = False
+        tables = []
+        for crop, region in zip(crops, regions):
+            if 'engine' not in region:
+                tune_region(crop, region, issuer_type)
+                tuned = True
+            tables.extend(region_tables(crop, region))
+        if tuned:
+            self.save()
+        return tables
+
+    def record(self, issuer_type, pdf_path, pages=RECORD_PAGES):
+        """Record the table regions of a sample termsheet as the issuer's template"""
+        keywords = table_keywords(issuer_type)
+        regions = []
+        with pdfplumber.open(pdf_path) as pdf:
+            for index, page in enumerate(pdf.pages[:pages]):
+                for settings in CANDIDATE_SETTINGS[:3]:
+                    found = page.find_tables(settings['table_settings'])
+                    if found:
+                        break
+                for table in found:
+                    # Text-strategy tables often start above the real header; start the region at it
+                    header = None
+                    for row, cells in zip(table.rows, table.extract()):
+                        row_text = _normalize(' '.join(str(cell) for cell in cells if cell))
+                        anchors = [keyword for keyword in keywords if keyword in row_text]
+                        if anchors and (header is None or _header_score(cells) > header[0]):
+                            header = (_header_score(cells), row.bbox[1], anchors[0])
+                    if header is None or header[1] >= table.bbox[3]:
+                        continue
+                    # Full page width: the vertical cut is what drops most layout objects, and
+                    # columns wider than the finder's table aren't clipped
+                    region = {
+                        'page': index,
+                        'bbox': [page.bbox[0], header[1] - CROP_MARGIN, page.bbox[2], table.bbox[3] + CROP_MARGIN],
+                        'anchor': header[2],
+                    }
+                    tune_region(crop_region(page, region), region, issuer_type)
+                    regions.append(region)
+                page.close()
+        self.templates[issuer_type] = {'source': os.path.basename(pdf_path), 'regions': regions}
+        self.save()
+        return regions
+
+    def save(self):
+        """Write the store atomically so concurrent readers never see half a file"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.templates, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record an issuer's table regions from a sample termsheet")
+    parser.add_argument('issuer', help='issuer key, e.g. citigroup')
+    parser.add_argument('pdf', help='sample termsheet of that issuer')
+    parser.add_argument('--store', default=DEFAULT_TEMPLATE_PATH, help='template store to update')
+    parser.add_argument('--pages', type=int, default=RECORD_PAGES, help='pages to search for tables')
+    args = parser.parse_args()
+
+    regions = TemplateStore(args.store).record(args.issuer, args.pdf, args.pages)
+    print(f"📐 {args.issuer}: {len(regions)} table regions recorded in {args.store}")
+    for region in regions:
+        settings = region['table_settings'] or 'default settings'
+        print(f"  page {region['page'] + 1} {region['anchor']:<12} {[round(v, 1) for v in region['bbox']]} "
+              f"{region['engine']} {settings}")
+
+
+if __name__ == '__main__':
+    main()
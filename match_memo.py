@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Only document-sized texts are worth remembering; cells and lines are cheap to rescan
+MIN_MEMO_TEXT_LENGTH = 1024
+
+_active_memo = ContextVar('active_match_memo', default=None)
+
+
+class MatchMemo:
+    """Caches (pattern, flags, text) -> regex results for the lifetime of one extraction"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+        # Texts are kept alive so their id() stays unique while the memo exists
+        self._texts = {}
+
+    def lookup(self, kind, pattern, flags, text, compute):
+        """Return the cached result for this call, computing it on the first request"""
+        if len(text) < MIN_MEMO_TEXT_LENGTH:
+            return compute()
+        key = (kind, pattern, flags, id(text))
+        if key in self._results:
+            self.hits += 1
+            return self._results[key]
+        self.misses += 1
+        self._texts[id(text)] = text
+        result = compute()
+        self._results[key] = result
+        return result
+
+    def stats(self):
+        """Hit and miss counters for reporting"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        self._results.clear()
+        self._texts.clear()
+
+
+def active_memo():
+    """Return the memo of the current extraction, or None outside one"""
+    return _active_memo.get()
+
+
+@contextmanager
+def document_memo():
+    """Memoize regex results until the block exits; nested blocks share the outer memo"""
+    memo = _active_memo.get()
+    if memo is not None:
+        yield memo
+        return
+    memo = MatchMemo()
+    token = _active_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _active_memo.reset(token)
+        memo.clear()
@@ -0,0 +1,121 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pdf_backends import PdfDocument, pdf_bytes
+
+# Documents with fewer pages than this are read in-process; starting workers costs more than it saves
+MIN_PARALLEL_PAGES = 20
+
+# Pages one worker task covers; small enough that an early stop leaves little work behind
+PAGES_PER_TASK = 5
+
+
+def _read_texts(pdf_source, backend, start, stop):
+    """Worker: (text, backend) of pages start..stop-1"""
+    with PdfDocument(pdf_source, backend) as document:
+        pages = []
+        for index in range(start, stop):
+            pages.append((document.page_text(index), document.text_sources[index]))
+            document.release_page(index)
+        return pages
+
+
+def _read_tables(pdf_source, backend, pages, keywords, engine):
+    """Worker: (triage decision, tables) of each (index, text) page"""
+    with PdfDocument(pdf_source, backend) as document:
+        results = []
+        for index, page_text in pages:
+            decision = document.triage_page(index, page_text, keywords, engine)
+            tables = document.page_tables(index, engine) if decision.run_tables else []
+            document.release_page(index)
+            results.append((decision, tables))
+        return results
+
+
+class ParallelDocument(PdfDocument):
+    """A PdfDocument whose page text and tables are read ahead by worker processes
+
+    The page range is cut into runs of PAGES_PER_TASK pages and each worker
+    opens the PDF on its own. Results are handed out by page index, so the
+    extractor walks the pages in the same order and sees the same text,
+    triage decisions and tables as with the serial PdfDocument.
+    """
+
+    def __init__(self, pdf_source, backend='pdfplumber', workers=None, max_pages=None):
+        # Workers need something picklable: a path, or the bytes the parent document also holds
+        if not isinstance(pdf_source, (str, os.PathLike)):
+            pdf_source = pdf_bytes(pdf_source)
+        super().__init__(pdf_source, backend)
+        self._worker_source = pdf_source
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pages = max_pages
+        self._pool = None
+        self._limit = None
+        # Task number -> future; tasks are submitted at most `workers` ahead of the page being read
+        self._text_tasks = {}
+        self._table_key = None
+        self._table_start = None
+        self._table_tasks = {}
+        self._tables = {}
+
+    def _parallel(self, index):
+        """Start the worker pool on first use; False for pages (or documents) read in-process"""
+        if self._limit is None:
+            self._limit = min(self.page_count, self.max_pages) if self.max_pages else self.page_count
+            if self.workers > 1 and self._limit >= MIN_PARALLEL_PAGES:
+                self._pool = ProcessPoolExecutor(min(self.workers, math.ceil(self._limit / PAGES_PER_TASK)))
+        return self._pool is not None and index < self._limit
+
+    def _task_pages(self, task, start=0):
+        first = start + task * PAGES_PER_TASK
+        return range(first, min(first + PAGES_PER_TASK, self._limit))
+
+    def _look_ahead(self, tasks, task, start, submit):
+        """Make sure task and the next few tasks covering pages from start on are running"""
+        for ahead in range(task, task + self.workers):
+            if ahead not in tasks and self._task_pages(ahead, start):
+                tasks[ahead] = submit(self._task_pages(ahead, start))
+        return tasks[task]
+
+    def page_text(self, index):
+        if not self._parallel(index):
+            return super().page_text(index)
+        task = self._look_ahead(self._text_tasks, index // PAGES_PER_TASK, 0, lambda pages: self._pool.submit(
+            _read_texts, self._worker_source, self.backend, pages.start, pages.stop))
+        text, source = task.result()[index % PAGES_PER_TASK]
+        self.text_sources[index] = source
+        return text
+
+    def triage_page(self, index, page_text, keywords, engine='pdfplumber'):
+        if not self._parallel(index):
+            return super().triage_page(index, page_text, keywords, engine)
+        if self._table_key != (tuple(keywords), engine) or index < self._table_start:
+            # Table reading starts at the first page triaged (once the issuer is known)
+            for task in self._table_tasks.values():
+                task.cancel()
+            self._table_key = (tuple(keywords), engine)
+            self._table_start = index
+            self._table_tasks = {}
+        offset = index - self._table_start
+        task = self._look_ahead(self._table_tasks, offset // PAGES_PER_TASK, self._table_start, lambda pages: self._pool.submit(
+            _read_tables, self._worker_source, self.backend, [(page, self.page_text(page)) for page in pages], keywords, engine))
+        decision, tables = task.result()[offset % PAGES_PER_TASK]
+        self._tables[index] = tables
+        return decision
+
+    def page_tables(self, index, engine='pdfplumber'):
+        if index in self._tables:
+            return self._tables.pop(index)
+        return super().page_tables(index, engine)
+
+    def release_page(self, index):
+        self._tables.pop(index, None)
+        super().release_page(index)
+
+    def close(self):
+        if self._pool is not None:
+            # Read-ahead past an early stop is dropped; the extraction doesn't wait for it
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        super().close()
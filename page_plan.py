@@ -0,0 +1,71 @@
+import re
+
+# Letters a line needs, all upper case and without digits, to count as a heading of its own
+MIN_HEADING_LETTERS = 4
+
+
+def _heading_pattern(alternatives):
+    """Regex for a line that starts with one of the headings, as a whole word"""
+    return re.compile(r'^(?:' + '|'.join(re.escape(heading) for heading in alternatives) + r')\b')
+
+
+def _is_heading(line):
+    """Check whether a normalized line looks like a heading: upper case words, no figures"""
+    letters = sum(1 for c in line if c.isalpha())
+    return letters >= MIN_HEADING_LETTERS and line == line.upper() and not any(c.isdigit() for c in line)
+
+
+class PagePlan:
+    """Issuer-specific rule for how much of a document has to be read
+
+    A plan is met once the 'stop_after' heading (if any) and every 'sections'
+    heading have appeared on pages read so far, the last of those sections
+    has ended, and every plan field has a value. A 'sections' entry may list
+    alternatives separated by '|'. A heading counts only at the start of a
+    line, so running text such as "in whole or in part before" doesn't.
+
+    A section ends at the first later page that opens another heading and
+    repeats none of the plan's, so a schedule continuing over the next pages
+    (with or without its header) is read to the end. Headings already seen
+    on earlier pages, such as running page headers, don't end a section.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.active = bool(config)
+        self.stop_after = config.get('stop_after')
+        self.sections = [tuple(section.split('|')) for section in config.get('sections', [])]
+        self._stop_pattern = _heading_pattern([self.stop_after]) if self.stop_after else None
+        self._section_patterns = [_heading_pattern(alternatives) for alternatives in self.sections]
+        self.pending_fields = list(config.get('fields', []))
+        self._seen_sections = set()
+        self._stop_seen = False
+        self._seen_headings = set()
+
+    def read(self, page_text):
+        """Note the headings in page text; True once the plan's sections have ended on this page"""
+        if not self.active:
+            return False
+        plan_heading = other_heading = False
+        for line in (page_text or '').splitlines():
+            normalized = ' '.join(line.split())
+            upper = normalized.upper()
+            matched = False
+            for index, pattern in enumerate(self._section_patterns):
+                if pattern.match(upper):
+                    self._seen_sections.add(index)
+                    matched = True
+            if self._stop_pattern and self._stop_pattern.match(upper):
+                self._stop_seen = True
+                matched = True
+            if matched:
+                plan_heading = True
+            elif _is_heading(normalized) and normalized not in self._seen_headings:
+                self._seen_headings.add(normalized)
+                other_heading = True
+        # Never stop on a page that (re)opens one of the plan's headings
+        if plan_heading or not other_heading:
+            return False
+        if self.stop_after and not self._stop_seen:
+            return False
+        return len(self._seen_sections) == len(self.sections)
@@ -0,0 +1,70 @@
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def resident_memory_mb():
+    """Current resident set size of this process in MB, or None if it can't be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    try:
+        # Peak rather than current RSS, but still a safe upper bound; bytes on macOS, KB elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except (OSError, ValueError):
+        return None
+
+
+class MemoryCeiling:
+    """RSS limit checked between pages; once crossed, the rest of the work is skipped and flagged"""
+
+    def __init__(self, limit_mb=None):
+        self.limit_mb = limit_mb
+        self.flags = []
+        self.tripped = False
+
+    def exceeded(self):
+        if self.tripped or not self.limit_mb:
+            return self.tripped
+        rss = resident_memory_mb()
+        self.tripped = rss is not None and rss > self.limit_mb
+        return self.tripped
+
+    def flag(self, message):
+        """Record and report a degradation"""
+        self.flags.append(message)
+        print(f"Memory ceiling of {self.limit_mb} MB: {message}")
+
+
+class TextChunks:
+    """Document text built from page texts, joined on demand instead of by repeated +="""
+
+    def __init__(self):
+        self._joined = ''
+        self._pending = []
+        self._length = 0
+
+    def append(self, page_text):
+        """Add one page's text, with the newline extract_termsheet_data puts after every page"""
+        if page_text:
+            self._pending.append(page_text + "\n")
+            self._length += len(page_text) + 1
+
+    def __len__(self):
+        return self._length
+
+    def text(self):
+        if self._pending:
+            self._joined = ''.join([self._joined] + self._pending)
+            self._pending = []
+        return self._joined
@@ -0,0 +1,48 @@
+from collections import namedtuple
+
+from table_classifier import UNDERLYING_KEYWORDS, observation_keywords
+
+# Whether one page goes to table extraction, and why
+#   edges: ruling line/rect/curve count, or None when the page wasn't parsed for it
+TriageDecision = namedtuple('TriageDecision', ['page', 'run_tables', 'reason', 'keywords', 'edges'])
+
+
+def table_keywords(issuer_type):
+    """Header keywords that make a table useful to the table consumers"""
+    return list(dict.fromkeys(UNDERLYING_KEYWORDS + observation_keywords(issuer_type)))
+
+
+def _edge_count(page):
+    """Number of ruling objects pdfplumber's 'lines' table strategy can build cells from"""
+    return len(page.lines) + len(page.rects) + len(page.curves)
+
+
+def triage_page(index, page_text, keywords, table_engine='pdfplumber', plumber_page=None):
+    """Decide whether a page can hold a table the extractors will use
+
+    Tables are only classified by header keywords, so a page without any of
+    them in its text can't contribute one. pdfplumber's default table finder
+    also needs ruling lines, so for that engine a page without line, rect or
+    curve objects is skipped too (plumber_page is only touched for pages that
+    pass the keyword check).
+    """
+    if not page_text or not page_text.strip():
+        return TriageDecision(index, False, 'no text layer', [], None)
+
+    normalized = ' '.join(page_text.upper().split())
+    found = [keyword for keyword in keywords if keyword in normalized]
+    if not found:
+        return TriageDecision(index, False, 'no table keywords', [], None)
+
+    if table_engine == 'pdfplumber' and plumber_page is not None:
+        edges = _edge_count(plumber_page)
+        if edges == 0:
+            return TriageDecision(index, False, 'no ruling lines', found, 0)
+        return TriageDecision(index, True, 'keywords and ruling lines', found, edges)
+    return TriageDecision(index, True, 'keywords', found, None)
+
+
+def summarize(decisions):
+    """One-line report of a document's triage"""
+    selected = [decision.page + 1 for decision in decisions if decision.run_tables]
+    return f"Page triage: {len(selected)}/{len(decisions)} pages sent to table extraction {selected}"
@@ -0,0 +1,152 @@
+import io
+import os
+
+import pdfplumber
+import pypdf
+
+from page_triage import triage_page
+from word_grid import extract_page_tables
+
+# 'pdfplumber': pdfplumber for text and tables (the reference output)
+# 'pypdf': pypdf (layout mode) for text, pdfplumber only for the pages whose tables are read
+# 'auto': pypdf text where it looks usable, pdfplumber text for the rest
+BACKENDS = ('pdfplumber', 'pypdf', 'auto')
+
+# pypdf text with more merged-word runs than this share is re-read with pdfplumber
+MAX_MERGED_WORD_SHARE = 0.05
+
+# A "word" this long usually means pypdf dropped the spaces between words
+MERGED_WORD_LENGTH = 25
+
+
+def usable_text(text):
+    """Cheap check that a page's pypdf text is good enough to extract from"""
+    if not text or not text.strip():
+        return False
+    if '(cid:' in text or '\ufffd' in text:
+        return False  # Unmapped glyphs
+    words = text.split()
+    merged = sum(1 for word in words if len(word) > MERGED_WORD_LENGTH)
+    return merged <= len(words) * MAX_MERGED_WORD_SHARE
+
+
+def layout_text(page):
+    """pypdf text of one page with pdfplumber's line shape
+
+    Plain pypdf extraction puts the label and value of a two-column row on
+    separate lines, where the extractors' single-line patterns miss them.
+    Layout mode keeps each visual row on one line; its padding is collapsed
+    to single spaces and blank lines dropped, as in pdfplumber's text.
+    """
+    lines = (' '.join(line.split()) for line in page.extract_text(extraction_mode='layout').splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def pdf_bytes(pdf_source):
+    """The bytes of an in-memory PDF: bytes-like objects or binary file-like objects"""
+    if isinstance(pdf_source, bytes):
+        return pdf_source  # BytesIO shares an unmodified bytes object instead of copying it
+    if isinstance(pdf_source, (bytearray, memoryview)):
+        return bytes(pdf_source)
+    if hasattr(pdf_source, 'getvalue'):
+        return pdf_source.getvalue()
+    return pdf_source.read()
+
+
+def source_name(pdf_source):
+    """File name to report for a PDF given as a path or an object with a name"""
+    if isinstance(pdf_source, (str, os.PathLike)):
+        return os.path.basename(pdf_source)
+    name = getattr(pdf_source, 'name', '')
+    return os.path.basename(name) if isinstance(name, str) else ''
+
+
+class PdfDocument:
+    """An open PDF whose page text comes from the chosen backend and tables from pdfplumber
+
+    Both libraries are opened lazily, so the pypdf backend never parses a
+    page with pdfplumber unless its tables (or, in auto mode, its text) are
+    needed.
+    """
+
+    def __init__(self, pdf_source, backend='pdfplumber'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend {backend!r}; expected one of {BACKENDS}")
+        self.backend = backend
+        # Paths can be opened by both libraries; anything else is held once as bytes and
+        # handed to each library through its own BytesIO, so nothing touches the disk
+        if isinstance(pdf_source, (str, os.PathLike)):
+            self._source = pdf_source
+            self._data = None
+        else:
+            self._source = None
+            self._data = pdf_bytes(pdf_source)
+        self._plumber = None
+        self._reader = None
+        # Backend that produced each page's text, for reporting
+        self.text_sources = {}
+
+    def _open_source(self):
+        return self._source if self._source is not None else io.BytesIO(self._data)
+
+    @property
+    def plumber(self):
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self._open_source())
+        return self._plumber
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            self._reader = pypdf.PdfReader(self._open_source())
+        return self._reader
+
+    @property
+    def page_count(self):
+        if self.backend == 'pdfplumber':
+            return len(self.plumber.pages)
+        return len(self.reader.pages)
+
+    def page_text(self, index):
+        """Text of one page ('' when it has none)"""
+        if self.backend != 'pdfplumber':
+            text = layout_text(self.reader.pages[index])
+            if self.backend == 'pypdf' or usable_text(text):
+                self.text_sources[index] = 'pypdf'
+                return text
+        self.text_sources[index] = 'pdfplumber'
+        return self.plumber.pages[index].extract_text() or ''
+
+    def triage_page(self, index, page_text, keywords, engine='pdfplumber'):
+        """Triage decision for one page; its layout is only parsed if the keywords match"""
+        return triage_page(index, page_text, keywords, engine, self.plumber.pages[index])
+
+    def page_tables(self, index, engine='pdfplumber'):
+        """Tables of one page from the chosen table engine"""
+        return extract_page_tables(self.plumber.pages[index], engine)
+
+    def page_range_pdf(self, start, stop):
+        """A standalone PDF (bytes) of pages start..stop-1"""
+        writer = pypdf.PdfWriter()
+        for index in range(start, stop):
+            writer.add_page(self.reader.pages[index])
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+    def release_page(self, index):
+        """Drop the layout cache pdfplumber keeps for a page once it has been read"""
+        if self._plumber is not None:
+            self._plumber.pages[index].close()
+
+    def close(self):
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+        self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
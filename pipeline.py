@@ -0,0 +1,362 @@
+import threading
+import time
+from collections import namedtuple
+from queue import Empty, Full, Queue
+
+from batch_manifest import FAILED, BatchManifest, append_documents, file_key
+from bundle_segments import describe, segment_info, segment_name
+from extractor import ISSUER_DETECTION_PAGES, create_database_row
+from issuer_detection import best_issuer
+
+# Items waiting for a stage, per worker, before the stage in front of it blocks
+QUEUE_PER_WORKER = 2
+
+# Seconds a blocked worker waits before checking whether the pipeline was stopped
+_POLL = 0.1
+
+# One stage at one moment
+#   processed/failed: items finished by the stage, and those it raised on
+#   queued/max_queued: items waiting for the stage now, and the most that ever waited
+#   busy: seconds spent in the stage function, summed over workers
+#   blocked: seconds finished items waited for room in the next stage's queue
+#   elapsed: seconds since the pipeline started
+StageStats = namedtuple('StageStats', ['name', 'workers', 'processed', 'failed', 'queued', 'max_queued', 'busy', 'blocked', 'elapsed'])
+
+_DONE = object()
+
+
+class _Item:
+    __slots__ = ('index', 'value', 'error')
+
+    def __init__(self, index, value):
+        self.index = index
+        self.value = value
+        self.error = None
+
+
+class Stage:
+    """One step of a Pipeline: function(value) returns the value handed to the next stage
+
+    workers threads run the function; queue_size bounds the items waiting
+    for the stage (QUEUE_PER_WORKER per worker by default), so a slow stage
+    stalls the ones in front of it instead of piling up their output. An
+    ordered stage has one worker and takes items in input order.
+    """
+
+    def __init__(self, name, function, workers=1, queue_size=None, ordered=False):
+        if ordered and workers != 1:
+            raise ValueError(f"Ordered stage {name!r} needs exactly one worker")
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.ordered = ordered
+        self.queue = Queue(queue_size or QUEUE_PER_WORKER * workers)
+        self.processed = 0
+        self.failed = 0
+        self.max_queued = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+        self._running = 0
+
+    def _count(self, busy, failed):
+        with self._lock:
+            self.processed += 1
+            self.failed += failed
+            self.busy += busy
+
+    def _waited(self, seconds):
+        with self._lock:
+            self.blocked += seconds
+
+
+class Pipeline:
+    """Items flow from a source iterator through stages connected by bounded queues
+
+    Each stage runs on its own threads, so reading, parsing and writing
+    overlap; CPU-heavy stages hand their work to a process pool and wait on
+    it. An item a stage raises on carries the error past the later stages.
+    stats() can be read at any time, from any thread.
+    """
+
+    def __init__(self, stages, source_name='ingest'):
+        self.stages = list(stages)
+        # The source iterator counts as a stage of its own, with no queue in front of it
+        self.source = Stage(source_name, None)
+        self._output = Queue(QUEUE_PER_WORKER)
+        self._stopped = threading.Event()
+        self._started = None
+        self._finished = None
+
+    def _put(self, queue, item, stage):
+        start = time.perf_counter()
+        while not self._stopped.is_set():
+            try:
+                queue.put(item, timeout=_POLL)
+                break
+            except Full:
+                continue
+        stage._waited(time.perf_counter() - start)
+
+    def _get(self, queue):
+        while not self._stopped.is_set():
+            try:
+                return queue.get(timeout=_POLL)
+            except Empty:
+                continue
+        return _DONE
+
+    def _next_queue(self, position):
+        return self.stages[position + 1].queue if position + 1 < len(self.stages) else self._output
+
+    def _feed(self, items):
+        queue = self._next_queue(-1)
+        iterator = iter(items)
+        index = 0
+        try:
+            while not self._stopped.is_set():
+                start = time.perf_counter()
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    # Yielded as a failed item; a source that can go on (not a finished generator) is read further
+                    item = _Item(index, None)
+                    item.error = f"{self.source.name} failed: {e}"
+                    self.source._count(time.perf_counter() - start, 1)
+                    self._put(queue, item, self.source)
+                    index += 1
+                    continue
+                self.source._count(time.perf_counter() - start, 0)
+                self._put(queue, _Item(index, value), self.source)
+                index += 1
+        finally:
+            for _ in range(self.stages[0].workers if self.stages else 1):
+                self._put(queue, _DONE, self.source)
+
+    def _apply(self, stage, item):
+        if item.error is not None:
+            return  # Failed in an earlier stage; passed through untouched
+        start = time.perf_counter()
+        try:
+            item.value = stage.function(item.value)
+        except Exception as e:
+            item.error = f"{stage.name} failed: {e}"
+        stage._count(time.perf_counter() - start, item.error is not None)
+
+    def _work(self, position):
+        stage = self.stages[position]
+        queue = self._next_queue(position)
+        pending = {}
+        expected = 0
+        while True:
+            item = self._get(stage.queue)
+            if item is _DONE:
+                break
+            with stage._lock:
+                stage.max_queued = max(stage.max_queued, stage.queue.qsize() + 1)
+            if not stage.ordered:
+                self._apply(stage, item)
+                self._put(queue, item, stage)
+                continue
+            # Hold items that overtook an earlier one until it arrives
+            pending[item.index] = item
+            while expected in pending:
+                item = pending.pop(expected)
+                self._apply(stage, item)
+                self._put(queue, item, stage)
+                expected += 1
+        # The last worker out tells every worker of the next stage there is no more input
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last:
+            following = self.stages[position + 1].workers if position + 1 < len(self.stages) else 1
+            for _ in range(following):
+                self._put(queue, _DONE, stage)
+
+    def run(self, items):
+        """Feed items through every stage, yielding (value, error) per item in input order
+
+        error is None for an item every stage handled. Leaving the loop
+        early stops the pipeline; items still in flight are dropped.
+        """
+        self._started = time.perf_counter()
+        threads = [threading.Thread(target=self._feed, args=(items,), name=f'pipeline-{self.source.name}', daemon=True)]
+        for position, stage in enumerate(self.stages):
+            stage._running = stage.workers
+            threads += [threading.Thread(target=self._work, args=(position,), name=f'pipeline-{stage.name}', daemon=True)
+                        for _ in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        expected = 0
+        try:
+            while True:
+                item = self._get(self._output)
+                if item is _DONE:
+                    break
+                pending[item.index] = item
+                while expected in pending:
+                    item = pending.pop(expected)
+                    yield item.value, item.error
+                    expected += 1
+            for index in sorted(pending):
+                yield pending[index].value, pending[index].error
+        finally:
+            self._stopped.set()
+            self._finished = time.perf_counter()
+
+    def stats(self):
+        """A StageStats for the source and every stage"""
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.perf_counter()) - self._started
+        return [
+            StageStats(stage.name, stage.workers, stage.processed, stage.failed,
+                       0 if stage is self.source else stage.queue.qsize(), stage.max_queued,
+                       stage.busy, stage.blocked, elapsed)
+            for stage in [self.source] + self.stages
+        ]
+
+    def report(self):
+        """Per-stage throughput, queue depth and utilization, naming the busiest stage"""
+        stats = self.stats()
+        lines = []
+        for stage in stats:
+            rate = stage.processed / stage.elapsed if stage.elapsed else 0.0
+            utilization = stage.busy / (stage.elapsed * stage.workers) if stage.elapsed else 0.0
+            lines.append(f"{stage.name:<10} {stage.workers:>2} workers  {stage.processed:>5} done ({stage.failed} failed)  "
+                         f"{rate:6.2f}/s  busy {utilization:4.0%}  queue {stage.queued} (max {stage.max_queued})  "
+                         f"blocked {stage.blocked:.1f} s")
+        busiest = max(stats, key=lambda stage: stage.busy / stage.workers, default=None)
+        if busiest is not None and busiest.busy:
+            lines.append(f"Bottleneck: {busiest.name}")
+        return '\n'.join(lines)
+
+
+def _extract_termsheet(extractor, pdf_data, name, issuer_type):
+    """Every field of one termsheet (run in a worker process when the extract stage has a pool)"""
+    return extractor.extract_termsheet_data(pdf_data, source_name=name, issuer_type=issuer_type)
+
+
+class TermsheetJob:
+    """One PDF on its way through the termsheet pipeline"""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+        self.key = file_key(data)
+        # Already in the master file according to the batch manifest, or a duplicate; later stages leave it alone
+        self.skipped = False
+        # Name of the earlier input of this run with the same content, if any
+        self.duplicate_of = None
+        self.segments = []
+        self.page_texts = []
+        self.parts = []
+        self.issuers = []
+        self.documents = []
+        self.rows = []
+        # (document name, outcome, message) per document, filled by the persist stage
+        self.results = []
+
+
+def termsheet_pipeline(extractor, master_path, issuers=None, pool=None, extract_workers=1, manifest=None):
+    """Pipeline taking IngestedPdf-like items (name, getvalue()) to rows in the master file
+
+    Stages:
+      split    split the PDF into its termsheets on fast pypdf text
+      detect   issuer of each termsheet, from issuers (name -> key) or its first pages
+      extract  parse each termsheet's PDF (text and tables) and extract every
+               field with the detected issuer's patterns, in pool when given
+      map      master file row of each termsheet
+      persist  append the rows to master_path, in input order
+
+    The PDF parse proper happens inside extract, so extract's busy time
+    covers it; split only reads pypdf text.
+
+    extract_workers PDFs are extracted at once; with a pool it should match
+    the pool's worker count. Progress is checkpointed in manifest (by
+    default the BatchManifest next to master_path), and files it has as
+    appended go through as skipped, so an interrupted run can simply be
+    started again. An input with the same content as an earlier one of the
+    run goes through as skipped too, with duplicate_of set.
+    """
+    issuers = issuers or {}
+    manifest = manifest or BatchManifest(master_path)
+    # Content key -> name of the first input of the run with it
+    queued = {}
+
+    def split(pdf):
+        job = TermsheetJob(pdf.name, pdf.getvalue())
+        if manifest.completed(job.key):
+            job.skipped = True
+            return job
+        if job.key in queued:
+            job.skipped = True
+            job.duplicate_of = queued[job.key]
+            return job
+        queued[job.key] = job.name
+        manifest.mark_pending([(job.key, job.name)])
+        try:
+            job.segments, job.page_texts, job.parts = extractor.split_bundle(job.data)
+        except Exception as e:
+            manifest.mark(job.key, FAILED, str(e))
+            raise
+        if job.parts:
+            print(describe(job.segments))
+        return job
+
+    def detect(job):
+        for segment in job.segments:
+            issuer = issuers.get(job.name)
+            if issuer is None:
+                first_pages = job.page_texts[segment.start:min(segment.start + ISSUER_DETECTION_PAGES, segment.stop)]
+                issuer = best_issuer(extractor.score_issuers("\n".join(first_pages), len(first_pages[0]) if first_pages else 0))
+            # No identifier hit: extraction falls back to its own detection over the whole text
+            job.issuers.append(None if issuer == 'generic' else issuer)
+        return job
+
+    def extract(job):
+        if job.parts:
+            tasks = [(part, segment_name(job.name, segment), issuer)
+                     for part, segment, issuer in zip(job.parts, job.segments, job.issuers)]
+        else:
+            tasks = [(job.data, job.name, job.issuers[0] if job.issuers else None)]
+        try:
+            if pool is not None:
+                futures = [pool.submit(_extract_termsheet, extractor, *task) for task in tasks]
+                job.documents = [future.result() for future in futures]
+            else:
+                job.documents = [_extract_termsheet(extractor, *task) for task in tasks]
+        except Exception as e:
+            manifest.mark(job.key, FAILED, str(e))
+            raise
+        if job.parts:
+            for segment, data in zip(job.segments, job.documents):
+                data['segment'] = segment_info(segment)
+        return job
+
+    def map_rows(job):
+        for data in job.documents:
+            data['Source_File'] = data.get('Source_File') or job.name
+            job.rows.append(None if 'error' in data else create_database_row(data))
+        return job
+
+    def persist(job):
+        job.results = append_documents(manifest, job.key, job.documents, job.rows, master_path)
+        return job
+
+    def unless_skipped(function):
+        return lambda job: job if job.skipped else function(job)
+
+    return Pipeline([
+        Stage('split', split),
+        Stage('detect', unless_skipped(detect)),
+        Stage('extract', unless_skipped(extract), workers=extract_workers),
+        Stage('map', unless_skipped(map_rows)),
+        Stage('persist', unless_skipped(persist), ordered=True),
+    ])
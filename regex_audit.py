@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Offline audit of the extraction regexes
+Fuzzes every issuer pattern and every pattern literal in extractor.py with
+adversarial text and reports the worst-case timings
+
+    python regex_audit.py [--sizes 1000 4000 16000] [--top 20]
+"""
+
+import argparse
+import ast
+import os
+import random
+import re
+import time
+
+import regex_registry as rx
+from regex_bounds import DEFAULT_BUDGET, bounded_matching
+
+# Methods whose first argument is a regex
+_REGEX_CALLS = {'search', 'findall', 'match', 'finditer', 'compile_pattern', 'sub', 'split'}
+
+# Characters PDF text is noisy with
+_NOISE = ' \n\t.,-%&:()/$0123456789'
+
+# Stop growing the input for a pattern once one call takes this long
+_SLOW_SECONDS = 2.0
+
+
+def _flags_value(node):
+    """Evaluate a flags expression such as re.IGNORECASE | re.DOTALL, or None"""
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 're':
+        return getattr(re, node.attr, None)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        left, right = _flags_value(node.left), _flags_value(node.right)
+        if left is not None and right is not None:
+            return left | right
+    return None
+
+
+def _string_constants(node):
+    """String literals held directly in a list, tuple or dict literal"""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = node.elts
+    elif isinstance(node, ast.Dict):
+        values = node.values
+    else:
+        return []
+    return [value.value for value in values if isinstance(value, ast.Constant) and isinstance(value.value, str)]
+
+
+def source_patterns(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extractor.py')):
+    """Collect the regex literals of a module as (pattern, flags) pairs
+
+    Literals passed straight to a regex call keep the flags written next to
+    them; literals in *_patterns collections are audited with and without
+    IGNORECASE since their flags are decided where they are used.
+    """
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in _REGEX_CALLS:
+            if node.args and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str):
+                flags_node = node.args[2] if len(node.args) > 2 else next(
+                    (keyword.value for keyword in node.keywords if keyword.arg == 'flags'), None)
+                flags = _flags_value(flags_node) if flags_node is not None else 0
+                found.add((node.args[0].value, flags or 0))
+        elif isinstance(node, ast.Assign):
+            names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+            if any('pattern' in name for name in names):
+                for pattern in _string_constants(node.value):
+                    found.add((pattern, 0))
+                    found.add((pattern, re.IGNORECASE))
+
+    patterns = []
+    for pattern, flags in sorted(found, key=lambda item: (item[0], item[1])):
+        try:
+            re.compile(pattern, flags)
+        except re.error:
+            continue  # Not every string in a *_patterns list is a regex
+        patterns.append((pattern, flags))
+    return patterns
+
+
+def issuer_pattern_list(issuer_patterns):
+    """Every issuer pattern, with and without IGNORECASE"""
+    patterns = set()
+    for config in issuer_patterns.values():
+        for pattern in config.get('patterns', {}).values():
+            if pattern:
+                patterns.add((pattern, 0))
+                patterns.add((pattern, re.IGNORECASE))
+    return sorted(patterns)
+
+
+def adversarial_inputs(pattern, size, seed=0):
+    """Texts of roughly size characters built to make pattern backtrack"""
+    rng = random.Random(seed)
+    pieces = re.findall(r'[A-Za-z][A-Za-z\- ]{2,}', pattern) or ['Abc']
+    anchor = rx.split_literal_prefix(pattern)[0] or pieces[0]
+
+    def repeat(unit):
+        return (unit * (size // max(len(unit), 1) + 1))[:size]
+
+    inputs = {
+        'anchor_no_value': repeat(anchor + ' '),
+        'anchor_then_noise': anchor + repeat(' .,-'),
+        'digit_runs': repeat('1.'),
+        'percent_lists': repeat('1.5%, ') + 'x',
+        'capitalised_words': repeat('Abc '),
+        'whitespace': repeat(' \n'),
+        'pieces_and_noise': ''.join(
+            rng.choice(pieces) if rng.random() < 0.3 else rng.choice(_NOISE) for _ in range(size)
+        )[:size],
+        'pieces_no_digits': ' '.join(rng.choice(pieces) for _ in range(size // 4))[:size],
+    }
+    return inputs
+
+
+def _time_call(registered, text):
+    start = time.perf_counter()
+    registered.search(text)
+    registered.findall(text)
+    return time.perf_counter() - start
+
+
+def audit(patterns, sizes, budget=DEFAULT_BUDGET):
+    """Worst unbounded and bounded timing of each pattern over the adversarial inputs"""
+    results = []
+    for pattern, flags in patterns:
+        registered = rx.compile_pattern(pattern, flags)
+        worst = {'pattern': pattern, 'flags': flags, 'seconds': 0.0, 'bounded_seconds': 0.0, 'input': '', 'size': 0, 'overrun': False}
+        for size in sizes:
+            for kind, text in adversarial_inputs(pattern, size).items():
+                seconds = _time_call(registered, text)
+                with bounded_matching(budget, document=f'{kind}/{size}') as bounds:
+                    bounded_seconds = _time_call(registered, text)
+                if seconds > worst['seconds']:
+                    worst.update(seconds=seconds, input=kind, size=size)
+                worst['bounded_seconds'] = max(worst['bounded_seconds'], bounded_seconds)
+                worst['overrun'] = worst['overrun'] or bool(bounds.overruns)
+            if worst['seconds'] > _SLOW_SECONDS:
+                break
+        results.append(worst)
+    results.sort(key=lambda result: result['seconds'], reverse=True)
+    return results
+
+
+def _flag_names(flags):
+    names = [name for name in ('IGNORECASE', 'MULTILINE', 'DOTALL', 'VERBOSE') if flags & getattr(re, name)]
+    return '|'.join(names) or '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzz the extraction regexes and report worst-case timings')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 4000, 16000],
+                        help='adversarial input sizes in characters')
+    parser.add_argument('--top', type=int, default=20, help='number of slowest patterns to show')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='per-call budget for bounded matching')
+    args = parser.parse_args()
+
+    from extractor import FixedIncomeTermsheetExtractor
+
+    patterns = sorted(set(issuer_pattern_list(FixedIncomeTermsheetExtractor().issuer_patterns)) | set(source_patterns()))
+    print(f"🔍 Auditing {len(patterns)} patterns at sizes {args.sizes}...")
+    results = audit(patterns, args.sizes, args.budget)
+
+    print(f"\n{'unbounded':>10} {'bounded':>10}  {'input':<18} {'size':>6}  {'flags':<10} pattern")
+    for result in results[:args.top]:
+        marker = ' ⚠️' if result['overrun'] else ''
+        print(f"{result['seconds'] * 1000:8.1f}ms {result['bounded_seconds'] * 1000:8.1f}ms  "
+              f"{result['input']:<18} {result['size']:>6}  {_flag_names(result['flags']):<10} {result['pattern']}{marker}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Seconds one pattern call may spend on a document before it gives up (checked between windows)
+DEFAULT_BUDGET = 0.5
+
+# Characters an anchored pattern may run past its anchor
+ANCHOR_WINDOW = 1000
+
+# Size of the line-aligned blocks unanchored patterns are run over
+BLOCK_SIZE = 1000
+
+_active_bounds = ContextVar('active_match_bounds', default=None)
+
+
+class MatchBounds:
+    """Window and time limits for the regex calls of one document
+
+    Anchored patterns only run from each occurrence of their anchor up to
+    window characters past it; other patterns run block by block. The clock
+    is checked between windows, so a call stops at the first window boundary
+    after its budget is used. A single window is never interrupted: the
+    window and block sizes, not the budget, bound the backtracking one
+    window can do.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET, window=ANCHOR_WINDOW, block_size=BLOCK_SIZE, document=''):
+        self.budget = budget
+        self.window = window
+        self.block_size = block_size
+        self.document = document
+        # Patterns that ran over their budget, each reported once per document
+        self.overruns = []
+
+    def deadline(self):
+        return time.perf_counter() + self.budget
+
+    def expired(self, deadline, pattern):
+        """Check the clock between windows; record and report the pattern the first time it runs over"""
+        if time.perf_counter() <= deadline:
+            return False
+        if pattern not in self.overruns:
+            self.overruns.append(pattern)
+            print(f"Regex budget of {self.budget * 1000:.0f} ms exceeded by {pattern!r} on {self.document or 'document'}")
+        return True
+
+    def blocks(self, text):
+        """Split text into (start, end) blocks of at most block_size, ending at newlines where possible"""
+        start = 0
+        while start < len(text):
+            end = min(len(text), start + self.block_size)
+            if end < len(text):
+                newline = text.rfind('\n', start, end)
+                if newline > start:
+                    end = newline + 1
+            yield start, end
+            start = end
+
+
+def active_bounds():
+    """Return the bounds of the current document, or None when matching is unbounded"""
+    return _active_bounds.get()
+
+
+@contextmanager
+def bounded_matching(budget=DEFAULT_BUDGET, window=ANCHOR_WINDOW, block_size=BLOCK_SIZE, document=''):
+    """Run registry regex calls windowed and time-limited until the block exits"""
+    bounds = _active_bounds.get()
+    if bounds is not None:
+        yield bounds
+        return
+    bounds = MatchBounds(budget, window, block_size, document)
+    token = _active_bounds.set(bounds)
+    try:
+        yield bounds
+    finally:
+        _active_bounds.reset(token)
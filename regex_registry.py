@@ -0,0 +1,348 @@
+import re
+from functools import lru_cache
+
+from match_memo import active_memo
+from regex_bounds import active_bounds
+
+# Characters that end a literal run when deriving an anchor
+_META_CHARS = set('.^$*+?{}[]\\|()')
+
+# Quantifiers that make the preceding character optional or repeatable
+_OPTIONAL_QUANTIFIERS = set('*?{')
+
+# Anchors shorter than this are not worth a str.find before the regex
+MIN_ANCHOR_LENGTH = 3
+
+# Bound on the dynamically built ticker patterns kept compiled
+TICKER_PATTERN_CACHE_SIZE = 256
+
+_registry = {}
+_last_fold = (None, None)
+
+
+def _find_group_end(pattern, start):
+    """Return the index of the ')' closing the group opened at start, or None"""
+    depth = 0
+    i = start
+    in_class = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+            # A ']' straight after '[' or '[^' is a literal member
+            if pattern.startswith('^', i + 1):
+                i += 1
+            if pattern.startswith(']', i + 1):
+                i += 1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return None
+
+
+def _has_top_level_alternation(pattern):
+    """Check whether pattern contains a '|' outside of groups and classes"""
+    depth = 0
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+            if pattern.startswith('^', i + 1):
+                i += 1
+            if pattern.startswith(']', i + 1):
+                i += 1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def _scan_literal(pattern, start):
+    """Collect the literal characters from start that every match has to contain
+
+    Returns (literal, end, stopped_on_plus) where end is the index of the first
+    pattern character not covered by the literal.
+    """
+    literal = []
+    i = start
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if not escaped or escaped.isalnum():
+                break  # Character classes, word boundaries and backreferences
+            step = 2
+            c = escaped
+        elif c in _META_CHARS:
+            break
+        else:
+            step = 1
+
+        following = pattern[i + step:i + step + 1]
+        if following and following in _OPTIONAL_QUANTIFIERS:
+            break
+        if following == '+':
+            return ''.join(literal), i, True
+        literal.append(c)
+        i += step
+    return ''.join(literal), i, False
+
+
+def split_literal_prefix(pattern):
+    """Split pattern into its leading literal text and the regex that has to follow it"""
+    if _has_top_level_alternation(pattern):
+        return '', pattern
+    literal, end, _ = _scan_literal(pattern, 0)
+    return literal, pattern[end:]
+
+
+def derive_anchor(pattern, flags=0):
+    """Return the literal prefix every match of pattern has to start with, or ''"""
+    if flags & re.VERBOSE or _has_top_level_alternation(pattern):
+        return ''
+
+    # Step into leading groups that are always entered, e.g. '(EQUITY LINKED NOTE)'
+    i = 0
+    while pattern.startswith('(', i):
+        if pattern.startswith('(?:', i):
+            inner = i + 3
+        elif pattern.startswith('(?', i):
+            return ''  # Lookarounds, inline flags and named groups
+        else:
+            inner = i + 1
+        close = _find_group_end(pattern, i)
+        if close is None:
+            return ''
+        if close + 1 < len(pattern) and pattern[close + 1] in _OPTIONAL_QUANTIFIERS:
+            return ''
+        if _has_top_level_alternation(pattern[inner:close]):
+            return ''
+        i = inner
+
+    anchor, end, stopped_on_plus = _scan_literal(pattern, i)
+    if stopped_on_plus:
+        # 'b+' still requires one 'b'
+        anchor += pattern[end + 1] if pattern[end] == '\\' else pattern[end]
+
+    if len(anchor) < MIN_ANCHOR_LENGTH:
+        return ''
+    if flags & re.IGNORECASE:
+        # Only ASCII anchors fold the same way for str.casefold and the re module
+        if not anchor.isascii():
+            return ''
+        return anchor.casefold()
+    return anchor
+
+
+def _casefolded(text):
+    """Case-fold text for anchor checks, reusing the last result for the same string"""
+    global _last_fold
+    last_text, last_folded = _last_fold
+    if last_text is text:
+        return last_folded
+    folded = text.casefold()
+    # re.IGNORECASE also lets dotless i match 'i', which casefold() keeps distinct
+    if 'ı' in folded:
+        folded = folded.replace('ı', 'i')
+    _last_fold = (text, folded)
+    return folded
+
+
+def findall_value(match):
+    """Format a match the way re.findall does"""
+    groups = match.re.groups
+    if groups == 0:
+        return match.group(0)
+    if groups == 1:
+        value = match.group(1)
+        return '' if value is None else value
+    return tuple('' if value is None else value for value in match.groups())
+
+
+class RegisteredPattern:
+    """A pattern compiled once, with an optional literal anchor used as a prefilter"""
+
+    __slots__ = ('pattern', 'flags', 'regex', 'anchor')
+
+    def __init__(self, pattern, flags=0, anchor=None):
+        self.pattern = pattern
+        self.flags = flags
+        self.regex = re.compile(pattern, flags)
+        if anchor is None:
+            anchor = derive_anchor(pattern, flags)
+        elif flags & re.IGNORECASE:
+            anchor = anchor.casefold() if anchor.isascii() else ''
+        self.anchor = anchor
+
+    def could_match(self, text):
+        """Cheap check that the anchor occurs in text; False means the regex cannot match"""
+        if not self.anchor:
+            return True
+        if self.flags & re.IGNORECASE:
+            return self.anchor in _casefolded(text)
+        return self.anchor in text
+
+    def _search(self, text):
+        if not self.could_match(text):
+            return None
+        bounds = active_bounds()
+        if bounds is not None and len(text) > bounds.window:
+            return next(self._bounded_finditer(text, bounds), None)
+        return self.regex.search(text)
+
+    def _findall(self, text):
+        if not self.could_match(text):
+            return []
+        bounds = active_bounds()
+        if bounds is not None and len(text) > bounds.window:
+            return [findall_value(match) for match in self._bounded_finditer(text, bounds)]
+        return self.regex.findall(text)
+
+    def _anchor_positions(self, text):
+        """Offsets of the anchor in text, or None if they can't be mapped back to text"""
+        haystack = text
+        if self.flags & re.IGNORECASE:
+            haystack = _casefolded(text)
+            if len(haystack) != len(text):
+                return None
+        positions = []
+        position = haystack.find(self.anchor)
+        while position != -1:
+            positions.append(position)
+            position = haystack.find(self.anchor, position + 1)
+        return positions
+
+    def _bounded_finditer(self, text, bounds):
+        """Non-overlapping matches found within the windows and time budget of bounds
+
+        Anchored patterns are matched at each anchor occurrence with the match
+        cut off window characters later; other patterns are searched block by
+        block. Matches longer than a window or crossing a block edge are missed.
+        """
+        deadline = bounds.deadline()
+        positions = self._anchor_positions(text) if self.anchor else None
+        if positions is not None:
+            position = 0
+            for start in positions:
+                if start < position:
+                    continue
+                match = self.regex.match(text, start, min(len(text), start + bounds.window))
+                if match:
+                    yield match
+                    position = max(match.end(), start + 1)
+                if bounds.expired(deadline, self.pattern):
+                    return
+            return
+
+        for start, end in bounds.blocks(text):
+            for match in self.regex.finditer(text, start, end):
+                yield match
+            if bounds.expired(deadline, self.pattern):
+                return
+
+    def search(self, text):
+        memo = active_memo()
+        if memo is None:
+            return self._search(text)
+        return memo.lookup('search', self.pattern, self.flags, text, lambda: self._search(text))
+
+    def match(self, text):
+        if not self.could_match(text):
+            return None
+        bounds = active_bounds()
+        if bounds is not None and len(text) > bounds.window:
+            return self.regex.match(text, 0, bounds.window)
+        return self.regex.match(text)
+
+    def findall(self, text):
+        memo = active_memo()
+        if memo is None:
+            return self._findall(text)
+        # Callers get their own list so the memoized one can't be modified
+        return list(memo.lookup('findall', self.pattern, self.flags, text, lambda: tuple(self._findall(text))))
+
+    def finditer(self, text):
+        if not self.could_match(text):
+            return iter(())
+        bounds = active_bounds()
+        if bounds is not None and len(text) > bounds.window:
+            return self._bounded_finditer(text, bounds)
+        return self.regex.finditer(text)
+
+    def __repr__(self):
+        return f"RegisteredPattern({self.pattern!r}, flags={self.flags!r}, anchor={self.anchor!r})"
+
+
+def compile_pattern(pattern, flags=0, anchor=None):
+    """Return the registered pattern for (pattern, flags), compiling it on first use"""
+    if isinstance(pattern, RegisteredPattern):
+        return pattern
+    key = (pattern, flags)
+    registered = _registry.get(key)
+    if registered is None:
+        registered = RegisteredPattern(pattern, flags, anchor)
+        registered = _registry.setdefault(key, registered)
+    return registered
+
+
+def register_issuer_patterns(issuer_patterns):
+    """Compile every pattern of an issuer_patterns dict, with and without IGNORECASE"""
+    for config in issuer_patterns.values():
+        for pattern in config.get('patterns', {}).values():
+            if pattern:
+                compile_pattern(pattern)
+                compile_pattern(pattern, re.IGNORECASE)
+
+
+def registered_patterns():
+    """List every pattern compiled through the registry so far"""
+    return list(_registry.values())
+
+
+@lru_cache(maxsize=TICKER_PATTERN_CACHE_SIZE)
+def ticker_price_pattern(ticker):
+    """Pattern for a price quoted right after a ticker, with the ticker escaped"""
+    return RegisteredPattern(
+        rf'{re.escape(ticker)}[:\s]+(?:USD|EUR|GBP)?\s*([0-9.,]+)',
+        re.IGNORECASE,
+        anchor=ticker,
+    )
+
+
+# Drop-in replacements for the re module functions used by the extractor
+def search(pattern, text, flags=0):
+    return compile_pattern(pattern, flags).search(text)
+
+
+def match(pattern, text, flags=0):
+    return compile_pattern(pattern, flags).match(text)
+
+
+def findall(pattern, text, flags=0):
+    return compile_pattern(pattern, flags).findall(text)
+
+
+def finditer(pattern, text, flags=0):
+    return compile_pattern(pattern, flags).finditer(text)
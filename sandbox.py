@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+import signal
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: only the wall-clock timeout applies
+    resource = None
+
+# Limits for one sandboxed call
+#   timeout: wall-clock seconds before the child is killed
+#   memory_mb: address space the child may grow by, on top of what it starts with
+#   cpu_seconds: CPU time the child may use
+SandboxLimits = namedtuple('SandboxLimits', ['timeout', 'memory_mb', 'cpu_seconds'])
+
+DEFAULT_LIMITS = SandboxLimits(timeout=180, memory_mb=2048, cpu_seconds=300)
+
+# Seconds between SIGTERM and SIGKILL for a child that has to be stopped
+_KILL_GRACE = 2
+
+# Children start from a fresh interpreter instead of a fork of the (possibly multithreaded) caller
+_CONTEXT = multiprocessing.get_context('spawn')
+
+
+class SandboxError(Exception):
+    """A sandboxed call that timed out, ran out of memory or CPU, crashed or raised"""
+
+
+def _virtual_memory_bytes():
+    """Address space this process already uses, or 0 if it can't be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def limit_memory(limits):
+    """Cap the address space of this process for the rest of its life"""
+    if resource is None:
+        return
+    # The limit is growth on top of what the process already maps (its interpreter and imports)
+    memory = _virtual_memory_bytes() + limits.memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+
+def _set_limits(limits):
+    limit_memory(limits)
+    if resource is not None:
+        resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + _KILL_GRACE))
+
+
+def _cpu_seconds_used():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _raise_timeout(timeout):
+    def handler(signum, frame):
+        raise SandboxError(f"timed out after {timeout} s")
+    return handler
+
+
+@contextmanager
+def time_limit(limits):
+    """Apply the timeout and CPU limit of limits to one call in this process's main thread
+
+    For a long-lived worker whose memory is already capped (see
+    limit_memory): the call is interrupted with SandboxError once the
+    wall-clock timeout passes, and a MemoryError is reported as SandboxError
+    too, so the worker stays usable. RLIMIT_CPU counts over the process's
+    life, so it is set to the CPU used so far plus the call's allowance; a
+    call stuck where it can't be interrupted is killed by it (SIGXCPU),
+    along with its worker. Without the resource module (Windows) only the
+    timeout applies, and only where SIGALRM exists.
+    """
+    previous_handler = None
+    if hasattr(signal, 'SIGALRM'):
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout(limits.timeout))
+        signal.alarm(limits.timeout)
+    previous_cpu = None
+    if resource is not None:
+        previous_cpu = resource.getrlimit(resource.RLIMIT_CPU)
+        allowance = int(_cpu_seconds_used()) + limits.cpu_seconds
+        if previous_cpu[1] != resource.RLIM_INFINITY:
+            allowance = min(allowance, previous_cpu[1])
+        resource.setrlimit(resource.RLIMIT_CPU, (allowance, previous_cpu[1]))
+    try:
+        yield
+    except MemoryError:
+        raise SandboxError(f"memory limit exceeded (grew past {limits.memory_mb} MB)") from None
+    finally:
+        if previous_handler is not None:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous_handler)
+        if previous_cpu is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, previous_cpu)
+
+
+def _child(connection, limits, function, args, kwargs):
+    try:
+        # Own process group, so worker processes the call starts are stopped along with it
+        if hasattr(os, 'setsid'):
+            os.setsid()
+        _set_limits(limits)
+        result = function(*args, **kwargs)
+    except MemoryError:
+        connection.send(('error', f"memory limit exceeded (grew past {limits.memory_mb} MB)"))
+    except BaseException as e:
+        connection.send(('error', f"{type(e).__name__}: {e}"))
+    else:
+        connection.send(('ok', result))
+    finally:
+        connection.close()
+
+
+def _exit_reason(exitcode, limits):
+    """Why a child ended without sending a result"""
+    if exitcode is not None and exitcode < 0:
+        signum = -exitcode
+        if signum == getattr(signal, 'SIGXCPU', None):
+            return f"CPU time limit of {limits.cpu_seconds} s exceeded"
+        if signum == signal.SIGKILL:
+            return "killed (SIGKILL), most likely out of memory"
+        return f"crashed with {signal.Signals(signum).name}"
+    return f"exited with code {exitcode} without a result"
+
+
+def _signal_group(child, signum):
+    """Send signum to the child's process group (the child and every process it started)"""
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(child.pid, signum)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass  # Group already gone, or the child hasn't made it its own yet
+    if not child.is_alive():
+        return
+    if signum == getattr(signal, 'SIGKILL', None):
+        child.kill()
+    else:
+        child.terminate()
+
+
+def run_sandboxed(function, *args, limits=DEFAULT_LIMITS, **kwargs):
+    """Call function(*args, **kwargs) in a child process under limits and return its result
+
+    Raises SandboxError with the reason when the call times out, exceeds its
+    memory or CPU limit, crashes or raises. The child is spawned, so function
+    and its arguments travel to it pickled, as the result travels back. Any
+    process the call leaves behind (e.g. pool workers) is killed with it.
+    """
+    receiver, sender = _CONTEXT.Pipe(duplex=False)
+    child = _CONTEXT.Process(target=_child, args=(sender, limits, function, args, kwargs))
+    child.start()
+    sender.close()
+    try:
+        # The result has to be read before join; a large one doesn't fit the pipe buffer
+        if not receiver.poll(limits.timeout):
+            _signal_group(child, signal.SIGTERM)
+            child.join(_KILL_GRACE)
+            raise SandboxError(f"timed out after {limits.timeout} s")
+        try:
+            status, value = receiver.recv()
+        except EOFError:
+            child.join()
+            raise SandboxError(_exit_reason(child.exitcode, limits)) from None
+    finally:
+        receiver.close()
+        # Whatever is left of the group goes too: a stuck child, or workers it started and didn't reap
+        _signal_group(child, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        child.join()
+    if status == 'error':
+        raise SandboxError(value)
+    return value
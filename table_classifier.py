@@ -0,0 +1,115 @@
+import re
+from collections import namedtuple
+
+# Table kinds
+UNDERLYINGS = 'underlyings'    # One row per underlying asset
+OBSERVATION = 'observation'    # Observation / valuation date schedule
+PRICING = 'pricing'            # Has initial, knock-in or knock-out level columns
+
+# Header keywords marking a table of underlying assets
+UNDERLYING_KEYWORDS = ['UNDERLYING', 'ASSET', 'EQUITY', 'SHARE', 'STOCK', 'COMPANY', 'NAME', 'TICKER', 'BLOOMBERG']
+
+# Column role -> header regex; the first header matching a role gets it
+COLUMN_ROLES = {
+    'name': re.compile(r'NAME|COMPANY|UNDERLYING'),
+    'ticker': re.compile(r'TICKER|SYMBOL|CODE'),
+    'bloomberg': re.compile(r'BLOOMBERG'),
+    'initial': re.compile(r'INITIAL|SPOT|REFERENCE|STRIKE'),
+    'knock_in': re.compile(r'KNOCK[\s\-]*IN|BARRIER|KICK[\s\-]*IN'),
+    'knock_out': re.compile(r'KNOCK[\s\-]*OUT|AUTOCALL|TRIGGER|CALL'),
+}
+
+PRICE_ROLES = ('initial', 'knock_in', 'knock_out')
+
+# Issuer-specific header keywords for observation schedules
+OBSERVATION_KEYWORDS = {
+    'morgan_stanley': [
+        'KNOCK-OUT DETERMINATION DAY', 'KNOCK-OUT DETERMINATION DATE',
+        'KNOCK-OUT SETTLEMENT DATE', 'DETERMINATION DAY', 'SETTLEMENT DATE',
+        'OBSERVATION', 'VALUATION', 'AUTOCALL DATE'
+    ],
+    'macquarie': [
+        'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL DATE',
+        'EARLY REDEMPTION DATE', 'COUPON DATE', 'PAYMENT DATE'
+    ],
+    'ubs': [
+        'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL OBSERVATION',
+        'BARRIER OBSERVATION', 'COUPON OBSERVATION'
+    ],
+    'bnp_paribas': [
+        'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL DATE',
+        'COUPON PAYMENT DATE', 'MEMORY COUPON DATE'
+    ],
+    'barclays': [
+        'OBSERVATION DATE', 'VALUATION DATE', 'AUTOCALL DATE',
+        'BARRIER OBSERVATION', 'EARLY REDEMPTION DATE'
+    ],
+    'natixis': [
+        'OBSERVATION DATE', 'VALUATION DATE', 'COUPON DATE',
+        'AUTOCALL DATE', 'PAYMENT DATE'
+    ],
+}
+
+GENERIC_OBSERVATION_KEYWORDS = [
+    'OBSERVATION', 'VALUATION', 'COUPON', 'PAYMENT', 'SCHEDULE',
+    'AUTOCALL', 'EARLY REDEMPTION', 'MEMORY', 'BARRIER', 'DATE'
+]
+
+# One table with its header read once
+#   columns: role -> column index, or -1 when no header has that role
+ClassifiedTable = namedtuple('ClassifiedTable', ['rows', 'headers', 'header_text', 'kinds', 'columns'])
+
+
+def observation_keywords(issuer_type):
+    """Header keywords an issuer uses for its observation schedules"""
+    return OBSERVATION_KEYWORDS.get(issuer_type, GENERIC_OBSERVATION_KEYWORDS)
+
+
+def resolve_columns(headers):
+    """Map each column role to the index of the first header carrying it"""
+    return {
+        role: next((i for i, header in enumerate(headers) if regex.search(header)), -1)
+        for role, regex in COLUMN_ROLES.items()
+    }
+
+
+def classify_table(table, keywords):
+    """Tag one pdfplumber table with its kinds and column roles, given the issuer's observation keywords"""
+    headers = [str(cell).upper() if cell else '' for cell in table[0]]
+    header_text = ' '.join(headers)
+    columns = resolve_columns(headers)
+
+    kinds = set()
+    if any(keyword in header_text for keyword in UNDERLYING_KEYWORDS):
+        kinds.add(UNDERLYINGS)
+    if any(keyword in header_text for keyword in keywords):
+        kinds.add(OBSERVATION)
+    if any(columns[role] >= 0 for role in PRICE_ROLES):
+        kinds.add(PRICING)
+    return ClassifiedTable(table, headers, header_text, frozenset(kinds), columns)
+
+
+class TableIndex:
+    """The tables of one document, classified once and grouped by kind"""
+
+    def __init__(self, tables_data, issuer_type):
+        self.issuer_type = issuer_type
+        self.observation_keywords = observation_keywords(issuer_type)
+        self.tables = [classify_table(table, self.observation_keywords) for table in tables_data if len(table) > 1]
+        self.irrelevant = sum(1 for table in self.tables if not table.kinds)
+
+    def of_kind(self, kind):
+        """Tables tagged with kind, in document order"""
+        return [table for table in self.tables if kind in table.kinds]
+
+    @property
+    def underlyings(self):
+        return self.of_kind(UNDERLYINGS)
+
+    @property
+    def observation(self):
+        return self.of_kind(OBSERVATION)
+
+    @property
+    def pricing(self):
+        return self.of_kind(PRICING)
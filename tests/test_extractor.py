@@ -0,0 +1,76 @@
+import extractor
+from extractor import FixedIncomeTermsheetExtractor
+from layout_templates import TemplateStore
+from page_triage import TriageDecision
+
+
+class _TextDocument:
+    """Stands in for PdfDocument: a PDF that is only its page texts"""
+
+    def __init__(self, pages, backend=None):
+        self.pages = pages
+        self.read = []
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    def page_text(self, index):
+        self.read.append(index)
+        return self.pages[index]
+
+    def release_page(self, index):
+        pass
+
+    def triage_page(self, index, page_text, keywords, table_engine):
+        return TriageDecision(index, False, 'no tables', [], None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+def _extract(monkeypatch, pages, **kwargs):
+    document = _TextDocument(pages)
+    monkeypatch.setattr(extractor, 'PdfDocument', lambda source, backend: document)
+    return FixedIncomeTermsheetExtractor(layout_templates=TemplateStore(None)).extract_termsheet_data(b'', source_name='test.pdf', **kwargs), document
+
+
+def test_requested_fields_on_page_two_are_not_taken_from_fallbacks(monkeypatch):
+    pages = [
+        "Citigroup Global Markets Holdings Inc. Snowballing Autocall Notes\nISIN: XS2900000002",
+        "Currency: EUR\nKnock-In Barrier Level: 95% of Initial Level\nAutocall Barrier Level: 100% of Initial Level",
+    ]
+    fields = {'CCY', 'Knock-In%', 'Knock-Out%'}
+    selected, document = _extract(monkeypatch, pages, fields=fields)
+
+    assert document.read == [0, 1]
+    assert {field: selected[field] for field in fields} == {'CCY': 'EUR', 'Knock-In%': 0.95, 'Knock-Out%': 1.0}
+
+
+def test_requested_fields_stop_once_matched(monkeypatch):
+    pages = [
+        "Citigroup Global Markets Holdings Inc.\nISIN: XS2900000002\nCurrency: EUR",
+        "Knock-In Barrier Level: 95% of Initial Level",
+    ]
+    selected, document = _extract(monkeypatch, pages, fields={'ISIN', 'CCY'})
+
+    assert document.read == [0]
+    assert (selected['ISIN'], selected['CCY']) == ('XS2900000002', 'EUR')
+
+
+def test_page_plan_reads_a_schedule_continuing_on_the_next_page(monkeypatch):
+    pages = [
+        "Citigroup Global Markets Holdings Inc. Snowballing Autocall Notes\nISIN: XS2900000002\n"
+        "Maturity Date: 15/03/2028\nUNDERLYING\nBanco Santander SA",
+        "Observation Date Payment Date\n15 June 2025 22 June 2025\n15 September 2025 22 September 2025",
+        "15 December 2025 22 December 2025\nFurther provisions apply.",
+        "GENERAL TERMS\nThe notes are governed by English law.",
+        "BASE PROSPECTUS\nObservation Date 15 June 2030",
+    ]
+    data, document = _extract(monkeypatch, pages)
+
+    assert document.read == [0, 1, 2, 3]
+    assert data['valuation_dates'] == ['6/15/2025', '6/22/2025', '9/15/2025', '9/22/2025', '12/15/2025', '12/22/2025']
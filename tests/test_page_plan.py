@@ -0,0 +1,26 @@
+from page_plan import PagePlan
+
+CITI_PLAN = {'fields': ['ISIN'], 'sections': ['UNDERLYING', 'OBSERVATION DATE|VALUATION DATE']}
+
+
+def test_plan_does_not_stop_on_the_heading_page():
+    plan = PagePlan(CITI_PLAN)
+    assert not plan.read("UNDERLYING\nBanco Santander SA\nOBSERVATION DATE PAYMENT DATE\n15 June 2025\nGENERAL TERMS")
+    assert plan.read("ANNEX\nBase prospectus text")
+
+
+def test_schedule_spanning_two_pages_is_read_to_its_end():
+    plan = PagePlan(CITI_PLAN)
+    assert not plan.read("UNDERLYING\nBanco Santander SA")
+    assert not plan.read("Observation Date Payment Date\n15 June 2025 22 June 2025")
+    # Continuation with a repeated header, then without one
+    assert not plan.read("Observation Date Payment Date\n15 September 2025 22 September 2025")
+    assert not plan.read("15 December 2025 22 December 2025")
+    assert plan.read("GENERAL TERMS\nThe notes are governed by English law.")
+
+
+def test_running_page_header_does_not_end_a_section():
+    plan = PagePlan({'stop_after': 'PART B'})
+    assert not plan.read("FINAL TERMS\nPART B - OTHER INFORMATION")
+    assert not plan.read("FINAL TERMS\nValuation Date: 3 May 2026")
+    assert plan.read("FINAL TERMS\nRISK FACTORS")
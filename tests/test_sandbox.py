@@ -0,0 +1,15 @@
+import time
+
+import pytest
+
+from sandbox import SandboxError, SandboxLimits, time_limit
+
+
+def test_time_limit_stops_the_call_and_leaves_the_process_usable():
+    limits = SandboxLimits(timeout=1, memory_mb=256, cpu_seconds=30)
+    with pytest.raises(SandboxError, match='timed out after 1 s'):
+        with time_limit(limits):
+            time.sleep(5)
+    # The alarm is cleared, so later work in the same worker isn't interrupted
+    with time_limit(SandboxLimits(timeout=5, memory_mb=256, cpu_seconds=30)):
+        time.sleep(1.5)
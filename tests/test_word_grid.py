@@ -0,0 +1,43 @@
+from word_grid import words_to_tables
+
+
+def _words(rows, line_height=12.0):
+    """extract_words()-style dicts for rows of (x0, text) cells, one row per line"""
+    words = []
+    for number, cells in enumerate(rows):
+        top = 100.0 + number * line_height * 1.2
+        for x0, text in cells:
+            for word in text.split():
+                x1 = x0 + 5.0 * len(word)
+                words.append({'text': word, 'x0': x0, 'x1': x1, 'top': top, 'bottom': top + line_height})
+                x0 = x1 + 3.0
+    return words
+
+
+def test_key_terms_block_is_not_an_underlying_table():
+    words = _words([
+        [(50, 'Issuer'), (250, 'UBS AG, London Branch')],
+        [(50, 'Underlying'), (250, 'Nvidia Corporation')],
+        [(50, 'Initial Price'), (250, 'See table below')],
+        [(50, 'Kick-In Level'), (250, 'Sixty per cent')],
+        [(50, 'Issue Date'), (250, 'Fifteenth of March')],
+        [(50, 'Maturity Date'), (250, 'Fifteenth of March')],
+    ])
+    assert words_to_tables(words) == []
+
+
+def test_underlying_grid_after_key_terms_block():
+    words = _words([
+        [(50, 'Underlying'), (250, 'Nvidia Corporation')],
+        [(50, 'Kick-In Level'), (250, 'Sixty per cent')],
+        [],
+        [],
+        [(50, 'Underlying'), (200, 'Bloomberg Ticker'), (320, 'Initial Price')],
+        [(50, 'Nvidia Corp'), (200, 'NVDA UW'), (320, 'USD 120.50')],
+        [(50, 'Apple Inc'), (200, 'AAPL UW'), (320, 'USD 210.00')],
+    ])
+    assert words_to_tables(words) == [[
+        ['Underlying', 'Bloomberg Ticker', 'Initial Price'],
+        ['Nvidia Corp', 'NVDA UW', 'USD 120.50'],
+        ['Apple Inc', 'AAPL UW', 'USD 210.00'],
+    ]]
@@ -0,0 +1,157 @@
+import time
+
+import numpy as np
+import pdfplumber
+
+from table_classifier import UNDERLYINGS, classify_table, resolve_columns
+
+# Words whose tops differ by less than this (in points) sit on the same row
+ROW_TOLERANCE = 3.0
+
+# A horizontal gap wider than this between two words starts a new cell
+CELL_GAP = 8.0
+
+# Rows further apart than this many line heights end a table
+MAX_ROW_SPACING = 2.5
+
+
+def _rows(words):
+    """Group words into rows of cells using their coordinates
+
+    Returns a list of rows, each a list of (x0, x1, text) cells sorted by x,
+    with the row's top and bottom.
+    """
+    if not words:
+        return []
+    x0 = np.array([w['x0'] for w in words], dtype=float)
+    x1 = np.array([w['x1'] for w in words], dtype=float)
+    top = np.array([w['top'] for w in words], dtype=float)
+    bottom = np.array([w['bottom'] for w in words], dtype=float)
+
+    # Rows: sort by top and break wherever the jump to the next word exceeds the tolerance
+    order = np.lexsort((x0, top))
+    row_ids = np.concatenate(([0], np.cumsum(np.diff(top[order]) > ROW_TOLERANCE)))
+    # Re-sort each row by x so cells come out left to right
+    order = order[np.lexsort((x0[order], row_ids))]
+    row_ids = np.sort(row_ids)
+
+    # Cells: within a row, a gap wider than CELL_GAP starts a new cell
+    gaps = x0[order][1:] - x1[order][:-1]
+    new_cell = np.concatenate(([True], (np.diff(row_ids) != 0) | (gaps > CELL_GAP)))
+    starts = np.flatnonzero(new_cell)
+    ends = np.append(starts[1:], len(order))
+
+    cell_x0 = x0[order][starts]
+    cell_x1 = np.maximum.reduceat(x1[order], starts)
+    cell_row = row_ids[starts]
+    texts = [words[i]['text'] for i in order]
+    row_starts = np.flatnonzero(np.diff(row_ids, prepend=-1))
+    row_top = np.minimum.reduceat(top[order], row_starts)
+    row_bottom = np.maximum.reduceat(bottom[order], row_starts)
+
+    rows = [[] for _ in range(len(row_top))]
+    for cell in range(len(starts)):
+        text = ' '.join(texts[starts[cell]:ends[cell]])
+        rows[cell_row[cell]].append((cell_x0[cell], cell_x1[cell], text))
+    return [(cells, row_top[i], row_bottom[i]) for i, cells in enumerate(rows)]
+
+
+def _is_header(cells):
+    """A header row of an underlying grid: no figures, an underlying/name column and another known column
+
+    Two-column key-terms blocks ('Underlying' next to the asset's name,
+    'Initial Price' next to its wording) have the first but not the second.
+    """
+    if len(cells) < 2 or any(ch.isdigit() for _, _, text in cells for ch in text):
+        return False
+    columns = resolve_columns([text.upper() for _, _, text in cells])
+    name = columns.pop('name')
+    return name >= 0 and any(column >= 0 and column != name for column in columns.values())
+
+
+def _align(cells, centers):
+    """Place each cell in the column whose header centre is nearest"""
+    row = [None] * len(centers)
+    cell_centers = np.array([(x0 + x1) / 2 for x0, x1, _ in cells])
+    columns = np.abs(cell_centers[:, None] - centers[None, :]).argmin(axis=1)
+    for (_, _, text), column in zip(cells, columns):
+        row[column] = text if row[column] is None else f"{row[column]} {text}"
+    return row
+
+
+def words_to_tables(words):
+    """Rebuild borderless underlying tables from extract_words() output
+
+    A table starts at a header row (see _is_header) and runs while the
+    following rows have at least two cells and keep normal line spacing. Tables come back in the list-of-rows form extract_tables() uses,
+    with the header as the first row.
+    """
+    tables = []
+    rows = _rows(words)
+    i = 0
+    while i < len(rows):
+        cells, top, bottom = rows[i]
+        if not _is_header(cells):
+            i += 1
+            continue
+        centers = np.array([(x0 + x1) / 2 for x0, x1, _ in cells])
+        table = [[text for _, _, text in cells]]
+        line_height = bottom - top
+        previous_bottom = bottom
+        j = i + 1
+        while j < len(rows):
+            row_cells, row_top, row_bottom = rows[j]
+            if len(row_cells) < 2 or row_top - previous_bottom > MAX_ROW_SPACING * line_height:
+                break
+            table.append(_align(row_cells, centers))
+            previous_bottom = row_bottom
+            j += 1
+        if len(table) > 1:
+            tables.append(table)
+            i = j
+        else:
+            i += 1
+    return tables
+
+
+def _has_underlying_table(tables):
+    return any(len(table) > 1 and UNDERLYINGS in classify_table(table, []).kinds for table in tables)
+
+
+def extract_page_tables(page, engine='pdfplumber', table_settings=None):
+    """Tables of one pdfplumber page (or crop) from the chosen engine
+
+    'words' is pdfplumber's table finder with the word grid as a fallback:
+    the grids rebuilt from word positions are only added when pdfplumber
+    finds no underlying table on the page.
+    """
+    tables = page.extract_tables(table_settings)
+    if engine == 'words' and not _has_underlying_table(tables):
+        tables += words_to_tables(page.extract_words())
+    return tables
+
+
+def benchmark_table_engines(pdf_path, repeat=3):
+    """Time both table engines over a PDF and count the tables each finds"""
+    results = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for engine in ('pdfplumber', 'words'):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                tables = [table for page in pdf.pages for table in extract_page_tables(page, engine)]
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                # Drop pdfplumber's per-page caches so every run parses from scratch
+                for page in pdf.pages:
+                    page.flush_cache()
+            results[engine] = {'seconds': best, 'tables': sum(1 for table in tables if len(table) > 1)}
+    return results
+
+
+if __name__ == '__main__':
+    import sys
+
+    for path in sys.argv[1:]:
+        for engine, result in benchmark_table_engines(path).items():
+            print(f"{path}: {engine:<10} {result['seconds'] * 1000:8.1f} ms  {result['tables']} tables")